@@ -28,6 +28,7 @@ class CrisisAlert:
     immediate_action: str
     crisis_resources: List[Dict]
     timestamp: str
+    request_id: str = ""
 
 @dataclass
 class HumanEscalation:
@@ -39,6 +40,7 @@ class HumanEscalation:
     priority: str
     emotional_analysis: Dict
     timestamp: str
+    request_id: str = ""
 
 # Crisis Monitor Agent
 crisis_monitor = Agent(
@@ -121,6 +123,7 @@ async def handle_crisis_alert(ctx: Context, sender: str, msg: CrisisAlert):
         "user_id": msg.user_id,
         "anonymous_id": msg.anonymous_id,
         "session_id": msg.session_id,
+        "request_id": msg.request_id,
         "crisis_handled": True,
         "response_timestamp": datetime.now().isoformat()
     })
@@ -142,6 +145,7 @@ async def handle_human_escalation(ctx: Context, sender: str, msg: HumanEscalatio
         "user_id": msg.user_id,
         "anonymous_id": msg.anonymous_id,
         "session_id": msg.session_id,
+        "request_id": msg.request_id,
         "reason": msg.reason,
         "priority": msg.priority,
         "emotional_analysis": msg.emotional_analysis,
@@ -171,6 +175,7 @@ async def handle_emergency_crisis(ctx: Context, crisis_alert: CrisisAlert):
         "user_id": crisis_alert.user_id,
         "anonymous_id": crisis_alert.anonymous_id,
         "session_id": crisis_alert.session_id,
+        "request_id": crisis_alert.request_id,
         "crisis_type": crisis_alert.crisis_type,
         "immediate_actions": [
             "Contact emergency services if in immediate physical danger",
@@ -203,6 +208,7 @@ async def handle_high_priority_crisis(ctx: Context, crisis_alert: CrisisAlert):
         "user_id": crisis_alert.user_id,
         "anonymous_id": crisis_alert.anonymous_id,
         "session_id": crisis_alert.session_id,
+        "request_id": crisis_alert.request_id,
         "crisis_type": crisis_alert.crisis_type,
         "immediate_actions": [
             "Contact crisis counselor within 30 minutes",
@@ -236,6 +242,7 @@ async def simulate_human_assignment(ctx: Context, intervention_request: Dict):
         "user_id": intervention_request["user_id"],
         "anonymous_id": intervention_request["anonymous_id"],
         "session_id": intervention_request["session_id"],
+        "request_id": intervention_request["request_id"],
         "assigned_counselor": f"counselor_{intervention_request['anonymous_id'][:8]}",  # Simulated counselor ID
         "estimated_response_time": "5-10 minutes",
         "assignment_timestamp": datetime.now().isoformat(),
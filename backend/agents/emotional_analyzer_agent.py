@@ -17,7 +17,8 @@ import pathlib
 # Add parent directory to path for imports
 sys.path.append(str(pathlib.Path(__file__).parent.parent))
 
-from metta.metta_engine import DivorceSupportMeTTaEngine
+from metta.metta_engine import get_metta_engine
+from metta.analysis_executor import get_analysis_executor
 
 @dataclass
 class SupportRequest:
@@ -27,6 +28,7 @@ class SupportRequest:
     session_id: str
     timestamp: str
     anonymous_id: str
+    request_id: str = ""
 
 @dataclass
 class EmotionalAnalysis:
@@ -42,6 +44,8 @@ class EmotionalAnalysis:
     resources: List[Dict]
     therapeutic_approach: str
     requires_human_intervention: bool
+    # Echoed from the request so the orchestrator matches this reply to it
+    request_id: str = ""
 
 # Emotional Analyzer Agent
 emotional_analyzer = Agent(
@@ -57,9 +61,8 @@ async def setup_emotional_analyzer(ctx: Context):
     ctx.logger.info("🧠 Emotional Analyzer Agent starting up...")
 
     try:
-        # Initialize MeTTa engine
-        metta_engine = DivorceSupportMeTTaEngine()
-        ctx.storage.set("metta_engine", metta_engine)
+        # Warm the shared MeTTa engine so the first request skips table compilation
+        get_metta_engine()
         ctx.storage.set("processed_requests", 0)
         ctx.logger.info("✅ MeTTa engine initialized successfully")
     except Exception as e:
@@ -73,12 +76,6 @@ async def analyze_emotion(ctx: Context, sender: str, msg: SupportRequest):
     ctx.logger.info(f"🧠 Analyzing emotional state for user: {msg.anonymous_id}")
 
     try:
-        # Get MeTTa engine
-        metta_engine = ctx.storage.get("metta_engine")
-        if not metta_engine:
-            ctx.logger.error("❌ MeTTa engine not found in storage")
-            return
-
         # Prepare user context
         user_context = {
             "room_type": msg.room_type,
@@ -86,8 +83,8 @@ async def analyze_emotion(ctx: Context, sender: str, msg: SupportRequest):
             "user_id": msg.anonymous_id
         }
 
-        # Analyze the message using MeTTa
-        analysis_result = await metta_engine.analyze_message(msg.message, user_context)
+        # Analyze the message using MeTTa in the worker pool so crisis handling stays responsive
+        analysis_result = await get_analysis_executor().analyze(msg.message, user_context)
 
         # Update processed count
         processed = ctx.storage.get("processed_requests", 0)
@@ -106,7 +103,8 @@ async def analyze_emotion(ctx: Context, sender: str, msg: SupportRequest):
             follow_up_questions=analysis_result.get("follow_up_questions", []),
             resources=analysis_result.get("resources", []),
             therapeutic_approach=analysis_result.get("therapeutic_approach", "supportive"),
-            requires_human_intervention=analysis_result.get("requires_human_intervention", False)
+            requires_human_intervention=analysis_result.get("requires_human_intervention", False),
+            request_id=msg.request_id
         )
 
         # Send analysis to orchestrator
@@ -138,7 +136,8 @@ async def analyze_emotion(ctx: Context, sender: str, msg: SupportRequest):
             follow_up_questions=[],
             resources=[],
             therapeutic_approach="supportive",
-            requires_human_intervention=False
+            requires_human_intervention=False,
+            request_id=msg.request_id
         )
         await ctx.send("divorce_support_orchestrator", error_response)
 
@@ -153,6 +152,7 @@ async def handle_crisis_emergency(ctx: Context, analysis: EmotionalAnalysis, ori
         "user_id": original_request.user_id,
         "anonymous_id": original_request.anonymous_id,
         "session_id": original_request.session_id,
+        "request_id": original_request.request_id,
         "crisis_type": "suicidal_ideation",
         "severity": "emergency",
         "immediate_action": "human_intervention_required",
@@ -177,6 +177,7 @@ async def handle_human_escalation(ctx: Context, analysis: EmotionalAnalysis, ori
         "user_id": original_request.user_id,
         "anonymous_id": original_request.anonymous_id,
         "session_id": original_request.session_id,
+        "request_id": original_request.request_id,
         "reason": f"High intensity {analysis.primary_emotion} requiring human support",
         "priority": "high" if analysis.crisis_level == "high" else "medium",
         "emotional_analysis": analysis,
@@ -209,7 +210,9 @@ async def health_check(ctx: Context):
         "status": "healthy",
         "agent": "emotional_analyzer",
         "processed_requests": processed_requests,
-        "metta_engine": "active"
+        "metta_engine": "active",
+        "analysis_executor": get_analysis_executor().get_stats(),
+        "analysis_cache": get_metta_engine().analysis_cache.get_stats()
     }
 
 if __name__ == "__main__":
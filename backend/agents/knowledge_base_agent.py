@@ -26,6 +26,7 @@ class ResourceRequest:
     cultural_context: str
     room_type: str
     timestamp: str
+    request_id: str = ""
 
 @dataclass
 class ResourceResponse:
@@ -36,6 +37,8 @@ class ResourceResponse:
     support_groups: List[Dict]
     hotlines: List[Dict]
     personalized_recommendations: List[str]
+    # Echoed from the request so the orchestrator matches this reply to it
+    request_id: str = ""
 
 # Knowledge Base Agent
 knowledge_base = Agent(
@@ -227,7 +230,8 @@ async def provide_resources(ctx: Context, sender: str, msg: ResourceRequest):
         articles=relevant_resources.get("articles", []),
         support_groups=relevant_resources.get("support_groups", []),
         hotlines=relevant_resources.get("hotlines", []),
-        personalized_recommendations=relevant_resources.get("recommendations", [])
+        personalized_recommendations=relevant_resources.get("recommendations", []),
+        request_id=msg.request_id
     )
 
     # Send resources to orchestrator
@@ -6,18 +6,23 @@ Coordinates all agents and manages the overall support system with MeTTa integra
 
 import asyncio
 import json
-from typing import Dict, List
+from typing import Dict, List, Optional
 from dataclasses import dataclass
 from uagents import Agent, Context, Protocol
 from uagents.setup import fund_agent_if_low
 import sys
 import pathlib
+import os
 from datetime import datetime
+import random
+import time
 import uuid
 
 # Add parent directory to path for imports
 sys.path.append(str(pathlib.Path(__file__).parent.parent))
 
+from metrics import LatencyHistogram
+
 @dataclass
 class SupportRequest:
     user_id: str
@@ -26,6 +31,8 @@ class SupportRequest:
     session_id: str
     timestamp: str
     anonymous_id: str
+    # Correlates agent replies and the final response with this request; a session sends many
+    request_id: str = ""
 
 @dataclass
 class OrchestratorResponse:
@@ -38,6 +45,125 @@ class OrchestratorResponse:
     human_intervention: bool
     follow_up_questions: List[str]
 
+# Agent replies needed before a session's final response can be compiled
+REQUIRED_RESPONSES = ("emotional_analysis", "room_recommendation", "resources")
+
+# Seconds to wait for agent replies before sending a fallback response
+SESSION_RESPONSE_TIMEOUT = float(os.getenv("ORCHESTRATOR_SESSION_TIMEOUT", "30.0"))
+
+# Per-request deadline timers for requests still waiting on agent replies
+session_deadlines: Dict[str, asyncio.TimerHandle] = {}
+
+# "staged": emotional analysis runs first and its result feeds room matching and
+# resource selection; "parallel": all agents are asked at once with placeholders
+PIPELINE_MODE = os.getenv("ORCHESTRATOR_PIPELINE_MODE", "staged")
+
+# Per-destination send deadline (seconds) and retry budget for agent fan-out
+AGENT_DISPATCH_POLICY = {
+    "crisis_monitor": {"timeout": 2.0, "retries": 3},
+    "emotional_analyzer": {"timeout": 3.0, "retries": 2},
+    "room_matcher": {"timeout": 3.0, "retries": 1},
+    "knowledge_base": {"timeout": 5.0, "retries": 1}
+}
+
+# Base delay before a retry; doubles per attempt with +/-50% jitter
+DISPATCH_RETRY_BACKOFF = 0.1
+
+# Send latency per destination agent, plus sends that exhausted their retries
+dispatch_latency: Dict[str, LatencyHistogram] = {name: LatencyHistogram() for name in AGENT_DISPATCH_POLICY}
+dispatch_failures: Dict[str, int] = {name: 0 for name in AGENT_DISPATCH_POLICY}
+
+# Seconds between write-behind snapshots of the counters to ctx.storage
+STATS_SNAPSHOT_INTERVAL = 5.0
+
+# Listener the WebSocket server connects to for submitting requests and receiving responses
+BRIDGE_HOST = os.getenv("ORCHESTRATOR_BRIDGE_HOST", "localhost")
+BRIDGE_PORT = int(os.getenv("ORCHESTRATOR_BRIDGE_PORT", "8010"))
+
+# Largest encoded bridge message accepted
+BRIDGE_MAX_MESSAGE_BYTES = 4 * 1024 * 1024
+
+# Bridge connection that submitted each in-flight request, for pushing its response back
+bridge_routes: Dict[str, asyncio.StreamWriter] = {}
+bridge_stats = {"connections": 0, "requests": 0, "room_events": 0, "pushed": 0, "undeliverable": 0, "invalid_messages": 0}
+
+# Requests being processed off the bridge read loop; referenced so they aren't garbage collected
+bridge_tasks: set = set()
+
+class OrchestratorState:
+    """In-process session table and counters
+
+    Sessions live only in memory and are updated in O(1) per reply; the
+    counters are snapshotted to ctx.storage by a periodic write-behind task,
+    so persistence cost no longer grows with the number of active sessions.
+    Entries are keyed by request id, so a late agent reply to one message
+    can never be merged into the same user session's next request.
+    """
+
+    def __init__(self):
+        self.sessions: Dict[str, Dict] = {}
+        self.counters = {
+            "total_requests": 0,
+            "successful_responses": 0,
+            "crisis_interventions": 0,
+            "human_escalations": 0,
+            "agent_responses": {
+                "emotional_analyzer": 0,
+                "room_matcher": 0,
+                "crisis_monitor": 0,
+                "knowledge_base": 0
+            }
+        }
+        self.dirty = False
+
+    def start_session(self, request: SupportRequest) -> Dict:
+        """Register a new request's session"""
+        session_data = {
+            "request_id": request.request_id,
+            "session_id": request.session_id,
+            "user_id": request.user_id,
+            "anonymous_id": request.anonymous_id,
+            "room_type": request.room_type,
+            "started_at": request.timestamp,
+            "last_activity": request.timestamp,
+            "status": "processing"
+        }
+        self.sessions[request.request_id] = session_data
+        self.increment("total_requests")
+        return session_data
+
+    def record_reply(self, request_id: str, key: str, reply: Dict) -> Optional[Dict]:
+        """Attach an agent reply to its request, returning the session if still active"""
+        session_data = self.sessions.get(request_id)
+        if session_data is not None:
+            session_data[key] = reply
+            session_data["last_activity"] = datetime.now().isoformat()
+        return session_data
+
+    def finish_session(self, request_id: str) -> Optional[Dict]:
+        """Remove a request's session from the active table"""
+        return self.sessions.pop(request_id, None)
+
+    def increment(self, counter: str, amount: int = 1):
+        """Bump a top-level counter and mark the snapshot stale"""
+        self.counters[counter] += amount
+        self.dirty = True
+
+    def count_agent_response(self, agent_name: str):
+        """Count a reply from one of the specialized agents"""
+        self.counters["agent_responses"][agent_name] += 1
+        self.dirty = True
+
+    def snapshot(self) -> Dict:
+        """Counters plus the active session count, for storage and health checks"""
+        return dict(
+            self.counters,
+            agent_responses=dict(self.counters["agent_responses"]),
+            active_sessions=len(self.sessions)
+        )
+
+orchestrator_state = OrchestratorState()
+
 # Main Orchestrator Agent
 orchestrator = Agent(
     name="divorce_support_orchestrator",
@@ -51,23 +177,17 @@ async def setup_orchestrator(ctx: Context):
     """Initialize the main orchestrator agent"""
     ctx.logger.info("🎭 Divorce Support Orchestrator starting up...")
 
-    # Initialize system statistics
-    system_stats = {
-        "total_requests": 0,
-        "successful_responses": 0,
-        "crisis_interventions": 0,
-        "human_escalations": 0,
-        "active_sessions": {},
-        "agent_responses": {
-            "emotional_analyzer": 0,
-            "room_matcher": 0,
-            "crisis_monitor": 0,
-            "knowledge_base": 0
-        }
-    }
+    # Initial snapshot of the in-memory counters
+    ctx.storage.set("system_stats", orchestrator_state.snapshot())
 
-    ctx.storage.set("system_stats", system_stats)
-    ctx.storage.set("response_cache", {})
+    # Accept support requests pushed by the WebSocket server
+    await asyncio.start_server(
+        lambda reader, writer: handle_bridge_connection(ctx, reader, writer),
+        BRIDGE_HOST,
+        BRIDGE_PORT,
+        limit=BRIDGE_MAX_MESSAGE_BYTES
+    )
+    ctx.logger.info(f"🌉 Bridge listening on {BRIDGE_HOST}:{BRIDGE_PORT}")
 
     ctx.logger.info("✅ Orchestrator initialized successfully")
 
@@ -77,62 +197,194 @@ async def process_support_request(ctx: Context, sender: str, msg: SupportRequest
 
     ctx.logger.info(f"🎭 Processing support request from user: {msg.anonymous_id}")
 
-    # Update system statistics
-    system_stats = ctx.storage.get("system_stats")
-    system_stats["total_requests"] += 1
+    if not msg.request_id:
+        msg.request_id = uuid.uuid4().hex
 
     # Track active session
-    active_sessions = system_stats["active_sessions"]
-    active_sessions[msg.session_id] = {
-        "user_id": msg.user_id,
-        "anonymous_id": msg.anonymous_id,
-        "room_type": msg.room_type,
-        "started_at": msg.timestamp,
-        "last_activity": msg.timestamp,
-        "status": "processing"
-    }
-    system_stats["active_sessions"] = active_sessions
-    ctx.storage.set("system_stats", system_stats)
+    orchestrator_state.start_session(msg)
+
+    # Fall back to a timeout response if the agents don't all reply in time
+    arm_session_deadline(ctx, msg.request_id)
 
     # Send request to all specialized agents
     await coordinate_agent_requests(ctx, msg)
 
+async def handle_bridge_connection(ctx: Context, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+    """Read newline-delimited support requests from a WebSocket server connection"""
+
+    bridge_stats["connections"] += 1
+    try:
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+
+            # A malformed line is skipped; it must not drop the connection and its routes
+            try:
+                message = json.loads(line)
+                message_type = message.get("type")
+                if message_type == "support_request":
+                    request = SupportRequest(**message["request"])
+                    if not request.request_id:
+                        raise KeyError("request_id")
+            except (ValueError, TypeError, KeyError, AttributeError) as e:
+                bridge_stats["invalid_messages"] += 1
+                ctx.logger.warning(f"🌉 Skipping invalid bridge message: {e!r}")
+                continue
+
+            # Membership changes feed the room matcher's occupancy index
+            if message_type in ("room_event", "room_snapshot"):
+                bridge_stats["room_events"] += 1
+                await ctx.send("room_matcher", message)
+                continue
+
+            if message_type != "support_request":
+                continue
+
+            bridge_routes[request.request_id] = writer
+            bridge_stats["requests"] += 1
+
+            # Each request runs on its own task so a slow agent dispatch doesn't hold up the stream
+            task = asyncio.create_task(process_support_request(ctx, "websocket_bridge", request))
+            bridge_tasks.add(task)
+            task.add_done_callback(lambda done: finish_bridge_task(ctx, done))
+    except (ConnectionError, asyncio.IncompleteReadError, ValueError) as e:
+        ctx.logger.warning(f"🌉 Bridge connection dropped: {e}")
+    finally:
+        bridge_stats["connections"] -= 1
+        for request_id in [request_id for request_id, route in bridge_routes.items() if route is writer]:
+            del bridge_routes[request_id]
+        writer.close()
+
+def finish_bridge_task(ctx: Context, task: asyncio.Task):
+    """Release a finished bridge request task and log its failure, if any"""
+
+    bridge_tasks.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        ctx.logger.error(f"🌉 Bridge support request failed: {task.exception()!r}")
+
+async def push_to_bridge(ctx: Context, request_id: str, message: Dict, final: bool = False) -> bool:
+    """Push a message to the WebSocket server that submitted the request"""
+
+    writer = bridge_routes.pop(request_id, None) if final else bridge_routes.get(request_id)
+    if writer is None or writer.is_closing():
+        bridge_stats["undeliverable"] += 1
+        return False
+
+    try:
+        writer.write(json.dumps(message).encode() + b"\n")
+        await writer.drain()
+    except ConnectionError as e:
+        ctx.logger.warning(f"🌉 Push to bridge failed for request {request_id}: {e}")
+        bridge_stats["undeliverable"] += 1
+        return False
+
+    bridge_stats["pushed"] += 1
+    return True
+
 async def coordinate_agent_requests(ctx: Context, request: SupportRequest):
     """Coordinate requests to all specialized agents"""
 
-    # Send to Emotional Analyzer
-    await ctx.send("emotional_analyzer", request)
-
-    # Send to Room Matcher
-    room_match_request = {
-        "user_id": request.user_id,
-        "anonymous_id": request.anonymous_id,
-        "session_id": request.session_id,
-        "emotional_state": "analyzing",  # Will be updated by emotional analyzer
-        "crisis_level": "unknown",      # Will be updated by emotional analyzer
-        "cultural_context": "",         # Will be updated by emotional analyzer
-        "current_room": request.room_type,
-        "timestamp": request.timestamp
+    if PIPELINE_MODE == "staged":
+        # Stage one: room matching and resources wait for the real emotional analysis
+        # (see dispatch_dependent_requests); crisis monitoring starts immediately
+        delivered = await asyncio.gather(
+            dispatch_to_agent(ctx, "crisis_monitor", request),
+            dispatch_to_agent(ctx, "emotional_analyzer", request)
+        )
+    else:
+        # Crisis monitor is dispatched first so it is never queued behind slower lookups;
+        # the rest fan out concurrently, each with its own deadline and retries
+        session_data = orchestrator_state.sessions.get(request.request_id, {})
+        delivered = await asyncio.gather(
+            dispatch_to_agent(ctx, "crisis_monitor", request),
+            dispatch_to_agent(ctx, "emotional_analyzer", request),
+            dispatch_to_agent(ctx, "room_matcher", build_room_match_request(session_data)),
+            dispatch_to_agent(ctx, "knowledge_base", build_resource_request(session_data))
+        )
+
+    ctx.logger.info(f"📤 Requests sent to {sum(delivered)}/{len(delivered)} agents for user {request.anonymous_id}")
+
+async def dispatch_dependent_requests(ctx: Context, request_id: str, emotional_analysis: Dict):
+    """Stage two: ask room matcher and knowledge base in parallel using the real analysis"""
+
+    session_data = orchestrator_state.sessions.get(request_id)
+    if not session_data or session_data.get("dependents_dispatched"):
+        return
+    session_data["dependents_dispatched"] = True
+
+    await asyncio.gather(
+        dispatch_to_agent(ctx, "room_matcher", build_room_match_request(session_data, emotional_analysis)),
+        dispatch_to_agent(ctx, "knowledge_base", build_resource_request(session_data, emotional_analysis))
+    )
+
+    ctx.logger.info(f"📤 Room and resource requests sent for request {request_id}")
+
+def build_room_match_request(session_data: Dict, emotional_analysis: Dict = None) -> Dict:
+    """Room matcher request, with placeholders when the analysis isn't known yet"""
+
+    emotional_analysis = emotional_analysis or {}
+    return {
+        "user_id": session_data.get("user_id"),
+        "anonymous_id": session_data.get("anonymous_id"),
+        "session_id": session_data.get("session_id"),
+        "request_id": session_data.get("request_id"),
+        "emotional_state": emotional_analysis.get("primary_emotion", "analyzing"),
+        "crisis_level": emotional_analysis.get("crisis_level", "unknown"),
+        "cultural_context": emotional_analysis.get("cultural_context") or "",
+        "current_room": session_data.get("room_type"),
+        "timestamp": session_data.get("started_at")
     }
-    await ctx.send("room_matcher", room_match_request)
-
-    # Send to Crisis Monitor
-    await ctx.send("crisis_monitor", request)
-
-    # Send to Knowledge Base
-    resource_request = {
-        "user_id": request.user_id,
-        "anonymous_id": request.anonymous_id,
-        "session_id": request.session_id,
-        "emotional_state": "analyzing",
-        "crisis_level": "unknown",
-        "cultural_context": "",
-        "room_type": request.room_type,
-        "timestamp": request.timestamp
+
+def build_resource_request(session_data: Dict, emotional_analysis: Dict = None) -> Dict:
+    """Knowledge base request, with placeholders when the analysis isn't known yet"""
+
+    emotional_analysis = emotional_analysis or {}
+    return {
+        "user_id": session_data.get("user_id"),
+        "anonymous_id": session_data.get("anonymous_id"),
+        "session_id": session_data.get("session_id"),
+        "request_id": session_data.get("request_id"),
+        "emotional_state": emotional_analysis.get("primary_emotion", "analyzing"),
+        "crisis_level": emotional_analysis.get("crisis_level", "unknown"),
+        "cultural_context": emotional_analysis.get("cultural_context") or "",
+        "room_type": session_data.get("room_type"),
+        "timestamp": session_data.get("started_at")
     }
-    await ctx.send("knowledge_base", resource_request)
 
-    ctx.logger.info(f"📤 Requests sent to all agents for user {request.anonymous_id}")
+async def dispatch_to_agent(ctx: Context, destination: str, message) -> bool:
+    """Send to one agent with a per-agent deadline and jittered retries"""
+
+    policy = AGENT_DISPATCH_POLICY[destination]
+    histogram = dispatch_latency[destination]
+
+    for attempt in range(policy["retries"] + 1):
+        started = time.perf_counter()
+        try:
+            status = await asyncio.wait_for(ctx.send(destination, message), timeout=policy["timeout"])
+            histogram.observe(time.perf_counter() - started)
+
+            if not _delivery_failed(status):
+                return True
+            ctx.logger.warning(f"⚠️ Delivery to {destination} failed (attempt {attempt + 1})")
+
+        except asyncio.TimeoutError:
+            histogram.observe(time.perf_counter() - started)
+            ctx.logger.warning(f"⏱️ Send to {destination} timed out after {policy['timeout']}s (attempt {attempt + 1})")
+        except Exception as e:
+            ctx.logger.warning(f"⚠️ Send to {destination} raised {e} (attempt {attempt + 1})")
+
+        if attempt < policy["retries"]:
+            await asyncio.sleep(DISPATCH_RETRY_BACKOFF * (2 ** attempt) * random.uniform(0.5, 1.5))
+
+    dispatch_failures[destination] += 1
+    ctx.logger.error(f"❌ Giving up on {destination} after {policy['retries'] + 1} attempts")
+    return False
+
+def _delivery_failed(status) -> bool:
+    """True when ctx.send reports a failed delivery status"""
+    delivery_status = getattr(status, "status", None)
+    return getattr(delivery_status, "value", delivery_status) == "failed"
 
 # Handle responses from Emotional Analyzer
 @orchestrator.on_message(model=dict)
@@ -140,65 +392,55 @@ async def handle_emotional_analysis(ctx: Context, sender: str, msg: Dict):
     """Handle responses from Emotional Analyzer agent"""
 
     if msg.get("primary_emotion"):  # This is an emotional analysis response
-        system_stats = ctx.storage.get("system_stats")
-        system_stats["agent_responses"]["emotional_analyzer"] += 1
-        ctx.storage.set("system_stats", system_stats)
+        orchestrator_state.count_agent_response("emotional_analyzer")
 
         # Update active session with emotional analysis
-        active_sessions = system_stats["active_sessions"]
-        if msg.get("session_id") in active_sessions:
-            active_sessions[msg["session_id"]]["emotional_analysis"] = msg
-            active_sessions[msg["session_id"]]["last_activity"] = datetime.now().isoformat()
-            system_stats["active_sessions"] = active_sessions
-            ctx.storage.set("system_stats", system_stats)
-
-        # Check if crisis intervention is needed
+        orchestrator_state.record_reply(msg.get("request_id"), "emotional_analysis", msg)
+
+        # Crisis coordination starts first and runs alongside stage two, so it never
+        # waits behind the room matcher and knowledge base sends and their retries
+        follow_ups = []
         if msg.get("crisis_level") == "emergency" or msg.get("requires_human_intervention"):
-            await handle_crisis_coordination(ctx, msg)
+            follow_ups.append(handle_crisis_coordination(ctx, msg))
+
+        # Staged pipeline: the real analysis unblocks room matching and resource selection
+        if PIPELINE_MODE == "staged":
+            follow_ups.append(dispatch_dependent_requests(ctx, msg.get("request_id"), msg))
+
+        await asyncio.gather(*follow_ups)
 
         ctx.logger.info(f"🧠 Emotional analysis received for session {msg.get('session_id')}")
 
+        await try_complete_session(ctx, msg.get("request_id"))
+
 # Handle responses from Room Matcher
 @orchestrator.on_message(model=dict)
 async def handle_room_recommendation(ctx: Context, sender: str, msg: Dict):
     """Handle room recommendations from Room Matcher agent"""
 
     if msg.get("recommended_rooms"):  # This is a room recommendation response
-        system_stats = ctx.storage.get("system_stats")
-        system_stats["agent_responses"]["room_matcher"] += 1
-        ctx.storage.set("system_stats", system_stats)
+        orchestrator_state.count_agent_response("room_matcher")
 
         # Update active session with room recommendation
-        active_sessions = system_stats["active_sessions"]
-        if msg.get("session_id") in active_sessions:
-            active_sessions[msg["session_id"]]["room_recommendation"] = msg
-            active_sessions[msg["session_id"]]["last_activity"] = datetime.now().isoformat()
-            system_stats["active_sessions"] = active_sessions
-            ctx.storage.set("system_stats", system_stats)
+        orchestrator_state.record_reply(msg.get("request_id"), "room_recommendation", msg)
 
         ctx.logger.info(f"🏠 Room recommendation received for session {msg.get('session_id')}")
 
+        await try_complete_session(ctx, msg.get("request_id"))
+
 # Handle responses from Crisis Monitor
 @orchestrator.on_message(model=dict)
 async def handle_crisis_response(ctx: Context, sender: str, msg: Dict):
     """Handle crisis responses from Crisis Monitor agent"""
 
     if msg.get("type") in ["crisis_response_sent", "emergency_intervention", "high_priority_intervention"]:
-        system_stats = ctx.storage.get("system_stats")
-        system_stats["agent_responses"]["crisis_monitor"] += 1
+        orchestrator_state.count_agent_response("crisis_monitor")
 
         if "crisis" in msg.get("type", ""):
-            system_stats["crisis_interventions"] += 1
-
-        ctx.storage.set("system_stats", system_stats)
+            orchestrator_state.increment("crisis_interventions")
 
         # Update active session with crisis response
-        active_sessions = system_stats["active_sessions"]
-        if msg.get("session_id") in active_sessions:
-            active_sessions[msg["session_id"]]["crisis_response"] = msg
-            active_sessions[msg["session_id"]]["last_activity"] = datetime.now().isoformat()
-            system_stats["active_sessions"] = active_sessions
-            ctx.storage.set("system_stats", system_stats)
+        orchestrator_state.record_reply(msg.get("request_id"), "crisis_response", msg)
 
         # If this is an emergency, send immediate response to user
         if msg.get("type") == "emergency_intervention":
@@ -212,57 +454,68 @@ async def handle_resource_response(ctx: Context, sender: str, msg: Dict):
     """Handle resource responses from Knowledge Base agent"""
 
     if msg.get("resources") or msg.get("articles"):  # This is a resource response
-        system_stats = ctx.storage.get("system_stats")
-        system_stats["agent_responses"]["knowledge_base"] += 1
-        ctx.storage.set("system_stats", system_stats)
+        orchestrator_state.count_agent_response("knowledge_base")
 
         # Update active session with resources
-        active_sessions = system_stats["active_sessions"]
-        if msg.get("session_id") in active_sessions:
-            active_sessions[msg["session_id"]]["resources"] = msg
-            active_sessions[msg["session_id"]]["last_activity"] = datetime.now().isoformat()
-            system_stats["active_sessions"] = active_sessions
-            ctx.storage.set("system_stats", system_stats)
+        orchestrator_state.record_reply(msg.get("request_id"), "resources", msg)
 
         ctx.logger.info(f"📚 Resources received for session {msg.get('session_id')}")
 
-# Compile and send final response to user
-@orchestrator.on_interval(period=2.0)  # Check every 2 seconds for complete responses
-async def compile_responses(ctx: Context):
-    """Compile responses from all agents and send final response to user"""
-
-    system_stats = ctx.storage.get("system_stats")
-    active_sessions = system_stats.get("active_sessions", {})
-
-    for session_id, session_data in list(active_sessions.items()):
-        # Check if session has been active for more than 30 seconds (timeout)
-        last_activity = datetime.fromisoformat(session_data["last_activity"])
-        if (datetime.now() - last_activity).seconds > 30:
-            # Session timed out - send fallback response
-            await send_timeout_response(ctx, session_data)
-            continue
-
-        # Check if we have responses from all agents
-        required_responses = ["emotional_analysis", "room_recommendation", "resources"]
-        has_all_responses = all(
-            key in session_data for key in required_responses
-        )
+        await try_complete_session(ctx, msg.get("request_id"))
+
+def arm_session_deadline(ctx: Context, request_id: str):
+    """Start the response deadline timer for a request"""
+
+    existing = session_deadlines.pop(request_id, None)
+    if existing:
+        existing.cancel()
+
+    loop = asyncio.get_running_loop()
+    session_deadlines[request_id] = loop.call_later(
+        SESSION_RESPONSE_TIMEOUT,
+        lambda: asyncio.ensure_future(expire_session(ctx, request_id))
+    )
+
+async def try_complete_session(ctx: Context, request_id: str):
+    """Compile and send the final response as soon as the last required reply arrives"""
 
-        if has_all_responses and session_data.get("status") == "processing":
-            # Compile final response
-            final_response = await compile_final_response(ctx, session_data)
+    session_data = orchestrator_state.sessions.get(request_id)
 
-            # Mark session as completed
-            session_data["status"] = "completed"
-            session_data["completed_at"] = datetime.now().isoformat()
-            system_stats["successful_responses"] += 1
-            system_stats["active_sessions"] = active_sessions
-            ctx.storage.set("system_stats", system_stats)
+    if not session_data or session_data.get("status") != "processing":
+        return
 
-            # Send final response (in real implementation, this would go to WebSocket)
-            await send_final_response_to_user(ctx, final_response)
+    if not all(key in session_data for key in REQUIRED_RESPONSES):
+        return
 
-            ctx.logger.info(f"✅ Final response compiled for session {session_id}")
+    deadline = session_deadlines.pop(request_id, None)
+    if deadline:
+        deadline.cancel()
+
+    # Compile final response
+    final_response = await compile_final_response(ctx, session_data)
+
+    # Session is finished - drop it from the active set
+    orchestrator_state.finish_session(request_id)
+    orchestrator_state.increment("successful_responses")
+
+    # Send final response (in real implementation, this would go to WebSocket)
+    await send_final_response_to_user(ctx, final_response)
+
+    ctx.logger.info(f"✅ Final response compiled for request {request_id}")
+
+async def expire_session(ctx: Context, request_id: str):
+    """Send a fallback response when a request's deadline passes without all replies"""
+
+    session_deadlines.pop(request_id, None)
+
+    session_data = orchestrator_state.finish_session(request_id)
+
+    if not session_data or session_data.get("status") != "processing":
+        return
+
+    await send_timeout_response(ctx, session_data)
+
+    ctx.logger.warning(f"⏱️ Request {request_id} timed out waiting for agent responses")
 
 async def compile_final_response(ctx: Context, session_data: Dict) -> Dict:
     """Compile final response from all agent responses"""
@@ -275,6 +528,7 @@ async def compile_final_response(ctx: Context, session_data: Dict) -> Dict:
     final_response = {
         "user_id": session_data["user_id"],
         "session_id": session_data["session_id"],
+        "request_id": session_data["request_id"],
         "response": emotional_analysis.get("response", "I'm here to support you through this difficult time."),
         "room_suggestions": room_recommendation.get("recommended_rooms", ["general-support"]),
         "resources": resources.get("resources", []),
@@ -304,6 +558,7 @@ async def handle_crisis_coordination(ctx: Context, emotional_analysis: Dict):
     crisis_coordination = {
         "type": "crisis_coordination",
         "session_id": emotional_analysis["session_id"],
+        "request_id": emotional_analysis.get("request_id"),
         "crisis_level": emotional_analysis["crisis_level"],
         "requires_human_intervention": emotional_analysis["requires_human_intervention"],
         "immediate_response": emotional_analysis["response"],
@@ -321,6 +576,7 @@ async def send_emergency_response_to_user(ctx: Context, crisis_response: Dict):
         "type": "emergency_response",
         "user_id": crisis_response["user_id"],
         "session_id": crisis_response["session_id"],
+        "request_id": crisis_response.get("request_id"),
         "crisis_alert": True,
         "immediate_response": crisis_response.get("immediate_actions", ["Contact emergency services immediately"]),
         "emergency_contacts": crisis_response.get("emergency_contacts", []),
@@ -328,7 +584,7 @@ async def send_emergency_response_to_user(ctx: Context, crisis_response: Dict):
         "timestamp": datetime.now().isoformat()
     }
 
-    # In real implementation, this would be sent via WebSocket to the user
+    await push_to_bridge(ctx, crisis_response.get("request_id"), emergency_message)
     ctx.logger.critical(f"🚨 Emergency response sent to user in session {crisis_response.get('session_id')}")
 
 async def send_timeout_response(ctx: Context, session_data: Dict):
@@ -337,6 +593,7 @@ async def send_timeout_response(ctx: Context, session_data: Dict):
     timeout_response = {
         "user_id": session_data["user_id"],
         "session_id": session_data["session_id"],
+        "request_id": session_data["request_id"],
         "response": "I'm here to support you, though I'm experiencing some technical difficulties. Please try again in a moment, or contact emergency services if this is urgent.",
         "room_suggestions": ["general-support"],
         "crisis_alert": False,
@@ -352,16 +609,22 @@ async def send_timeout_response(ctx: Context, session_data: Dict):
     session_data["timed_out_at"] = datetime.now().isoformat()
 
 async def send_final_response_to_user(ctx: Context, response: Dict):
-    """Send final compiled response to user (placeholder for WebSocket integration)"""
+    """Push the final compiled response to the WebSocket server waiting on it"""
 
-    # In real implementation, this would send via WebSocket to the frontend
-    ctx.logger.info(f"📤 Final response ready for user {response['user_id']}")
-    ctx.logger.info(f"   Response preview: {response['response'][:100]}...")
+    delivered = await push_to_bridge(ctx, response["request_id"], {"type": "final_response", "response": response}, final=True)
 
-    # Store in response cache for WebSocket server to pick up
-    response_cache = ctx.storage.get("response_cache", {})
-    response_cache[response["session_id"]] = response
-    ctx.storage.set("response_cache", response_cache)
+    if delivered:
+        ctx.logger.info(f"📤 Final response pushed for user {response['user_id']}")
+    else:
+        ctx.logger.info(f"📤 Final response ready for user {response['user_id']} (no bridge connection)")
+
+@orchestrator.on_interval(period=STATS_SNAPSHOT_INTERVAL)
+async def snapshot_system_stats(ctx: Context):
+    """Write-behind snapshot of the counters; skipped when nothing changed"""
+
+    if orchestrator_state.dirty:
+        orchestrator_state.dirty = False
+        ctx.storage.set("system_stats", orchestrator_state.snapshot())
 
 # Protocol for orchestrator communication
 orchestrator_protocol = Protocol("Divorce Support Orchestrator Protocol")
@@ -373,32 +636,36 @@ orchestrator.include(orchestrator_protocol)
 @orchestrator.on_rest_get("/health")
 async def health_check(ctx: Context):
     """Health check endpoint"""
-    system_stats = ctx.storage.get("system_stats", {})
+    system_stats = orchestrator_state.snapshot()
 
     return {
         "status": "healthy",
         "agent": "orchestrator",
-        "total_requests": system_stats.get("total_requests", 0),
-        "successful_responses": system_stats.get("successful_responses", 0),
-        "crisis_interventions": system_stats.get("crisis_interventions", 0),
-        "active_sessions": len(system_stats.get("active_sessions", {})),
-        "agent_responses": system_stats.get("agent_responses", {})
+        "total_requests": system_stats["total_requests"],
+        "successful_responses": system_stats["successful_responses"],
+        "crisis_interventions": system_stats["crisis_interventions"],
+        "active_sessions": system_stats["active_sessions"],
+        "agent_responses": system_stats["agent_responses"]
     }
 
 # System status endpoint
 @orchestrator.on_rest_get("/status")
 async def system_status(ctx: Context):
     """System status endpoint"""
-    system_stats = ctx.storage.get("system_stats", {})
-    active_sessions = system_stats.get("active_sessions", {})
+    system_stats = orchestrator_state.snapshot()
 
     return {
         "system_status": "operational",
         "uptime": "since_startup",
-        "total_requests_processed": system_stats.get("total_requests", 0),
-        "active_sessions_count": len(active_sessions),
-        "crisis_interventions_today": system_stats.get("crisis_interventions", 0),
-        "agent_response_counts": system_stats.get("agent_responses", {}),
+        "total_requests_processed": system_stats["total_requests"],
+        "active_sessions_count": system_stats["active_sessions"],
+        "crisis_interventions_today": system_stats["crisis_interventions"],
+        "agent_response_counts": system_stats["agent_responses"],
+        "agent_dispatch": {
+            destination: dict(histogram.to_dict(), failures=dispatch_failures[destination])
+            for destination, histogram in dispatch_latency.items()
+        },
+        "bridge": dict(bridge_stats, routed_sessions=len(bridge_routes), in_flight=len(bridge_tasks)),
         "last_updated": datetime.now().isoformat()
     }
 
@@ -16,6 +16,9 @@ import pathlib
 # Add parent directory to path for imports
 sys.path.append(str(pathlib.Path(__file__).parent.parent))
 
+from room_catalog import room_catalog
+from room_occupancy import OccupancyIndex
+
 @dataclass
 class RoomMatchRequest:
     user_id: str
@@ -26,6 +29,7 @@ class RoomMatchRequest:
     cultural_context: str
     current_room: str
     timestamp: str
+    request_id: str = ""
 
 @dataclass
 class RoomRecommendation:
@@ -35,6 +39,27 @@ class RoomRecommendation:
     reasoning: str
     alternative_rooms: List[str]
     room_requirements: Dict
+    # Echoed from the request so the orchestrator matches this reply to it
+    request_id: str = ""
+
+# Live members and matched-but-not-joined reservations, fed by WebSocket room events
+occupancy = OccupancyIndex()
+
+def room_capacity(room_id: str):
+    """Capacity of a catalog room, None for rooms that don't exist"""
+    spec = room_catalog.get(room_id)
+    return spec.max_users if spec else None
+
+# Candidate rooms per emotional state, best first
+EMOTION_ROOM_MAPPING = {
+    "anger": ["anger-management", "legal-consultation", "general-support"],
+    "sadness": ["post-divorce-recovery", "emotional-support", "grief-support"],
+    "anxiety": ["co-parenting-support", "financial-recovery", "legal-advice", "general-support"],
+    "guilt": ["emotional-support", "self-care-sanctuary", "professional-counseling"],
+    "hopeless": ["crisis-intervention", "professional-counseling", "emotional-support"],
+    "hope": ["new-beginnings", "post-divorce-recovery", "success-stories"],
+    "neutral": ["general-support", "emotional-support"]
+}
 
 # Room Matcher Agent
 room_matcher = Agent(
@@ -49,153 +74,10 @@ async def setup_room_matcher(ctx: Context):
     """Initialize the room matcher agent with room configurations"""
     ctx.logger.info("🏠 Room Matcher Agent starting up...")
 
-    # Define room configurations with capacity and requirements
-    room_configurations = {
-        # Crisis & Emergency Support
-        "crisis-intervention": {
-            "max_users": 10,
-            "requires_verification": False,
-            "category": "crisis",
-            "ai_moderated": True,
-            "human_moderated": True,
-            "description": "24/7 emergency emotional support with human counselors",
-            "priority": "emergency"
-        },
-
-        # General Support Rooms
-        "general-support": {
-            "max_users": 50,
-            "requires_verification": False,
-            "category": "general",
-            "ai_moderated": True,
-            "human_moderated": False,
-            "description": "Open space for relationship discussions and general support",
-            "priority": "low"
-        },
-
-        "post-divorce-recovery": {
-            "max_users": 30,
-            "requires_verification": True,
-            "category": "recovery",
-            "ai_moderated": True,
-            "human_moderated": False,
-            "description": "Support for life after divorce and rebuilding",
-            "priority": "medium"
-        },
-
-        "co-parenting-support": {
-            "max_users": 25,
-            "requires_verification": True,
-            "category": "parenting",
-            "ai_moderated": True,
-            "human_moderated": False,
-            "description": "Managing relationships and co-parenting after divorce",
-            "priority": "medium"
-        },
-
-        # Professional & Specialized Rooms
-        "legal-consultation": {
-            "max_users": 20,
-            "requires_verification": True,
-            "category": "professional",
-            "ai_moderated": True,
-            "human_moderated": True,
-            "description": "Anonymous legal advice and consultation",
-            "priority": "high"
-        },
-
-        "financial-recovery": {
-            "max_users": 35,
-            "requires_verification": False,
-            "category": "professional",
-            "ai_moderated": True,
-            "human_moderated": False,
-            "description": "Post-divorce financial planning and recovery",
-            "priority": "medium"
-        },
-
-        # Demographic-Specific Rooms
-        "womens-support": {
-            "max_users": 35,
-            "requires_verification": True,
-            "category": "demographic",
-            "ai_moderated": True,
-            "human_moderated": False,
-            "description": "Female-focused emotional support and empowerment",
-            "priority": "medium"
-        },
-
-        "mens-support": {
-            "max_users": 35,
-            "requires_verification": True,
-            "category": "demographic",
-            "ai_moderated": True,
-            "human_moderated": False,
-            "description": "Male-focused mental health and relationship support",
-            "priority": "medium"
-        },
-
-        # Cultural & Specialized Rooms
-        "cultural-support": {
-            "max_users": 30,
-            "requires_verification": False,
-            "category": "cultural",
-            "ai_moderated": True,
-            "human_moderated": False,
-            "description": "Culturally sensitive support for diverse backgrounds",
-            "priority": "medium"
-        },
-
-        "family-mediation": {
-            "max_users": 20,
-            "requires_verification": True,
-            "category": "cultural",
-            "ai_moderated": True,
-            "human_moderated": True,
-            "description": "Family conflict resolution and mediation support",
-            "priority": "high"
-        },
-
-        # Recovery & Growth Rooms
-        "anger-management": {
-            "max_users": 20,
-            "requires_verification": False,
-            "category": "recovery",
-            "ai_moderated": True,
-            "human_moderated": False,
-            "description": "Coping strategies and anger management techniques",
-            "priority": "medium"
-        },
-
-        "emotional-support": {
-            "max_users": 40,
-            "requires_verification": False,
-            "category": "recovery",
-            "ai_moderated": True,
-            "human_moderated": False,
-            "description": "General emotional support and coping strategies",
-            "priority": "low"
-        },
-
-        "new-beginnings": {
-            "max_users": 25,
-            "requires_verification": False,
-            "category": "recovery",
-            "ai_moderated": True,
-            "human_moderated": False,
-            "description": "Planning for life after divorce and new beginnings",
-            "priority": "low"
-        }
-    }
-
-    # Initialize active rooms tracking
-    active_rooms = {room_id: 0 for room_id in room_configurations.keys()}
-
-    ctx.storage.set("room_configurations", room_configurations)
-    ctx.storage.set("active_rooms", active_rooms)
+    # Room definitions come from the shared catalog; occupancy is tracked in memory
     ctx.storage.set("matched_users", 0)
 
-    ctx.logger.info(f"✅ Room configurations loaded for {len(room_configurations)} rooms")
+    ctx.logger.info(f"✅ Room catalog loaded for {len(room_catalog.specs)} rooms")
 
 @room_matcher.on_message(model=RoomMatchRequest)
 async def match_user_to_room(ctx: Context, sender: str, msg: RoomMatchRequest):
@@ -203,27 +85,11 @@ async def match_user_to_room(ctx: Context, sender: str, msg: RoomMatchRequest):
 
     ctx.logger.info(f"🏠 Finding best room match for user: {msg.anonymous_id}")
 
-    room_configurations = ctx.storage.get("room_configurations")
-    active_rooms = ctx.storage.get("active_rooms", {})
-
     # Determine room matching strategy based on emotional state and crisis level
-    recommended_rooms, reasoning = await determine_room_strategy(
-        ctx, msg, room_configurations, active_rooms
-    )
-
-    # Check room availability and capacity
-    available_rooms = []
-    alternative_rooms = []
+    recommended_rooms, reasoning = await determine_room_strategy(ctx, msg)
 
-    for room_id in recommended_rooms:
-        if room_id in room_configurations:
-            current_users = active_rooms.get(room_id, 0)
-            max_users = room_configurations[room_id]["max_users"]
-
-            if current_users < max_users:
-                available_rooms.append(room_id)
-            else:
-                alternative_rooms.append(room_id)
+    # One capacity pass over the candidates: O(1) per room, independent of room count
+    available_rooms, alternative_rooms = occupancy.partition(recommended_rooms, room_capacity)
 
     # If no rooms available, suggest waiting or alternatives
     if not available_rooms:
@@ -234,16 +100,15 @@ async def match_user_to_room(ctx: Context, sender: str, msg: RoomMatchRequest):
     # Select the best available room
     selected_room = available_rooms[0]
 
-    # Update active room count
-    active_rooms[selected_room] = active_rooms.get(selected_room, 0) + 1
-    ctx.storage.set("active_rooms", active_rooms)
+    # Hold a seat until the user joins or the reservation lapses
+    occupancy.reserve(msg.session_id, selected_room)
 
     # Update matched users count
     matched_users = ctx.storage.get("matched_users", 0)
     ctx.storage.set("matched_users", matched_users + 1)
 
     # Get room requirements for the selected room
-    room_requirements = room_configurations.get(selected_room, {})
+    room_requirements = dict(room_catalog.requirements(selected_room))
 
     # Create room recommendation
     room_recommendation = RoomRecommendation(
@@ -252,7 +117,8 @@ async def match_user_to_room(ctx: Context, sender: str, msg: RoomMatchRequest):
         recommended_rooms=[selected_room] + available_rooms[1:],
         reasoning=reasoning,
         alternative_rooms=alternative_rooms,
-        room_requirements=room_requirements
+        room_requirements=room_requirements,
+        request_id=msg.request_id
     )
 
     # Send recommendation to orchestrator
@@ -262,8 +128,8 @@ async def match_user_to_room(ctx: Context, sender: str, msg: RoomMatchRequest):
     ctx.logger.info(f"   Selected room: {selected_room}")
     ctx.logger.info(f"   Reasoning: {reasoning}")
 
-async def determine_room_strategy(ctx: Context, msg: RoomMatchRequest, room_configs: Dict, active_rooms: Dict) -> tuple[List[str], str]:
-    """Determine the best room matching strategy based on user's emotional state"""
+async def determine_room_strategy(ctx: Context, msg: RoomMatchRequest) -> tuple[List[str], str]:
+    """Determine candidate rooms, best first, from the user's emotional state; capacity is checked by the caller"""
 
     emotional_state = msg.emotional_state.lower()
     crisis_level = msg.crisis_level.lower()
@@ -277,17 +143,7 @@ async def determine_room_strategy(ctx: Context, msg: RoomMatchRequest, room_conf
         return (["crisis-intervention", "professional-counseling"], "High crisis level - professional intervention recommended")
 
     # Emotional state-based matching
-    emotion_room_mapping = {
-        "anger": ["anger-management", "legal-consultation", "general-support"],
-        "sadness": ["post-divorce-recovery", "emotional-support", "grief-support"],
-        "anxiety": ["co-parenting-support", "financial-recovery", "legal-advice", "general-support"],
-        "guilt": ["emotional-support", "self-care-sanctuary", "professional-counseling"],
-        "hopeless": ["crisis-intervention", "professional-counseling", "emotional-support"],
-        "hope": ["new-beginnings", "post-divorce-recovery", "success-stories"],
-        "neutral": ["general-support", "emotional-support"]
-    }
-
-    base_rooms = emotion_room_mapping.get(emotional_state, ["general-support"])
+    base_rooms = EMOTION_ROOM_MAPPING.get(emotional_state, ["general-support"])
 
     # Cultural context adjustments
     if cultural_context == "indian":
@@ -297,22 +153,22 @@ async def determine_room_strategy(ctx: Context, msg: RoomMatchRequest, room_conf
         elif emotional_state == "sadness":
             base_rooms = ["post-divorce-recovery", "cultural-support"] + base_rooms
 
-    # Filter out unavailable rooms and prioritize by capacity
-    available_rooms = []
-    for room_id in base_rooms:
-        if room_id in room_configs:
-            current_users = active_rooms.get(room_id, 0)
-            max_users = room_configs[room_id]["max_users"]
-            if current_users < max_users:
-                available_rooms.append(room_id)
+    reasoning = f"Emotional state: {emotional_state}, Crisis level: {crisis_level}, Cultural context: {cultural_context}"
 
-    # If no rooms from primary matching available, add general support
-    if not available_rooms:
-        available_rooms = ["general-support"]
+    return base_rooms, reasoning
 
-    reasoning = f"Emotional state: {emotional_state}, Crisis level: {crisis_level}, Cultural context: {cultural_context}"
+@room_matcher.on_message(model=dict)
+async def handle_room_event(ctx: Context, sender: str, msg: Dict):
+    """Apply join/leave/disconnect events and snapshots relayed from the WebSocket server"""
 
-    return available_rooms, reasoning
+    if msg.get("type") == "room_event":
+        if msg.get("event") == "join":
+            occupancy.join(msg["session_id"], msg["room_id"], msg.get("worker_id"))
+        else:
+            occupancy.leave(msg["session_id"])
+    elif msg.get("type") == "room_snapshot":
+        occupancy.sync(msg["worker_id"], msg.get("members", {}))
+        ctx.logger.info(f"🏠 Occupancy synced from worker {msg['worker_id']} ({len(msg.get('members', {}))} members)")
 
 # Protocol for agent communication
 room_matching_protocol = Protocol("Room Matching Protocol")
@@ -330,15 +186,15 @@ room_matcher.include(room_matching_protocol)
 async def health_check(ctx: Context):
     """Health check endpoint"""
     matched_users = ctx.storage.get("matched_users", 0)
-    active_rooms = ctx.storage.get("active_rooms", {})
-    total_users = sum(active_rooms.values())
+    room_occupancy = occupancy.snapshot()
 
     return {
         "status": "healthy",
         "agent": "room_matcher",
         "matched_users": matched_users,
-        "active_rooms": active_rooms,
-        "total_active_users": total_users
+        "active_rooms": room_occupancy["rooms"],
+        "total_active_users": room_occupancy["total_members"],
+        "occupancy": room_occupancy
     }
 
 if __name__ == "__main__":
@@ -4,15 +4,29 @@ Standalone MeTTa Chat API
 Provides MeTTa-powered emotional analysis directly to frontend
 """
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from typing import Dict, List, Optional
+from typing import AsyncIterator, Dict, List, Optional
 import asyncio
+import httpx
 import json
+import os
+import time
 import uvicorn
-import re
 import logging
+import sys
+import pathlib
+
+# Add backend directory to path for imports
+sys.path.append(str(pathlib.Path(__file__).parent))
+
+from metta.metta_engine import get_metta_engine
+from metta.analysis_executor import AnalysisOverloaded, get_analysis_executor
+from metta.resource_catalog import get_resource_catalog
+from room_catalog import room_catalog
+from utils import LLMIntegration, llm_context
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -33,6 +47,8 @@ class ChatMessage(BaseModel):
     message: str
     user_context: Optional[Dict] = None
     session_id: Optional[str] = None
+    # Return resource ids from /api/chat/resources instead of full resource objects
+    resource_refs: bool = False
 
 class ChatResponse(BaseModel):
     response: str
@@ -42,199 +58,120 @@ class ChatResponse(BaseModel):
     crisis_alert: bool
     human_intervention: bool
     follow_up_questions: List[str]
+    resource_ids: Optional[List[str]] = None
+    catalog_version: Optional[str] = None
 
-# Simplified MeTTa-style analysis functions
-def analyze_emotions(message: str) -> Dict:
-    """Analyze emotional content using keyword matching"""
-    message_lower = message.lower()
-
-    emotion_keywords = {
-        'anger': ["angry", "furious", "rage", "hate", "unfair", "betrayed", "infuriated", "mad", "outraged"],
-        'sadness': ["sad", "depressed", "lonely", "empty", "heartbroken", "lost", "grieving", "miserable", "hopeless"],
-        'anxiety': ["worried", "scared", "anxious", "nervous", "panic", "afraid", "stressed", "overwhelmed"],
-        'guilt': ["guilty", "shame", "my fault", "should have", "regret", "responsible", "blame myself"],
-        'hope': ["better", "future", "healing", "moving on", "strength", "optimistic", "positive", "confident"]
-    }
-
-    crisis_keywords = {
-        'suicidal': ["kill myself", "end it all", "better off dead", "no point living", "suicide", "not worth living", "end my life"],
-        'self-harm': ["hurt myself", "cutting", "pills", "bridge", "overdose", "harm myself"],
-        'severe-depression': ["can't go on", "worthless", "no hope", "everyone hates me", "failed at everything", "burden to everyone"]
-    }
-
-    cultural_indicators = {
-        'indian': ["joint family", "arranged marriage", "dowry", "family honor", "social stigma", "community pressure", "parents", "elders"],
-        'western': ["individual", "personal choice", "dating", "career", "independence", "freedom", "privacy"]
-    }
-
-    # Crisis Detection (highest priority)
-    for crisis_type, keywords in crisis_keywords.items():
-        for keyword in keywords:
-            if keyword in message_lower:
-                return {
-                    'crisis_detected': True,
-                    'crisis_type': crisis_type,
-                    'crisis_level': 'emergency' if crisis_type == 'suicidal' else 'high',
-                    'response': "I'm very concerned about you. Please reach out to emergency services or a crisis helpline immediately. You are not alone, and there are people who care deeply about you.",
-                    'resources': [
-                        {"type": "emergency", "title": "National Suicide Prevention Lifeline", "contact": "988", "available": "24/7"},
-                        {"type": "emergency", "title": "Crisis Text Line", "contact": "Text HOME to 741741", "available": "24/7"},
-                        {"type": "emergency", "title": "Emergency Services", "contact": "911", "available": "24/7"}
-                    ]
-                }
-
-    # Emotional Analysis
-    detected_emotions = {}
-    intensity_scores = {'low': 0, 'medium': 0, 'high': 0}
-
-    for emotion, keywords in emotion_keywords.items():
-        matches = sum(1 for keyword in keywords if keyword in message_lower)
-        if matches > 0:
-            detected_emotions[emotion] = matches
-            if matches >= 3:
-                intensity_scores['high'] += 1
-            elif matches >= 2:
-                intensity_scores['medium'] += 1
-            else:
-                intensity_scores['low'] += 1
-
-    if not detected_emotions:
-        primary_emotion = 'neutral'
-        intensity = 'low'
-        crisis_level = 'low'
-    else:
-        primary_emotion = max(detected_emotions.items(), key=lambda x: x[1])[0]
-        intensity = max(intensity_scores.items(), key=lambda x: x[1])[0]
-        crisis_level = 'high' if intensity == 'high' and primary_emotion in ['sadness', 'hopeless'] else 'low'
-
-    # Cultural Context Detection
-    cultural_context = None
-    for culture, indicators in cultural_indicators.items():
-        for indicator in indicators:
-            if indicator in message_lower:
-                cultural_context = culture
-                break
-        if cultural_context:
-            break
+class BatchChatMessage(BaseModel):
+    messages: List[str]
+    user_context: Optional[Dict] = None
+    resource_refs: bool = False
 
-    return {
-        'crisis_detected': False,
-        'primary_emotion': primary_emotion,
-        'intensity': intensity,
-        'crisis_level': crisis_level,
-        'cultural_context': cultural_context,
-        'response': generate_response(primary_emotion, intensity, cultural_context),
-        'room_suggestions': generate_room_suggestions(primary_emotion, cultural_context),
-        'resources': generate_resources(primary_emotion, intensity),
-        'follow_up_questions': generate_follow_up_questions(primary_emotion),
-        'requires_human_intervention': crisis_level == 'high' or primary_emotion == 'hopeless' or intensity == 'high'
-    }
+class BatchChatResponse(BaseModel):
+    results: List[ChatResponse]
 
-def generate_response(emotion: str, intensity: str, cultural_context: str = None) -> str:
-    """Generate contextual response"""
-    responses = {
-        'anger': [
-            "I can hear the anger in your words. Anger during divorce is completely normal - it shows you cared deeply about your relationship.",
-            "It sounds like you're feeling really angry right now. That's a valid emotion. What's making you feel most angry about this situation?"
-        ],
-        'sadness': [
-            "I sense deep sadness in what you're sharing. Divorce grief is real grief - you're mourning the loss of dreams and plans you had together.",
-            "Your sadness shows how much this relationship meant to you. It's okay to feel this way. Healing takes time."
-        ],
-        'anxiety': [
-            "I can feel the anxiety in your message. Uncertainty about the future during divorce is one of the hardest parts. You're not alone in feeling this way.",
-            "Divorce anxiety is incredibly common. The unknown can feel overwhelming, but we can work through this one step at a time."
-        ],
-        'guilt': [
-            "I hear self-blame in your words. Remember that relationships involve two people, and it's rarely entirely one person's fault.",
-            "Guilt is common during divorce, but please be gentle with yourself. You're human, and you did the best you could with what you knew then."
-        ],
-        'hope': [
-            "I'm glad to hear some hope in your message. That takes real strength, especially during such a difficult time.",
-            "Your hope is inspiring. Many people have walked this path and found happiness again. You can too."
-        ]
-    }
+# Largest batch accepted by /api/chat/analyze/batch
+MAX_BATCH_SIZE = 1000
 
-    response_options = responses.get(emotion, [
-        "I'm here to listen and support you through this difficult time.",
-        "Thank you for sharing with me. How are you feeling about what you're going through?"
-    ])
-
-    return response_options[0]
-
-def generate_room_suggestions(emotion: str, cultural_context: str = None) -> List[str]:
-    """Generate room suggestions based on emotion and context"""
-    room_mapping = {
-        'anger': ['anger-management', 'general-support', 'legal-consultation'],
-        'sadness': ['post-divorce-recovery', 'emotional-support', 'success-stories'],
-        'anxiety': ['pre-divorce-counseling', 'financial-planning', 'co-parenting-support'],
-        'guilt': ['therapy-sessions', 'self-care-sanctuary', 'personal-transformation'],
-        'hope': ['new-beginnings', 'dating-after-divorce', 'success-stories']
-    }
+# Shared MeTTa engine - rule tables are compiled once per process
+metta_engine = get_metta_engine()
 
-    base_rooms = room_mapping.get(emotion, ['general-support'])
+# CPU-bound analysis runs in a worker pool so it never stalls the event loop
+analysis_executor = get_analysis_executor()
 
-    if cultural_context == 'indian':
-        if emotion in ['anger', 'guilt']:
-            base_rooms.extend(['cultural-support', 'family-mediation'])
-        elif emotion == 'sadness':
-            base_rooms.extend(['community-support', 'spiritual-counseling'])
+# Interned resources that responses can reference by id
+resource_catalog = get_resource_catalog()
 
-    return base_rooms
+# Streamed replies are written by the LLM from the engine's emotional context
+llm = LLMIntegration()
 
-def generate_resources(emotion: str, intensity: str) -> List[Dict]:
-    """Generate resources based on emotional state"""
-    resources = {
-        'anger': [
-            {"type": "article", "title": "Managing Anger During Divorce", "category": "coping-strategies", "url": "https://www.helpguide.org/articles/relationships-communication/anger-management.htm"},
-            {"type": "audio", "title": "Anger Management Meditation", "category": "self-care", "url": "https://www.mindful.org/mindfulness-meditation-anger/"}
-        ],
-        'sadness': [
-            {"type": "article", "title": "Grieving Your Marriage", "category": "healing", "url": "https://www.divorcemag.com/articles/grieving-your-marriage"},
-            {"type": "support-group", "title": "DivorceCare Support Groups", "category": "community", "url": "https://www.divorcecare.org/"}
-        ],
-        'anxiety': [
-            {"type": "guide", "title": "Divorce Planning Checklist", "category": "practical", "url": "https://www.womansdivorce.com/divorce-planning.html"},
-            {"type": "audio", "title": "Anxiety Relief Techniques", "category": "self-care", "url": "https://www.calm.com/blog/anxiety-relief"}
-        ]
-    }
+# Clients revalidate the catalog with If-None-Match after this many seconds
+RESOURCE_CATALOG_MAX_AGE = 300
 
-    base_resources = resources.get(emotion, [])
+# Live room membership comes from the WebSocket server; counts are reused briefly
+ROOM_OCCUPANCY_URL = os.getenv("WS_OCCUPANCY_URL", "http://localhost:3001/occupancy")
+ROOM_OCCUPANCY_TTL = 2.0
+ROOM_OCCUPANCY_TIMEOUT = 0.5
+_room_occupancy = {"rooms": {}, "fetched_at": float("-inf")}
 
-    if intensity == 'high':
-        base_resources.extend([
-            {"type": "hotline", "title": "National Suicide Prevention Lifeline", "contact": "988", "available": "24/7"},
-            {"type": "hotline", "title": "Crisis Text Line", "contact": "Text HOME to 741741", "available": "24/7"}
-        ])
+# One pooled client so occupancy refreshes reuse the keep-alive connection
+occupancy_client = httpx.AsyncClient(timeout=ROOM_OCCUPANCY_TIMEOUT)
 
-    return base_resources
+async def get_room_occupancy() -> Dict[str, int]:
+    """Current members per room, or the last known counts if the WebSocket server is unreachable"""
 
-def generate_follow_up_questions(emotion: str) -> List[str]:
-    """Generate follow-up questions"""
-    follow_ups = {
-        'anger': [
-            "What aspect of the divorce process is making you feel most angry?",
-            "Have you been able to talk to anyone about these feelings?",
-            "What would help you feel more in control right now?"
-        ],
-        'sadness': [
-            "What do you miss most about your relationship?",
-            "What would help you feel supported right now?",
-            "What small step could you take toward healing?"
-        ],
-        'anxiety': [
-            "What specific aspects of the future worry you most?",
-            "What would make you feel more secure during this transition?",
-            "Who in your support network can you reach out to?"
-        ],
-        'guilt': [
-            "What specifically do you feel guilty about?",
-            "Have you considered that both people contribute to relationship challenges?",
-            "What would self-compassion look like for you right now?"
-        ]
-    }
+    now = time.monotonic()
+    if now - _room_occupancy["fetched_at"] < ROOM_OCCUPANCY_TTL:
+        return _room_occupancy["rooms"]
 
-    return follow_ups.get(emotion, ["How are you taking care of yourself during this time?"])
+    _room_occupancy["fetched_at"] = now
+    try:
+        response = await occupancy_client.get(ROOM_OCCUPANCY_URL)
+        response.raise_for_status()
+        _room_occupancy["rooms"] = response.json()["rooms"]
+    except (httpx.HTTPError, ValueError, KeyError) as e:
+        logger.warning(f"Room occupancy unavailable: {e}")
+
+    return _room_occupancy["rooms"]
+
+async def analyze_emotions(message: str) -> Dict:
+    """Analyze emotional content using the shared MeTTa engine"""
+    analysis_result = await analysis_executor.analyze(message)
+    analysis_result.setdefault('crisis_detected', False)
+    return analysis_result
+
+async def analyze_emotions_batch(messages: List[str], user_context: Dict = None) -> List[Dict]:
+    """Analyze a batch of messages in one engine pass, preserving order"""
+    analysis_results = await analysis_executor.analyze_many(messages, user_context)
+    for analysis_result in analysis_results:
+        analysis_result.setdefault('crisis_detected', False)
+    return analysis_results
+
+def resource_fields(analysis_result: Dict, resource_refs: bool) -> Dict:
+    """Resources inline, or as catalog ids for clients that cache the catalog"""
+
+    if not resource_refs:
+        return {"resources": analysis_result['resources']}
+
+    resource_ids = analysis_result.get('resource_ids')
+    if resource_ids is None:
+        resource_ids = resource_catalog.ids_for(analysis_result['resources'])
+    return {"resources": [], "resource_ids": resource_ids, "catalog_version": resource_catalog.version}
+
+def build_chat_response(analysis_result: Dict, resource_refs: bool = False) -> ChatResponse:
+    """Convert an engine analysis result into the API response model"""
+
+    if analysis_result['crisis_detected']:
+        # Crisis response
+        return ChatResponse(
+            response=analysis_result['response'],
+            emotional_state={
+                "primary_emotion": "crisis",
+                "intensity": "emergency",
+                "crisis_level": analysis_result['crisis_level'],
+                "cultural_context": analysis_result.get('cultural_context', "")
+            },
+            room_suggestions=["crisis-intervention"],
+            crisis_alert=True,
+            human_intervention=True,
+            follow_up_questions=["Please contact emergency services immediately"],
+            **resource_fields(analysis_result, resource_refs)
+        )
+
+    # Normal response
+    return ChatResponse(
+        response=analysis_result['response'],
+        emotional_state={
+            "primary_emotion": analysis_result['primary_emotion'],
+            "intensity": analysis_result['intensity'],
+            "crisis_level": analysis_result['crisis_level'],
+            "cultural_context": analysis_result.get('cultural_context', "")
+        },
+        room_suggestions=analysis_result['room_suggestions'],
+        crisis_alert=False,
+        human_intervention=analysis_result['requires_human_intervention'],
+        follow_up_questions=analysis_result['follow_up_questions'],
+        **resource_fields(analysis_result, resource_refs)
+    )
 
 @app.post("/api/chat/analyze", response_model=ChatResponse)
 async def analyze_message(request: ChatMessage):
@@ -242,89 +179,100 @@ async def analyze_message(request: ChatMessage):
 
     try:
         # Analyze the message using simplified MeTTa logic
-        analysis_result = analyze_emotions(request.message)
-
-        if analysis_result['crisis_detected']:
-            # Crisis response
-            chat_response = ChatResponse(
-                response=analysis_result['response'],
-                emotional_state={
-                    "primary_emotion": "crisis",
-                    "intensity": "emergency",
-                    "crisis_level": analysis_result['crisis_level'],
-                    "cultural_context": analysis_result.get('cultural_context', "")
-                },
-                room_suggestions=["crisis-intervention"],
-                resources=analysis_result['resources'],
-                crisis_alert=True,
-                human_intervention=True,
-                follow_up_questions=["Please contact emergency services immediately"]
-            )
-        else:
-            # Normal response
-            chat_response = ChatResponse(
-                response=analysis_result['response'],
-                emotional_state={
-                    "primary_emotion": analysis_result['primary_emotion'],
-                    "intensity": analysis_result['intensity'],
-                    "crisis_level": analysis_result['crisis_level'],
-                    "cultural_context": analysis_result.get('cultural_context', "")
-                },
-                room_suggestions=analysis_result['room_suggestions'],
-                resources=analysis_result['resources'],
-                crisis_alert=False,
-                human_intervention=analysis_result['requires_human_intervention'],
-                follow_up_questions=analysis_result['follow_up_questions']
-            )
-
-        return chat_response
+        analysis_result = await analyze_emotions(request.message)
 
+        return build_chat_response(analysis_result, request.resource_refs)
+
+    except AnalysisOverloaded as e:
+        logger.warning(f"Analysis overloaded: {e}")
+        raise HTTPException(status_code=503, detail="Analysis service busy, please retry", headers={"Retry-After": "1"})
     except Exception as e:
         logger.error(f"Analysis error: {e}")
         raise HTTPException(status_code=500, detail=f"Analysis error: {str(e)}")
 
+def sse_event(event: str, data: Dict) -> str:
+    """Format one server-sent event"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+async def stream_chat_events(message: str, analysis_result: Dict, chat_response: ChatResponse) -> AsyncIterator[str]:
+    """Analysis first, then LLM text deltas, then the complete response
+
+    Crisis responses are not left to the LLM; they arrive whole in the
+    done event, right after the analysis.
+    """
+
+    yield sse_event("analysis", chat_response.model_dump(exclude={"response"}))
+
+    if not chat_response.crisis_alert:
+        parts = []
+        async for delta in llm.stream_response(message, llm_context(analysis_result)):
+            yield sse_event("delta", {"index": len(parts), "delta": delta})
+            parts.append(delta)
+        chat_response = chat_response.model_copy(update={"response": "".join(parts)})
+
+    yield sse_event("done", chat_response.model_dump())
+
+@app.post("/api/chat/analyze/stream")
+async def analyze_message_stream(request: ChatMessage):
+    """Analyze a chat message and stream the AI response as server-sent events"""
+
+    try:
+        analysis_result = await analyze_emotions(request.message)
+    except AnalysisOverloaded as e:
+        logger.warning(f"Analysis overloaded: {e}")
+        raise HTTPException(status_code=503, detail="Analysis service busy, please retry", headers={"Retry-After": "1"})
+    except Exception as e:
+        logger.error(f"Analysis error: {e}")
+        raise HTTPException(status_code=500, detail=f"Analysis error: {str(e)}")
+
+    chat_response = build_chat_response(analysis_result, request.resource_refs)
+    return StreamingResponse(
+        stream_chat_events(request.message, analysis_result, chat_response),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.post("/api/chat/analyze/batch", response_model=BatchChatResponse)
+async def analyze_message_batch(request: BatchChatMessage):
+    """Analyze many messages at once (history replays, moderation sweeps) and return results in order"""
+
+    if len(request.messages) > MAX_BATCH_SIZE:
+        raise HTTPException(status_code=413, detail=f"Batch too large: at most {MAX_BATCH_SIZE} messages per request")
+
+    try:
+        analysis_results = await analyze_emotions_batch(request.messages, request.user_context)
+
+        return BatchChatResponse(results=[build_chat_response(result, request.resource_refs) for result in analysis_results])
+
+    except AnalysisOverloaded as e:
+        logger.warning(f"Batch analysis overloaded: {e}")
+        raise HTTPException(status_code=503, detail="Analysis service busy, please retry", headers={"Retry-After": "1"})
+    except Exception as e:
+        logger.error(f"Batch analysis error: {e}")
+        raise HTTPException(status_code=500, detail=f"Batch analysis error: {str(e)}")
+
+@app.get("/api/chat/resources")
+async def get_resource_catalog_endpoint(request: Request):
+    """Full resource catalog, revalidated by ETag"""
+
+    headers = {"ETag": resource_catalog.etag, "Cache-Control": f"public, max-age={RESOURCE_CATALOG_MAX_AGE}"}
+    if request.headers.get("if-none-match") == resource_catalog.etag:
+        return Response(status_code=304, headers=headers)
+
+    return Response(content=json.dumps(resource_catalog.to_dict()), media_type="application/json", headers=headers)
+
 @app.get("/api/chat/rooms")
-async def get_available_rooms():
-    """Get available support rooms"""
-    rooms = [
-        {
-            "id": "general-support",
-            "name": "General Support",
-            "description": "Open space for relationship discussions and general support",
-            "user_count": 0,
-            "max_users": 50,
-            "category": "general",
-            "requires_verification": False
-        },
-        {
-            "id": "crisis-intervention",
-            "name": "Crisis Intervention",
-            "description": "24/7 emergency emotional support with human counselors",
-            "user_count": 0,
-            "max_users": 10,
-            "category": "crisis",
-            "requires_verification": False
-        },
-        {
-            "id": "emotional-support",
-            "name": "Emotional Support",
-            "description": "Focused emotional support and coping strategies",
-            "user_count": 0,
-            "max_users": 40,
-            "category": "emotional",
-            "requires_verification": False
-        },
-        {
-            "id": "anger-management",
-            "name": "Anger Management",
-            "description": "Coping strategies and anger management techniques",
-            "user_count": 0,
-            "max_users": 20,
-            "category": "recovery",
-            "requires_verification": False
-        }
-    ]
-    return {"success": True, "rooms": rooms}
+async def get_available_rooms(request: Request):
+    """Get available support rooms with live user counts, revalidated by ETag"""
+
+    occupancy = await get_room_occupancy()
+    etag = room_catalog.etag(occupancy)
+    headers = {"ETag": etag, "Cache-Control": f"public, max-age={int(ROOM_OCCUPANCY_TTL)}, must-revalidate"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+
+    body = {"success": True, "version": room_catalog.version, "rooms": room_catalog.listing(occupancy)}
+    return Response(content=json.dumps(body), media_type="application/json", headers=headers)
 
 @app.get("/api/chat/emergency-resources")
 async def get_emergency_resources():
@@ -366,9 +314,22 @@ async def health_check():
             "Crisis detection",
             "Cultural sensitivity",
             "Real-time responses"
-        ]
+        ],
+        "analysis_executor": analysis_executor.get_stats(),
+        "analysis_cache": metta_engine.analysis_cache.get_stats(),
+        "llm": llm.client.get_stats(),
+        "response_cache": llm.cache.get_stats(),
+        "llm_single_flight": llm.in_flight.get_stats(),
+        "llm_circuit": llm.get_circuit_stats()
     }
 
+@app.on_event("shutdown")
+async def shutdown_analysis_executor():
+    """Stop analysis workers and the LLM and occupancy connection pools with the API"""
+    analysis_executor.shutdown()
+    await llm.client.aclose()
+    await occupancy_client.aclose()
+
 if __name__ == "__main__":
     print("🚀 Starting MeTTa Chat API on http://localhost:8006")
     print("📊 Features: Emotional analysis, Crisis detection, Cultural sensitivity")
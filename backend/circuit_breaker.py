@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Circuit Breaker for the Divorce Support Platform
+Rolling error-rate and latency window that stops calling a failing dependency
+"""
+
+import os
+import time
+from collections import deque
+from typing import Deque, Dict, Tuple
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """Closed / open / half-open breaker over a rolling window of outcomes
+
+    While closed, every call goes through and its outcome is recorded.
+    Once the window holds enough recent calls and either the failure rate
+    or the share of slow calls crosses its threshold, the breaker opens
+    and callers are refused immediately. After the cool-down it half-opens
+    and lets a few probe calls through: a successful probe closes it with
+    a fresh window, a failed one reopens it.
+
+    Configuration (constructor arguments override environment variables,
+    which are read with the given prefix, e.g. LLM_BREAKER_WINDOW):
+        WINDOW            outcomes kept in the rolling window (default 20)
+        WINDOW_SECONDS    outcomes older than this are ignored (default 60)
+        MIN_CALLS         calls needed in the window before it can open (default 5)
+        ERROR_RATE        failure share that opens it (default 0.5)
+        SLOW_SECONDS      calls slower than this count as slow (default 4)
+        SLOW_RATE         slow-call share that opens it (default 0.5)
+        OPEN_SECONDS      cool-down before probing again (default 30)
+        HALF_OPEN_CALLS   probe calls allowed at once while half-open (default 1)
+    """
+
+    def __init__(self, prefix: str = "LLM_BREAKER", window: int = None, window_seconds: float = None,
+                 min_calls: int = None, error_rate: float = None, slow_seconds: float = None,
+                 slow_rate: float = None, open_seconds: float = None, half_open_calls: int = None):
+        def setting(name, default, cast):
+            return cast(os.getenv(f"{prefix}_{name}", default))
+
+        self.window = window if window is not None else setting("WINDOW", "20", int)
+        self.window_seconds = window_seconds if window_seconds is not None else setting("WINDOW_SECONDS", "60", float)
+        self.min_calls = min_calls if min_calls is not None else setting("MIN_CALLS", "5", int)
+        self.error_rate = error_rate if error_rate is not None else setting("ERROR_RATE", "0.5", float)
+        self.slow_seconds = slow_seconds if slow_seconds is not None else setting("SLOW_SECONDS", "4", float)
+        self.slow_rate = slow_rate if slow_rate is not None else setting("SLOW_RATE", "0.5", float)
+        self.open_seconds = open_seconds if open_seconds is not None else setting("OPEN_SECONDS", "30", float)
+        self.half_open_calls = half_open_calls if half_open_calls is not None else setting("HALF_OPEN_CALLS", "1", int)
+
+        self.state = CLOSED
+        self._opened_at = 0.0
+        self._probes = 0
+
+        # (recorded_at, failed, slow)
+        self._outcomes: Deque[Tuple[float, bool, bool]] = deque(maxlen=self.window)
+        self.stats = {"allowed": 0, "rejected": 0, "successes": 0, "failures": 0, "opened": 0, "closed": 0}
+
+    def allow(self) -> bool:
+        """Whether a call may proceed now; callers refused here should fall back"""
+
+        now = time.monotonic()
+        if self.state == OPEN:
+            if now - self._opened_at < self.open_seconds:
+                self.stats["rejected"] += 1
+                return False
+            self.state = HALF_OPEN
+            self._opened_at = now
+            self._probes = 0
+
+        if self.state == HALF_OPEN:
+            # Probes that never reported back (e.g. cancelled) are written off after a cool-down
+            if self._probes >= self.half_open_calls and now - self._opened_at >= self.open_seconds:
+                self._opened_at = now
+                self._probes = 0
+            if self._probes >= self.half_open_calls:
+                self.stats["rejected"] += 1
+                return False
+            self._probes += 1
+
+        self.stats["allowed"] += 1
+        return True
+
+    def record_success(self, seconds: float):
+        self.stats["successes"] += 1
+        self._record(failed=False, seconds=seconds)
+
+    def record_failure(self, seconds: float):
+        self.stats["failures"] += 1
+        self._record(failed=True, seconds=seconds)
+
+    def _record(self, failed: bool, seconds: float):
+        now = time.monotonic()
+        slow = seconds >= self.slow_seconds
+
+        if self.state == HALF_OPEN:
+            self._probes = max(0, self._probes - 1)
+            if failed or slow:
+                self._open(now)
+            else:
+                self._outcomes.clear()
+                self.state = CLOSED
+                self.stats["closed"] += 1
+            return
+
+        if self.state == OPEN:
+            return  # A call admitted before the breaker opened
+
+        self._outcomes.append((now, failed, slow))
+        while self._outcomes and now - self._outcomes[0][0] > self.window_seconds:
+            self._outcomes.popleft()
+
+        calls = len(self._outcomes)
+        if calls < self.min_calls:
+            return
+        failures = sum(1 for _, outcome_failed, _ in self._outcomes if outcome_failed)
+        slow_calls = sum(1 for _, _, outcome_slow in self._outcomes if outcome_slow)
+        if failures / calls >= self.error_rate or slow_calls / calls >= self.slow_rate:
+            self._open(now)
+
+    def _open(self, now: float):
+        self.state = OPEN
+        self._opened_at = now
+        self._probes = 0
+        self._outcomes.clear()
+        self.stats["opened"] += 1
+
+    def get_stats(self) -> Dict:
+        calls = len(self._outcomes)
+        return dict(
+            self.stats,
+            state=self.state,
+            window_calls=calls,
+            window_error_rate=round(sum(1 for _, failed, _ in self._outcomes if failed) / calls, 3) if calls else 0.0,
+            window_slow_rate=round(sum(1 for _, _, slow in self._outcomes if slow) / calls, 3) if calls else 0.0
+        )
@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""
+LLM HTTP Client for the Divorce Support Platform
+Non-blocking, pooled ASI:One chat completions client with bounded concurrency and retries
+"""
+
+import asyncio
+import json
+import os
+import random
+import time
+import logging
+from typing import AsyncIterator, Dict, List, Optional
+
+import httpx
+
+from metrics import LatencyHistogram
+
+logger = logging.getLogger(__name__)
+
+try:
+    import h2  # noqa: F401  HTTP/2 support for httpx is optional
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+ASI_ONE_ENDPOINT = os.getenv("ASI_ONE_ENDPOINT", "https://api.asi1.ai/v1/chat/completions")
+
+# Responses worth retrying; anything else is returned to the caller as an error
+RETRYABLE_STATUS = frozenset((408, 429, 500, 502, 503, 504))
+
+
+class LLMClientError(Exception):
+    """Raised when a completion could not be obtained"""
+
+    def __init__(self, message: str, status_code: int = None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class AsyncLLMClient:
+    """Shared keep-alive connection pool for chat completion calls
+
+    Configuration (constructor arguments override environment variables):
+        ASI_HTTP_MAX_CONNECTIONS   pooled connections (default 32)
+        ASI_HTTP_MAX_KEEPALIVE     idle keep-alive connections kept (default 16)
+        ASI_HTTP_CONCURRENCY       completions in flight at once (default 16)
+        ASI_HTTP_CONNECT_TIMEOUT   seconds to establish a connection (default 3)
+        ASI_HTTP_READ_TIMEOUT      seconds to wait for the completion (default 10)
+        ASI_HTTP_RETRIES           retries after a transport error or 408/429/5xx (default 2)
+        ASI_HTTP_RETRY_BACKOFF     base retry delay, doubled per attempt with jitter (default 0.2)
+        ASI_HTTP2                  "1" to negotiate HTTP/2 when the h2 package is installed (default 1)
+    """
+
+    def __init__(self, endpoint: str = None, api_key: str = None, max_connections: int = None,
+                 max_keepalive: int = None, concurrency: int = None, connect_timeout: float = None,
+                 read_timeout: float = None, retries: int = None, retry_backoff: float = None):
+        self.endpoint = endpoint or ASI_ONE_ENDPOINT
+        self.api_key = api_key if api_key is not None else os.getenv("ASI_ONE_API_KEY", "")
+
+        self.max_connections = max_connections or int(os.getenv("ASI_HTTP_MAX_CONNECTIONS", "32"))
+        self.max_keepalive = max_keepalive or int(os.getenv("ASI_HTTP_MAX_KEEPALIVE", "16"))
+        self.concurrency = concurrency or int(os.getenv("ASI_HTTP_CONCURRENCY", "16"))
+        self.connect_timeout = connect_timeout or float(os.getenv("ASI_HTTP_CONNECT_TIMEOUT", "3"))
+        self.read_timeout = read_timeout or float(os.getenv("ASI_HTTP_READ_TIMEOUT", "10"))
+        self.retries = retries if retries is not None else int(os.getenv("ASI_HTTP_RETRIES", "2"))
+        self.retry_backoff = retry_backoff if retry_backoff is not None else float(os.getenv("ASI_HTTP_RETRY_BACKOFF", "0.2"))
+        self.http2 = HTTP2_AVAILABLE and os.getenv("ASI_HTTP2", "1") == "1"
+
+        self._client: Optional[httpx.AsyncClient] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self.latency = LatencyHistogram()
+        self.first_token_latency = LatencyHistogram()
+        self.stats = {"requests": 0, "completed": 0, "streams": 0, "retries": 0, "errors": 0, "in_flight": 0}
+
+    def _get_client(self) -> httpx.AsyncClient:
+        """Create the pooled client on first use, inside the running loop"""
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                http2=self.http2,
+                limits=httpx.Limits(max_connections=self.max_connections, max_keepalive_connections=self.max_keepalive),
+                timeout=httpx.Timeout(self.read_timeout, connect=self.connect_timeout),
+                headers={"Authorization": f"Bearer {self.api_key}", "Content-Type": "application/json"}
+            )
+            self._slots = asyncio.Semaphore(self.concurrency)
+        return self._client
+
+    async def chat_completion(self, messages: List[Dict], model: str = "asi1-mini",
+                              max_tokens: int = 500, temperature: float = 0.7) -> str:
+        """Return the completion text, retrying transient failures"""
+
+        client = self._get_client()
+        payload = {"model": model, "messages": messages, "max_tokens": max_tokens, "temperature": temperature}
+
+        self.stats["requests"] += 1
+        async with self._slots:
+            self.stats["in_flight"] += 1
+            started = time.perf_counter()
+            try:
+                result = await self._post_with_retries(client, payload)
+                self.stats["completed"] += 1
+                return result["choices"][0]["message"]["content"]
+            except (KeyError, IndexError, TypeError, ValueError) as e:
+                self.stats["errors"] += 1
+                raise LLMClientError(f"Malformed completion: {e}")
+            except LLMClientError:
+                self.stats["errors"] += 1
+                raise
+            finally:
+                self.stats["in_flight"] -= 1
+                self.latency.observe(time.perf_counter() - started)
+
+    async def stream_chat_completion(self, messages: List[Dict], model: str = "asi1-mini",
+                                     max_tokens: int = 500, temperature: float = 0.7) -> AsyncIterator[str]:
+        """Yield completion text chunks as the server produces them
+
+        Transient failures are retried only until the first chunk arrives;
+        after that an interrupted stream raises LLMClientError, so callers
+        never see duplicated text.
+        """
+
+        client = self._get_client()
+        payload = {"model": model, "messages": messages, "max_tokens": max_tokens,
+                   "temperature": temperature, "stream": True}
+
+        self.stats["requests"] += 1
+        self.stats["streams"] += 1
+        async with self._slots:
+            self.stats["in_flight"] += 1
+            started = time.perf_counter()
+            first_chunk = True
+            try:
+                for attempt in range(self.retries + 1):
+                    try:
+                        async with client.stream("POST", self.endpoint, json=payload) as response:
+                            if response.status_code == 200:
+                                async for chunk in _completion_chunks(response):
+                                    if first_chunk:
+                                        self.first_token_latency.observe(time.perf_counter() - started)
+                                        first_chunk = False
+                                    yield chunk
+                                self.stats["completed"] += 1
+                                return
+                            error = LLMClientError(f"ASI API error: {response.status_code}", response.status_code)
+                            if response.status_code not in RETRYABLE_STATUS:
+                                raise error
+                    except httpx.TransportError as e:
+                        error = LLMClientError(f"ASI API stream failed: {e!r}")
+                        if not first_chunk:
+                            raise error
+
+                    if attempt < self.retries:
+                        self.stats["retries"] += 1
+                        await asyncio.sleep(self.retry_backoff * (2 ** attempt) * random.uniform(0.5, 1.5))
+
+                raise error
+            except LLMClientError:
+                self.stats["errors"] += 1
+                raise
+            finally:
+                self.stats["in_flight"] -= 1
+                self.latency.observe(time.perf_counter() - started)
+
+    async def _post_with_retries(self, client: httpx.AsyncClient, payload: Dict) -> Dict:
+        for attempt in range(self.retries + 1):
+            try:
+                response = await client.post(self.endpoint, json=payload)
+                if response.status_code == 200:
+                    return response.json()
+                error = LLMClientError(f"ASI API error: {response.status_code}", response.status_code)
+                if response.status_code not in RETRYABLE_STATUS:
+                    raise error
+            except httpx.TransportError as e:
+                error = LLMClientError(f"ASI API call failed: {e!r}")
+
+            if attempt < self.retries:
+                self.stats["retries"] += 1
+                await asyncio.sleep(self.retry_backoff * (2 ** attempt) * random.uniform(0.5, 1.5))
+
+        raise error
+
+    def get_stats(self) -> Dict:
+        return dict(
+            self.stats,
+            http2=self.http2,
+            concurrency=self.concurrency,
+            max_connections=self.max_connections,
+            latency=self.latency.to_dict(),
+            first_token_latency=self.first_token_latency.to_dict()
+        )
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+async def _completion_chunks(response: httpx.Response) -> AsyncIterator[str]:
+    """Text deltas from an OpenAI-style server-sent event stream"""
+
+    async for line in response.aiter_lines():
+        if not line.startswith("data:"):
+            continue
+        data = line[5:].strip()
+        if data == "[DONE]":
+            return
+        try:
+            delta = json.loads(data)["choices"][0].get("delta", {}).get("content")
+        except (KeyError, IndexError, ValueError) as e:
+            raise LLMClientError(f"Malformed completion chunk: {e}")
+        if delta:
+            yield delta
+
+
+# Process-wide client so every caller shares one connection pool
+_shared_client: Optional[AsyncLLMClient] = None
+
+def get_llm_client() -> AsyncLLMClient:
+    """Return the shared LLM client, configured from the environment"""
+    global _shared_client
+    if _shared_client is None:
+        _shared_client = AsyncLLMClient()
+    return _shared_client
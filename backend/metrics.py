@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Lightweight metrics for the Divorce Support Platform
+Fixed-bucket latency histograms shared by the agents and the WebSocket server
+"""
+
+from bisect import bisect_left
+from typing import Dict, Sequence
+
+# Bucket upper bounds in milliseconds; anything slower lands in the overflow bucket
+DEFAULT_LATENCY_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram with O(log buckets) observations"""
+
+    def __init__(self, buckets_ms: Sequence[float] = DEFAULT_LATENCY_BUCKETS_MS):
+        self.buckets_ms = tuple(buckets_ms)
+        self.counts = [0] * (len(self.buckets_ms) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def observe(self, seconds: float):
+        """Record one latency sample given in seconds"""
+        elapsed_ms = seconds * 1000
+        self.counts[bisect_left(self.buckets_ms, elapsed_ms)] += 1
+        self.count += 1
+        self.total_ms += elapsed_ms
+        if elapsed_ms > self.max_ms:
+            self.max_ms = elapsed_ms
+
+    def percentile(self, fraction: float) -> float:
+        """Upper bound (ms) of the bucket holding the given fraction of samples"""
+        if not self.count:
+            return 0.0
+
+        target = fraction * self.count
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= target:
+                return self.buckets_ms[index] if index < len(self.buckets_ms) else self.max_ms
+        return self.max_ms
+
+    def to_dict(self) -> Dict:
+        """Summary suitable for health/status endpoints"""
+        buckets = {f"<={bound}ms": count for bound, count in zip(self.buckets_ms, self.counts)}
+        buckets[f">{self.buckets_ms[-1]}ms"] = self.counts[-1]
+
+        return {
+            "count": self.count,
+            "mean_ms": round(self.total_ms / self.count, 2) if self.count else 0.0,
+            "p50_ms": self.percentile(0.50),
+            "p99_ms": self.percentile(0.99),
+            "max_ms": round(self.max_ms, 2),
+            "buckets": buckets
+        }
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Analysis Cache for the Divorce Support MeTTa Engine
+Bounded LRU + TTL memoization of analysis results for frequently repeated messages
+"""
+
+import copy
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+# user_context fields that can change an analysis result and therefore belong in the key
+CONTEXT_KEY_FIELDS = ("room_type",)
+
+# Long messages rarely repeat, so hashing and storing them is wasted work
+MAX_CACHED_MESSAGE_CHARS = 1000
+
+# Characters trimmed from both ends; no keyword starts or ends with one, so trimming never changes a match
+_TRIM_CHARS = " \t\r\n.,!?;:\"'"
+
+
+class AnalysisCache:
+    """Thread-safe LRU cache with per-entry expiry
+
+    Only the message's outer whitespace/punctuation and case are normalized,
+    which keeps cached results identical to a fresh analysis. Crisis results
+    are never stored, so escalation always runs on a fresh analysis.
+    """
+
+    def __init__(self, max_size: int = None, ttl_seconds: float = None):
+        self.max_size = max_size if max_size is not None else int(os.getenv("METTA_CACHE_SIZE", "2048"))
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else float(os.getenv("METTA_CACHE_TTL", "300"))
+
+        self._entries: "OrderedDict[Tuple, Tuple[float, Dict]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {
+            "hits": 0,
+            "misses": 0,
+            "evictions": 0,
+            "expirations": 0,
+            "skipped_crisis": 0
+        }
+
+    def make_key(self, message: str, user_context: Dict = None) -> Optional[Tuple]:
+        """Build the cache key, or None when the message should not be cached"""
+
+        if self.max_size <= 0 or len(message) > MAX_CACHED_MESSAGE_CHARS:
+            return None
+
+        normalized = message.lower().strip(_TRIM_CHARS)
+        digest = hashlib.blake2b(normalized.encode("utf-8"), digest_size=16).digest()
+        context = user_context or {}
+        return (digest,) + tuple(context.get(field) for field in CONTEXT_KEY_FIELDS)
+
+    def get(self, key: Optional[Tuple]) -> Optional[Dict]:
+        """Return a copy of a live entry, or None on miss/expiry"""
+
+        if key is None:
+            return None
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.stats["misses"] += 1
+                return None
+
+            expires_at, result = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                self.stats["expirations"] += 1
+                self.stats["misses"] += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.stats["hits"] += 1
+
+        # Callers annotate results and their nested lists, so never hand out stored objects
+        return copy.deepcopy(result)
+
+    def put(self, key: Optional[Tuple], result: Dict):
+        """Store a result unless it is uncacheable or a crisis"""
+
+        if key is None:
+            return
+
+        if result.get("crisis_detected") or result.get("crisis_level") in ("high", "emergency"):
+            self.stats["skipped_crisis"] += 1
+            return
+
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, copy.deepcopy(result))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.stats["evictions"] += 1
+
+    def clear(self):
+        """Drop every entry, e.g. after keyword tables change"""
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self) -> Dict:
+        """Cache counters for health endpoints"""
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return dict(
+            self.stats,
+            size=len(self._entries),
+            max_size=self.max_size,
+            ttl_seconds=self.ttl_seconds,
+            hit_rate=round(self.stats["hits"] / lookups, 3) if lookups else 0.0
+        )
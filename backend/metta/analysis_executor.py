@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Analysis Executor for the Divorce Support MeTTa Engine
+Runs CPU-bound message analysis off the asyncio event loop with bounded queueing
+"""
+
+import asyncio
+import copy
+import os
+import logging
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+try:
+    from .analysis_cache import CONTEXT_KEY_FIELDS
+    from .metta_engine import get_metta_engine
+    from .single_flight import SingleFlight
+except ImportError:
+    from analysis_cache import CONTEXT_KEY_FIELDS
+    from metta_engine import get_metta_engine
+    from single_flight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+
+class AnalysisOverloaded(Exception):
+    """Raised when the analysis queue stays full and the caller should back off"""
+
+
+def _warm_worker():
+    """Compile the engine's rule tables once per worker process"""
+    get_metta_engine()
+
+
+def _analyze_in_worker(message: str, user_context: Optional[Dict]) -> Dict:
+    # The submitting process owns the result cache
+    return get_metta_engine().analyze_uncached(message, user_context)
+
+
+def _analyze_many_in_worker(messages: List[str], user_context: Optional[Dict]) -> List[Dict]:
+    return get_metta_engine().analyze_many(messages, user_context)
+
+
+class AnalysisExecutor:
+    """Offloads MeTTa analysis to a process or thread pool
+
+    Configuration (constructor arguments override environment variables):
+        METTA_EXECUTOR_MODE         "process" (default) or "thread"
+        METTA_EXECUTOR_WORKERS      pool size, defaults to the CPU count
+        METTA_EXECUTOR_MAX_PENDING  analyses queued or running at once (default 256)
+        METTA_EXECUTOR_QUEUE_TIMEOUT seconds a caller waits for a slot before
+                                    AnalysisOverloaded is raised (default 5)
+        METTA_EXECUTOR_INLINE_CHARS messages up to this length are analyzed
+                                    inline, where pool overhead would dominate (default 512)
+    """
+
+    def __init__(self, mode: str = None, max_workers: int = None, max_pending: int = None,
+                 queue_timeout: float = None, inline_max_chars: int = None):
+        self.mode = mode or os.getenv("METTA_EXECUTOR_MODE", "process")
+        if self.mode not in ("process", "thread"):
+            raise ValueError(f"Unknown analysis executor mode: {self.mode}")
+
+        self.max_workers = max_workers or int(os.getenv("METTA_EXECUTOR_WORKERS", "0")) or os.cpu_count() or 1
+        self.max_pending = max_pending or int(os.getenv("METTA_EXECUTOR_MAX_PENDING", "256"))
+        self.queue_timeout = queue_timeout if queue_timeout is not None else float(os.getenv("METTA_EXECUTOR_QUEUE_TIMEOUT", "5"))
+        self.inline_max_chars = inline_max_chars if inline_max_chars is not None else int(os.getenv("METTA_EXECUTOR_INLINE_CHARS", "512"))
+
+        self._pool: Optional[Executor] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+
+        # Identical messages already being analyzed in the pool share that analysis
+        self.in_flight = SingleFlight()
+        self.stats = {
+            "submitted": 0,
+            "inline": 0,
+            "completed": 0,
+            "rejected": 0,
+            "pending": 0
+        }
+
+    def _get_pool(self) -> Executor:
+        """Create the worker pool on first use"""
+        if self._pool is None:
+            if self.mode == "process":
+                self._pool = ProcessPoolExecutor(max_workers=self.max_workers, initializer=_warm_worker)
+            else:
+                self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="metta-analysis")
+            logger.info(f"✅ Analysis executor started ({self.mode} pool, {self.max_workers} workers)")
+        return self._pool
+
+    async def analyze(self, message: str, user_context: Dict = None) -> Dict:
+        """Analyze a single message without blocking the event loop"""
+
+        engine = get_metta_engine()
+
+        if len(message) <= self.inline_max_chars:
+            self.stats["inline"] += 1
+            return engine.analyze(message, user_context)
+
+        # Serve repeats from this process's cache before paying for a pool round trip
+        cached = engine.cached_analysis(message, user_context)
+        if cached is not None:
+            return cached
+
+        # Inline analyses never overlap; only pool round trips are worth coalescing
+        context = user_context or {}
+        key = (message,) + tuple(context.get(field) for field in CONTEXT_KEY_FIELDS)
+        result = await self.in_flight.run(key, lambda: self._analyze_in_pool(message, user_context))
+
+        # Coalesced callers share one result; callers annotate theirs and its nested lists, so each gets a deep copy
+        return copy.deepcopy(result)
+
+    async def _analyze_in_pool(self, message: str, user_context: Optional[Dict]) -> Dict:
+        result = await self._submit(_analyze_in_worker, message, user_context)
+        get_metta_engine().remember_analysis(message, user_context, result)
+        return result
+
+    async def analyze_many(self, messages: List[str], user_context: Dict = None) -> List[Dict]:
+        """Analyze a batch of messages without blocking the event loop"""
+        return await self._submit(_analyze_many_in_worker, messages, user_context)
+
+    async def _submit(self, func, *args):
+        """Run func in the pool once a pending slot is free, applying backpressure"""
+
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_pending)
+
+        try:
+            await asyncio.wait_for(self._slots.acquire(), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            self.stats["rejected"] += 1
+            raise AnalysisOverloaded(f"Analysis queue full ({self.max_pending} pending)")
+
+        self.stats["submitted"] += 1
+        self.stats["pending"] += 1
+        try:
+            loop = asyncio.get_running_loop()
+            result = await loop.run_in_executor(self._get_pool(), func, *args)
+            self.stats["completed"] += 1
+            return result
+        finally:
+            self.stats["pending"] -= 1
+            self._slots.release()
+
+    def get_stats(self) -> Dict:
+        """Executor counters for health endpoints"""
+        return dict(
+            self.stats,
+            mode=self.mode,
+            workers=self.max_workers,
+            max_pending=self.max_pending,
+            coalesced=self.in_flight.stats["coalesced"],
+            single_flight=self.in_flight.get_stats()
+        )
+
+    def shutdown(self):
+        """Stop the worker pool"""
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+
+# Process-wide executor shared by the chat API and agents
+_shared_executor: Optional[AnalysisExecutor] = None
+
+def get_analysis_executor() -> AnalysisExecutor:
+    """Return the shared analysis executor, configured from the environment"""
+    global _shared_executor
+    if _shared_executor is None:
+        _shared_executor = AnalysisExecutor()
+    return _shared_executor
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Multi-pattern Keyword Matcher for the Divorce Support MeTTa Engine
+Aho-Corasick automaton that finds every crisis, emotion and cultural keyword in one pass
+"""
+
+from collections import deque
+from typing import Dict, List, NamedTuple
+
+
+class KeywordHit(NamedTuple):
+    table: str
+    category: str
+    keyword: str
+    offset: int
+    rank: int
+
+
+class KeywordAutomaton:
+    """Precompiled Aho-Corasick automaton over several keyword tables
+
+    Tables map a table name (e.g. 'crisis') to an ordered {category: [keywords]}
+    dict. Every (table, category, keyword) entry gets a rank reflecting its
+    position in the tables, so callers can reproduce "first match wins"
+    semantics of the original nested loops by taking the lowest rank.
+    Matching is plain substring matching, identical to `keyword in message`.
+    """
+
+    def __init__(self, tables: Dict[str, Dict[str, List[str]]]):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[List[tuple]] = [[]]
+        self.pattern_count = 0
+
+        rank = 0
+        for table, categories in tables.items():
+            for category, keywords in categories.items():
+                for keyword in keywords:
+                    self._add_pattern(keyword, (table, category, keyword, rank))
+                    rank += 1
+
+        self._build_failure_links()
+
+    def _add_pattern(self, pattern: str, entry: tuple):
+        """Insert a single pattern into the trie"""
+        if not pattern:
+            return
+
+        state = 0
+        for char in pattern:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+                self._goto[state][char] = next_state
+            state = next_state
+
+        self._output[state].append(entry)
+        self.pattern_count += 1
+
+    def _build_failure_links(self):
+        """Compute failure links breadth-first and fold them into a DFA
+
+        After folding, every state's transition dict already contains the
+        targets its failure chain would reach, so matching is one dict lookup
+        per character with no backtracking.
+        """
+        queue = deque(self._goto[0].values())
+
+        # Root transitions are the base every other state inherits from
+        self._delta: List[Dict[str, int]] = [dict() for _ in self._goto]
+        self._delta[0] = dict(self._goto[0])
+
+        while queue:
+            state = queue.popleft()
+            fail_state = self._fail[state]
+
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                self._fail[next_state] = self._delta[fail_state].get(char, 0)
+
+            # Patterns ending at the failure state also end here
+            self._output[state] = self._output[state] + self._output[fail_state]
+
+            transitions = dict(self._delta[fail_state])
+            transitions.update(self._goto[state])
+            self._delta[state] = transitions
+
+    def find_all(self, text: str) -> List[KeywordHit]:
+        """Return every keyword occurrence in text in a single linear scan"""
+
+        delta = self._delta
+        output = self._output
+
+        hits = []
+        state = 0
+        for index, char in enumerate(text):
+            state = delta[state].get(char, 0)
+            if output[state]:
+                for table, category, keyword, rank in output[state]:
+                    hits.append(KeywordHit(table, category, keyword, index - len(keyword) + 1, rank))
+
+        return hits
+
+    def find_all_many(self, texts: List[str]) -> List[List[KeywordHit]]:
+        """Return the hits for each text, one scan per text"""
+        return [self.find_all(text) for text in texts]
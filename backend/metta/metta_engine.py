@@ -13,6 +13,15 @@ from typing import Dict, List, Tuple, Optional
 from dataclasses import dataclass
 import logging
 
+try:
+    from .keyword_matcher import KeywordAutomaton, KeywordHit
+    from .analysis_cache import AnalysisCache
+    from .resource_catalog import get_resource_catalog
+except ImportError:
+    from keyword_matcher import KeywordAutomaton, KeywordHit
+    from analysis_cache import AnalysisCache
+    from resource_catalog import get_resource_catalog
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -43,6 +52,35 @@ class DivorceSupportMeTTaEngine:
         self.crisis_keywords = self._load_crisis_keywords()
         self.emotion_keywords = self._load_emotion_keywords()
         self.cultural_indicators = self._load_cultural_indicators()
+        self.keyword_automaton = KeywordAutomaton({
+            'crisis': self.crisis_keywords,
+            'emotion': self.emotion_keywords,
+            'cultural': self.cultural_indicators
+        })
+
+        # Response tables are built once and copied on the way out where callers extend them
+        self.emotion_responses = self._load_emotion_responses()
+        self.default_responses = [
+            "I'm here to listen and support you through this difficult time.",
+            "Thank you for sharing with me. How are you feeling about what you're going through?"
+        ]
+        self.room_mapping = self._load_room_mapping()
+        self.follow_up_questions = self._load_follow_up_questions()
+        self.default_follow_up_questions = ["How are you taking care of yourself during this time?"]
+        # Resources are interned so every result shares the catalog's dicts and ids
+        self.resource_catalog = get_resource_catalog()
+        self.emotion_resources = {
+            emotion: self.resource_catalog.intern_all(resources)
+            for emotion, resources in self._load_emotion_resources().items()
+        }
+        self.crisis_hotlines = self.resource_catalog.intern_all(self._load_crisis_hotlines())
+        self.crisis_responses = {
+            crisis_type: dict(template, resources=self.resource_catalog.intern_all(template['resources']))
+            for crisis_type, template in self._load_crisis_responses().items()
+        }
+
+        # Memoized results for frequently repeated messages
+        self.analysis_cache = AnalysisCache()
         logger.info("✅ Simplified MeTTa engine initialized successfully")
 
     def setup_knowledge_base(self):
@@ -75,54 +113,235 @@ class DivorceSupportMeTTaEngine:
             'western': ["individual", "personal choice", "dating", "career", "independence", "freedom", "privacy"]
         }
 
+    def _load_emotion_responses(self) -> Dict[str, List[str]]:
+        """Load base responses by emotion"""
+        return {
+            'anger': [
+                "I can hear the anger in your words. Anger during divorce is completely normal - it shows you cared deeply about your relationship.",
+                "It sounds like you're feeling really angry right now. That's a valid emotion. What's making you feel most angry about this situation?"
+            ],
+            'sadness': [
+                "I sense deep sadness in what you're sharing. Divorce grief is real grief - you're mourning the loss of dreams and plans you had together.",
+                "Your sadness shows how much this relationship meant to you. It's okay to feel this way. Healing takes time."
+            ],
+            'anxiety': [
+                "I can feel the anxiety in your message. Uncertainty about the future during divorce is one of the hardest parts. You're not alone in feeling this way.",
+                "Divorce anxiety is incredibly common. The unknown can feel overwhelming, but we can work through this one step at a time."
+            ],
+            'guilt': [
+                "I hear self-blame in your words. Remember that relationships involve two people, and it's rarely entirely one person's fault.",
+                "Guilt is common during divorce, but please be gentle with yourself. You're human, and you did the best you could with what you knew then."
+            ],
+            'hope': [
+                "I'm glad to hear some hope in your message. That takes real strength, especially during such a difficult time.",
+                "Your hope is inspiring. Many people have walked this path and found happiness again. You can too."
+            ]
+        }
+
+    def _load_room_mapping(self) -> Dict[str, List[str]]:
+        """Load room suggestions by emotion"""
+        return {
+            'anger': ['anger-management', 'general-support', 'legal-consultation'],
+            'sadness': ['post-divorce-recovery', 'emotional-support', 'success-stories'],
+            'anxiety': ['pre-divorce-counseling', 'financial-planning', 'co-parenting-support'],
+            'guilt': ['therapy-sessions', 'self-care-sanctuary', 'personal-transformation'],
+            'hope': ['new-beginnings', 'dating-after-divorce', 'success-stories']
+        }
+
+    def _load_follow_up_questions(self) -> Dict[str, List[str]]:
+        """Load follow-up questions by emotion"""
+        return {
+            'anger': [
+                "What aspect of the divorce process is making you feel most angry?",
+                "Have you been able to talk to anyone about these feelings?",
+                "What would help you feel more in control right now?"
+            ],
+            'sadness': [
+                "What do you miss most about your relationship?",
+                "What would help you feel supported right now?",
+                "What small step could you take toward healing?"
+            ],
+            'anxiety': [
+                "What specific aspects of the future worry you most?",
+                "What would make you feel more secure during this transition?",
+                "Who in your support network can you reach out to?"
+            ],
+            'guilt': [
+                "What specifically do you feel guilty about?",
+                "Have you considered that both people contribute to relationship challenges?",
+                "What would self-compassion look like for you right now?"
+            ]
+        }
+
+    def _load_emotion_resources(self) -> Dict[str, List[Dict]]:
+        """Load helpful resources by emotion"""
+        return {
+            'anger': [
+                {"type": "article", "title": "Managing Anger During Divorce", "category": "coping-strategies", "url": "https://www.helpguide.org/articles/relationships-communication/anger-management.htm"},
+                {"type": "audio", "title": "Anger Management Meditation", "category": "self-care", "url": "https://www.mindful.org/mindfulness-meditation-anger/"}
+            ],
+            'sadness': [
+                {"type": "article", "title": "Grieving Your Marriage", "category": "healing", "url": "https://www.divorcemag.com/articles/grieving-your-marriage"},
+                {"type": "support-group", "title": "DivorceCare Support Groups", "category": "community", "url": "https://www.divorcecare.org/"}
+            ],
+            'anxiety': [
+                {"type": "guide", "title": "Divorce Planning Checklist", "category": "practical", "url": "https://www.womansdivorce.com/divorce-planning.html"},
+                {"type": "audio", "title": "Anxiety Relief Techniques", "category": "self-care", "url": "https://www.calm.com/blog/anxiety-relief"}
+            ]
+        }
+
+    def _load_crisis_hotlines(self) -> List[Dict]:
+        """Load hotlines added to high intensity responses"""
+        return [
+            {"type": "hotline", "title": "National Suicide Prevention Lifeline", "contact": "988", "available": "24/7"},
+            {"type": "hotline", "title": "Crisis Text Line", "contact": "Text HOME to 741741", "available": "24/7"}
+        ]
+
+    def _load_crisis_responses(self) -> Dict[str, Dict]:
+        """Load immediate crisis response templates"""
+        return {
+            'suicidal': {
+                'response': "I'm very concerned about you. Please reach out to emergency services or a crisis helpline immediately. You are not alone, and there are people who care deeply about you.",
+                'crisis_level': 'emergency',
+                'escalate_to': 'immediate_human_intervention',
+                'resources': [
+                    {"type": "emergency", "title": "National Suicide Prevention Lifeline", "contact": "988", "available": "24/7"},
+                    {"type": "emergency", "title": "Crisis Text Line", "contact": "Text HOME to 741741", "available": "24/7"},
+                    {"type": "emergency", "title": "Emergency Services", "contact": "911", "available": "24/7"}
+                ]
+            },
+            'self-harm': {
+                'response': "I hear how much pain you're in. Please know that there are people who care and want to help you through this difficult time.",
+                'crisis_level': 'high',
+                'escalate_to': 'crisis_counselor',
+                'resources': [
+                    {"type": "hotline", "title": "National Suicide Prevention Lifeline", "contact": "988", "available": "24/7"},
+                    {"type": "hotline", "title": "Crisis Text Line", "contact": "Text HOME to 741741", "available": "24/7"}
+                ]
+            }
+        }
+
     async def analyze_message(self, message: str, user_context: Dict = None) -> Dict:
         """Analyze user message for emotional state, crisis detection, and generate response"""
+        return self.analyze(message, user_context)
+
+    def analyze(self, message: str, user_context: Dict = None) -> Dict:
+        """Synchronous analysis core shared by the agents, chat API and direct chat support"""
+
+        cache_key = self.analysis_cache.make_key(message, user_context)
+        cached = self.analysis_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        result = self.analyze_uncached(message, user_context)
+        self.analysis_cache.put(cache_key, result)
+        return result
+
+    def analyze_uncached(self, message: str, user_context: Dict = None) -> Dict:
+        """Run the full analysis pipeline, bypassing the result cache"""
 
         message_lower = message.lower()
+
+        # Single pass over the message for every keyword table
+        hits = self.keyword_automaton.find_all(message_lower)
+
+        return self._classify(message, message_lower, hits, user_context or {})
+
+    def cached_analysis(self, message: str, user_context: Dict = None) -> Optional[Dict]:
+        """Return a memoized result without analyzing, or None on a miss"""
+        return self.analysis_cache.get(self.analysis_cache.make_key(message, user_context))
+
+    def remember_analysis(self, message: str, user_context: Dict, result: Dict):
+        """Memoize a result computed elsewhere (e.g. in a worker process)"""
+        self.analysis_cache.put(self.analysis_cache.make_key(message, user_context), result)
+
+    def analyze_many(self, messages: List[str], user_context: Dict = None) -> List[Dict]:
+        """Analyze a batch of messages in one pass, returning results in input order
+
+        Identical messages within the batch are classified once; each
+        position still gets its own result dict.
+        """
+
+        user_context = user_context or {}
+        lowered = [message.lower() for message in messages]
+
+        # Classify each distinct message once
+        unique_positions: Dict[str, int] = {}
+        unique_messages = []
+        for position, message_lower in enumerate(lowered):
+            if message_lower not in unique_positions:
+                unique_positions[message_lower] = position
+                unique_messages.append(message_lower)
+
+        batch_hits = self.keyword_automaton.find_all_many(unique_messages)
+        classified = {
+            message_lower: self._classify(messages[unique_positions[message_lower]], message_lower, hits, user_context)
+            for message_lower, hits in zip(unique_messages, batch_hits)
+        }
+
+        results = []
+        seen = set()
+        for message_lower in lowered:
+            result = classified[message_lower]
+            results.append(dict(result) if message_lower in seen else result)
+            seen.add(message_lower)
+
+        return results
+
+    def _classify(self, message: str, message_lower: str, hits: List[KeywordHit], user_context: Dict) -> Dict:
+        """Turn keyword hits for one message into a full analysis result"""
+
         analysis = {}
 
         # Step 1: Crisis Detection (highest priority)
-        crisis_result = self._detect_crisis(message_lower)
+        crisis_result = self._detect_crisis(hits)
         if crisis_result:
             return self._create_crisis_response(crisis_result, message)
 
         # Step 2: Emotional Analysis
-        emotional_analysis = self._analyze_emotions(message_lower)
+        emotional_analysis = self._analyze_emotions(hits)
         analysis.update(emotional_analysis)
 
         # Step 3: Cultural Context Detection
-        cultural_context = self._detect_cultural_context(message_lower)
+        cultural_context = self._detect_cultural_context(hits)
         if cultural_context:
             analysis['cultural_context'] = cultural_context
 
         # Step 4: Generate Response
-        response_data = self._generate_response(analysis, message_lower, user_context or {})
+        return self._generate_response(analysis, message_lower, user_context)
 
-        return response_data
-
-    def _detect_crisis(self, message: str) -> Optional[Dict]:
-        """Detect crisis situations using keyword matching"""
+    def _detect_crisis(self, hits: List[KeywordHit]) -> Optional[Dict]:
+        """Detect crisis situations from keyword hits"""
 
-        for crisis_type, keywords in self.crisis_keywords.items():
-            for keyword in keywords:
-                if keyword in message:
-                    return {
-                        'type': crisis_type,
-                        'level': 'emergency' if crisis_type == 'suicidal' else 'high',
-                        'keyword': keyword,
-                        'immediate_action': 'crisis_counselor' if crisis_type != 'suicidal' else 'immediate_intervention'
-                    }
+        # Lowest rank is the first crisis keyword in table order
+        crisis_hits = [hit for hit in hits if hit.table == 'crisis']
+        if not crisis_hits:
+            return None
 
-        return None
+        hit = min(crisis_hits, key=lambda h: h.rank)
+        crisis_type = hit.category
+        return {
+            'type': crisis_type,
+            'level': 'emergency' if crisis_type == 'suicidal' else 'high',
+            'keyword': hit.keyword,
+            'immediate_action': 'crisis_counselor' if crisis_type != 'suicidal' else 'immediate_intervention'
+        }
 
-    def _analyze_emotions(self, message: str) -> Dict:
-        """Analyze emotional content using keyword matching"""
+    def _analyze_emotions(self, hits: List[KeywordHit]) -> Dict:
+        """Analyze emotional content from keyword hits"""
 
         detected_emotions = {}
         intensity_scores = {'low': 0, 'medium': 0, 'high': 0}
 
-        for emotion, keywords in self.emotion_keywords.items():
-            matches = sum(1 for keyword in keywords if keyword in message)
+        # Count distinct keywords per emotion, repeated occurrences count once
+        matched_keywords = {}
+        for hit in hits:
+            if hit.table == 'emotion':
+                matched_keywords.setdefault(hit.category, set()).add(hit.keyword)
+
+        # Iterate in table order so ties resolve the same way as before
+        for emotion in self.emotion_keywords:
+            matches = len(matched_keywords.get(emotion, ()))
             if matches > 0:
                 detected_emotions[emotion] = matches
                 # Determine intensity based on match count and context
@@ -152,15 +371,14 @@ class DivorceSupportMeTTaEngine:
             'all_emotions': detected_emotions
         }
 
-    def _detect_cultural_context(self, message: str) -> Optional[str]:
-        """Detect cultural context indicators"""
+    def _detect_cultural_context(self, hits: List[KeywordHit]) -> Optional[str]:
+        """Detect cultural context from keyword hits"""
 
-        for culture, indicators in self.cultural_indicators.items():
-            for indicator in indicators:
-                if indicator in message:
-                    return culture
+        cultural_hits = [hit for hit in hits if hit.table == 'cultural']
+        if not cultural_hits:
+            return None
 
-        return None
+        return min(cultural_hits, key=lambda h: h.rank).category
 
     def _generate_response(self, analysis: Dict, original_message: str, user_context: Dict) -> Dict:
         """Generate contextual response"""
@@ -169,35 +387,8 @@ class DivorceSupportMeTTaEngine:
         intensity = analysis.get('intensity', 'low')
         cultural_context = analysis.get('cultural_context')
 
-        # Base responses by emotion
-        emotion_responses = {
-            'anger': [
-                "I can hear the anger in your words. Anger during divorce is completely normal - it shows you cared deeply about your relationship.",
-                "It sounds like you're feeling really angry right now. That's a valid emotion. What's making you feel most angry about this situation?"
-            ],
-            'sadness': [
-                "I sense deep sadness in what you're sharing. Divorce grief is real grief - you're mourning the loss of dreams and plans you had together.",
-                "Your sadness shows how much this relationship meant to you. It's okay to feel this way. Healing takes time."
-            ],
-            'anxiety': [
-                "I can feel the anxiety in your message. Uncertainty about the future during divorce is one of the hardest parts. You're not alone in feeling this way.",
-                "Divorce anxiety is incredibly common. The unknown can feel overwhelming, but we can work through this one step at a time."
-            ],
-            'guilt': [
-                "I hear self-blame in your words. Remember that relationships involve two people, and it's rarely entirely one person's fault.",
-                "Guilt is common during divorce, but please be gentle with yourself. You're human, and you did the best you could with what you knew then."
-            ],
-            'hope': [
-                "I'm glad to hear some hope in your message. That takes real strength, especially during such a difficult time.",
-                "Your hope is inspiring. Many people have walked this path and found happiness again. You can too."
-            ]
-        }
-
         # Select appropriate response
-        response_options = emotion_responses.get(primary_emotion, [
-            "I'm here to listen and support you through this difficult time.",
-            "Thank you for sharing with me. How are you feeling about what you're going through?"
-        ])
+        response_options = self.emotion_responses.get(primary_emotion, self.default_responses)
         selected_response = response_options[0]  # Could randomize for variety
 
         # Generate room suggestions based on emotion and context
@@ -221,6 +412,7 @@ class DivorceSupportMeTTaEngine:
             'room_suggestions': room_suggestions,
             'follow_up_questions': follow_up_questions,
             'resources': resources,
+            'resource_ids': self.resource_catalog.ids_for(resources),
             'therapeutic_approach': therapeutic_approach,
             'requires_human_intervention': self._should_escalate_to_human(analysis)
         }
@@ -228,15 +420,7 @@ class DivorceSupportMeTTaEngine:
     def _suggest_rooms(self, emotion: str, cultural_context: str = None, user_context: Dict = None) -> List[str]:
         """Suggest appropriate rooms based on emotional state and context"""
 
-        room_mapping = {
-            'anger': ['anger-management', 'general-support', 'legal-consultation'],
-            'sadness': ['post-divorce-recovery', 'emotional-support', 'success-stories'],
-            'anxiety': ['pre-divorce-counseling', 'financial-planning', 'co-parenting-support'],
-            'guilt': ['therapy-sessions', 'self-care-sanctuary', 'personal-transformation'],
-            'hope': ['new-beginnings', 'dating-after-divorce', 'success-stories']
-        }
-
-        base_rooms = room_mapping.get(emotion, ['general-support'])
+        base_rooms = list(self.room_mapping.get(emotion, ['general-support']))
 
         # Add cultural context rooms
         if cultural_context == 'indian':
@@ -250,57 +434,16 @@ class DivorceSupportMeTTaEngine:
     def _generate_follow_up_questions(self, emotion: str) -> List[str]:
         """Generate follow-up questions to encourage deeper sharing"""
 
-        follow_ups = {
-            'anger': [
-                "What aspect of the divorce process is making you feel most angry?",
-                "Have you been able to talk to anyone about these feelings?",
-                "What would help you feel more in control right now?"
-            ],
-            'sadness': [
-                "What do you miss most about your relationship?",
-                "What would help you feel supported right now?",
-                "What small step could you take toward healing?"
-            ],
-            'anxiety': [
-                "What specific aspects of the future worry you most?",
-                "What would make you feel more secure during this transition?",
-                "Who in your support network can you reach out to?"
-            ],
-            'guilt': [
-                "What specifically do you feel guilty about?",
-                "Have you considered that both people contribute to relationship challenges?",
-                "What would self-compassion look like for you right now?"
-            ]
-        }
-
-        return follow_ups.get(emotion, ["How are you taking care of yourself during this time?"])
+        return list(self.follow_up_questions.get(emotion, self.default_follow_up_questions))
 
     def _suggest_resources(self, emotion: str, intensity: str) -> List[Dict]:
         """Suggest helpful resources based on emotional state"""
 
-        resources = {
-            'anger': [
-                {"type": "article", "title": "Managing Anger During Divorce", "category": "coping-strategies", "url": "https://www.helpguide.org/articles/relationships-communication/anger-management.htm"},
-                {"type": "audio", "title": "Anger Management Meditation", "category": "self-care", "url": "https://www.mindful.org/mindfulness-meditation-anger/"}
-            ],
-            'sadness': [
-                {"type": "article", "title": "Grieving Your Marriage", "category": "healing", "url": "https://www.divorcemag.com/articles/grieving-your-marriage"},
-                {"type": "support-group", "title": "DivorceCare Support Groups", "category": "community", "url": "https://www.divorcecare.org/"}
-            ],
-            'anxiety': [
-                {"type": "guide", "title": "Divorce Planning Checklist", "category": "practical", "url": "https://www.womansdivorce.com/divorce-planning.html"},
-                {"type": "audio", "title": "Anxiety Relief Techniques", "category": "self-care", "url": "https://www.calm.com/blog/anxiety-relief"}
-            ]
-        }
-
-        base_resources = resources.get(emotion, [])
+        base_resources = list(self.emotion_resources.get(emotion, []))
 
         # Add crisis resources if intensity is high
         if intensity == 'high':
-            base_resources.extend([
-                {"type": "hotline", "title": "National Suicide Prevention Lifeline", "contact": "988", "available": "24/7"},
-                {"type": "hotline", "title": "Crisis Text Line", "contact": "Text HOME to 741741", "available": "24/7"}
-            ])
+            base_resources.extend(self.crisis_hotlines)
 
         return base_resources
 
@@ -326,30 +469,10 @@ class DivorceSupportMeTTaEngine:
     def _create_crisis_response(self, crisis_data: Dict, original_message: str) -> Dict:
         """Create immediate crisis response"""
 
-        crisis_responses = {
-            'suicidal': {
-                'response': "I'm very concerned about you. Please reach out to emergency services or a crisis helpline immediately. You are not alone, and there are people who care deeply about you.",
-                'crisis_level': 'emergency',
-                'escalate_to': 'immediate_human_intervention',
-                'resources': [
-                    {"type": "emergency", "title": "National Suicide Prevention Lifeline", "contact": "988", "available": "24/7"},
-                    {"type": "emergency", "title": "Crisis Text Line", "contact": "Text HOME to 741741", "available": "24/7"},
-                    {"type": "emergency", "title": "Emergency Services", "contact": "911", "available": "24/7"}
-                ]
-            },
-            'self-harm': {
-                'response': "I hear how much pain you're in. Please know that there are people who care and want to help you through this difficult time.",
-                'crisis_level': 'high',
-                'escalate_to': 'crisis_counselor',
-                'resources': [
-                    {"type": "hotline", "title": "National Suicide Prevention Lifeline", "contact": "988", "available": "24/7"},
-                    {"type": "hotline", "title": "Crisis Text Line", "contact": "Text HOME to 741741", "available": "24/7"}
-                ]
-            }
-        }
-
-        response_data = crisis_responses.get(crisis_data['type'], crisis_responses['self-harm'])
+        template = self.crisis_responses.get(crisis_data['type'], self.crisis_responses['self-harm'])
+        response_data = dict(template, resources=list(template['resources']))
         response_data.update({
+            'resource_ids': self.resource_catalog.ids_for(template['resources']),
             'crisis_detected': True,
             'crisis_type': crisis_data['type'],
             'immediate_action': crisis_data['immediate_action'],
@@ -359,6 +482,16 @@ class DivorceSupportMeTTaEngine:
 
         return response_data
 
+# Process-wide engine shared by every integration
+_shared_engine: Optional[DivorceSupportMeTTaEngine] = None
+
+def get_metta_engine() -> DivorceSupportMeTTaEngine:
+    """Return the shared engine, compiling its rule tables on first use"""
+    global _shared_engine
+    if _shared_engine is None:
+        _shared_engine = DivorceSupportMeTTaEngine()
+    return _shared_engine
+
 # Test function for development
 async def test_metta_engine():
     """Test the simplified MeTTa engine with sample messages"""
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Resource Catalog for the Divorce Support Platform
+Interned, content-addressed support resources that responses reference by id
+"""
+
+import hashlib
+import json
+import threading
+from typing import Dict, Iterable, List, Optional
+
+
+def resource_id(resource: Dict) -> str:
+    """Stable id derived from a resource's content, identical in every process"""
+    canonical = json.dumps(resource, sort_keys=True, separators=(",", ":"))
+    return "r_" + hashlib.blake2b(canonical.encode("utf-8"), digest_size=6).hexdigest()
+
+
+class ResourceCatalog:
+    """Versioned table of interned resource dicts
+
+    Each distinct resource is stored once and identified by a hash of its
+    content, so ids agree across the agents, chat API and WebSocket server
+    without coordination. Interned dicts are looked up by identity first;
+    foreign dicts (e.g. from another agent) are hashed and interned on sight.
+    The version changes whenever an entry is added, which lets clients
+    cache the whole catalog and revalidate with an ETag.
+    """
+
+    def __init__(self):
+        self._by_id: Dict[str, Dict] = {}
+        self._id_by_identity: Dict[int, str] = {}
+        self._lock = threading.Lock()
+        self._version: Optional[str] = None
+
+    def __len__(self) -> int:
+        return len(self._by_id)
+
+    def intern(self, resource: Dict) -> Dict:
+        """Return the catalog's shared copy of a resource, adding it if new"""
+
+        known = self._id_by_identity.get(id(resource))
+        if known is not None:
+            return self._by_id[known]
+
+        rid = resource_id(resource)
+        with self._lock:
+            shared = self._by_id.get(rid)
+            if shared is None:
+                shared = self._by_id[rid] = dict(resource)
+                self._id_by_identity[id(shared)] = rid
+                self._version = None
+        return shared
+
+    def intern_all(self, resources: Iterable[Dict]) -> List[Dict]:
+        return [self.intern(resource) for resource in resources]
+
+    def id_of(self, resource: Dict) -> str:
+        """Id of a resource, interning it if the catalog hasn't seen it"""
+
+        known = self._id_by_identity.get(id(resource))
+        if known is not None:
+            return known
+        return self._id_by_identity[id(self.intern(resource))]
+
+    def ids_for(self, resources: Iterable[Dict]) -> List[str]:
+        return [self.id_of(resource) for resource in resources]
+
+    def get(self, rid: str) -> Optional[Dict]:
+        return self._by_id.get(rid)
+
+    @property
+    def version(self) -> str:
+        """Digest of the catalog's ids, recomputed only after it changes"""
+
+        version = self._version
+        if version is None:
+            with self._lock:
+                digest = hashlib.blake2b(digest_size=8)
+                for rid in sorted(self._by_id):
+                    digest.update(rid.encode("ascii"))
+                version = self._version = digest.hexdigest()
+        return version
+
+    @property
+    def etag(self) -> str:
+        return f'"{self.version}"'
+
+    def to_dict(self) -> Dict:
+        """Whole catalog for clients to cache"""
+        return {"version": self.version, "resources": dict(self._by_id)}
+
+
+# Process-wide catalog shared by the engine, chat API and WebSocket server
+_shared_catalog: Optional[ResourceCatalog] = None
+
+def get_resource_catalog() -> ResourceCatalog:
+    """Return the shared resource catalog"""
+    global _shared_catalog
+    if _shared_catalog is None:
+        _shared_catalog = ResourceCatalog()
+    return _shared_catalog
@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+Single-Flight Coalescing for the Divorce Support Platform
+Concurrent callers with the same key share one in-flight call instead of each doing the work
+"""
+
+import asyncio
+from typing import Awaitable, Callable, Dict, Hashable, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """Coalesces concurrent identical calls onto one shared task
+
+    The first caller for a key starts the work as a task; callers arriving
+    while it runs await the same task. The work is shielded, so a caller
+    that is cancelled (e.g. a dropped connection) does not cancel it for
+    the others. Once the task finishes the key is released, so later calls
+    run fresh; caching finished results is left to the caller.
+    """
+
+    def __init__(self):
+        self._in_flight: Dict[Hashable, asyncio.Task] = {}
+        self.stats = {"calls": 0, "executed": 0, "coalesced": 0, "failed": 0}
+
+    async def run(self, key: Hashable, work: Callable[[], Awaitable[T]]) -> T:
+        """Return work()'s result, sharing it with concurrent callers of the same key"""
+
+        self.stats["calls"] += 1
+        task = self._in_flight.get(key)
+        if task is None:
+            self.stats["executed"] += 1
+            task = asyncio.ensure_future(work())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda done: self._release(key, done))
+        else:
+            self.stats["coalesced"] += 1
+
+        return await asyncio.shield(task)
+
+    def _release(self, key: Hashable, task: asyncio.Task):
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+        if task.cancelled() or task.exception() is not None:
+            self.stats["failed"] += 1
+
+    def get_stats(self) -> Dict:
+        return dict(self.stats, in_flight=len(self._in_flight))
@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+Response Cache for the Divorce Support Platform
+Bounded LRU + TTL cache of LLM replies, matched on MeTTa context and near-identical messages
+"""
+
+import hashlib
+import os
+import re
+import time
+from collections import OrderedDict
+from typing import Dict, FrozenSet, Optional, Tuple
+
+# get_metta_context fields that shape the prompt and therefore belong in the key
+CONTEXT_KEY_FIELDS = ("primary_emotion", "intensity", "crisis_level", "cultural_context")
+
+# Crisis replies are always generated fresh
+BYPASS_CRISIS_LEVELS = frozenset(("high", "emergency"))
+
+# Long messages rarely repeat, so fingerprinting and storing them is wasted work
+MAX_CACHED_MESSAGE_CHARS = 1000
+
+# Words that flip a message's meaning; similar messages must agree on all of them
+NEGATIONS = frozenset(("no", "not", "never", "nothing", "nobody", "don't", "can't", "won't", "isn't", "didn't", "cannot"))
+
+_WORD = re.compile(r"[a-z0-9']+")
+
+
+def fingerprint(message: str) -> Tuple[bytes, FrozenSet[str]]:
+    """Digest of the normalized message and its word set"""
+
+    words = [word.strip("'") for word in _WORD.findall(message.lower())]
+    words = [word for word in words if word]
+    digest = hashlib.blake2b(" ".join(words).encode("utf-8"), digest_size=16).digest()
+    return digest, frozenset(words)
+
+
+def similarity(a: FrozenSet[str], b: FrozenSet[str]) -> float:
+    """Jaccard similarity of two word sets"""
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+class ResponseCache:
+    """LRU cache of LLM replies with per-entry expiry and near-duplicate lookup
+
+    Entries are grouped by the MeTTa context tuple. A lookup first tries
+    the exact normalized message, then scans its context group for a
+    message whose word set is at least `threshold` similar and uses the
+    same negations. Each entry remembers how long its LLM call took, so
+    hits report the latency they saved.
+    """
+
+    def __init__(self, max_size: int = None, ttl_seconds: float = None, threshold: float = None):
+        self.max_size = max_size if max_size is not None else int(os.getenv("RESPONSE_CACHE_SIZE", "1024"))
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else float(os.getenv("RESPONSE_CACHE_TTL", "600"))
+        self.threshold = threshold if threshold is not None else float(os.getenv("RESPONSE_CACHE_SIMILARITY", "0.8"))
+
+        # (context, digest) -> (expires_at, words, response, llm_seconds)
+        self._entries: "OrderedDict[Tuple, Tuple[float, FrozenSet[str], str, float]]" = OrderedDict()
+        self._groups: Dict[Tuple, Dict[bytes, FrozenSet[str]]] = {}
+        self.stats = {
+            "exact_hits": 0,
+            "similar_hits": 0,
+            "misses": 0,
+            "evictions": 0,
+            "expirations": 0,
+            "bypassed_crisis": 0,
+            "latency_saved_seconds": 0.0
+        }
+
+    def _context_key(self, context: Dict) -> Optional[Tuple]:
+        context = context or {}
+        if context.get("crisis_level") in BYPASS_CRISIS_LEVELS:
+            self.stats["bypassed_crisis"] += 1
+            return None
+        return tuple(context.get(field) for field in CONTEXT_KEY_FIELDS)
+
+    def get(self, message: str, context: Dict = None) -> Optional[str]:
+        """Return a cached reply for this or a near-identical message, or None"""
+
+        if self.max_size <= 0 or len(message) > MAX_CACHED_MESSAGE_CHARS:
+            return None
+        context_key = self._context_key(context)
+        if context_key is None:
+            return None
+
+        digest, words = fingerprint(message)
+        key = (context_key, digest)
+        entry = self._live_entry(key)
+        if entry is not None:
+            self.stats["exact_hits"] += 1
+            return self._hit(key, entry)
+
+        key = self._find_similar(context_key, words)
+        if key is not None:
+            self.stats["similar_hits"] += 1
+            return self._hit(key, self._entries[key])
+
+        self.stats["misses"] += 1
+        return None
+
+    def put(self, message: str, context: Dict, response: str, llm_seconds: float = 0.0):
+        """Store a reply and how long the LLM took to produce it"""
+
+        if self.max_size <= 0 or len(message) > MAX_CACHED_MESSAGE_CHARS:
+            return
+        context_key = self._context_key(context)
+        if context_key is None:
+            return
+
+        digest, words = fingerprint(message)
+        key = (context_key, digest)
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, words, response, llm_seconds)
+        self._entries.move_to_end(key)
+        self._groups.setdefault(context_key, {})[digest] = words
+
+        while len(self._entries) > self.max_size:
+            oldest, _ = self._entries.popitem(last=False)
+            self._forget(oldest)
+            self.stats["evictions"] += 1
+
+    def _live_entry(self, key: Tuple):
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] <= time.monotonic():
+            del self._entries[key]
+            self._forget(key)
+            self.stats["expirations"] += 1
+            return None
+        return entry
+
+    def _find_similar(self, context_key: Tuple, words: FrozenSet[str]) -> Optional[Tuple]:
+        """Most similar live message in the same context group, if above threshold"""
+
+        group = self._groups.get(context_key)
+        if not group or not words:
+            return None
+
+        negations = words & NEGATIONS
+        best_key, best_score = None, self.threshold
+        for digest, candidate in list(group.items()):
+            # Jaccard can't reach the threshold when the sizes differ too much
+            if min(len(words), len(candidate)) < best_score * max(len(words), len(candidate)):
+                continue
+            if candidate & NEGATIONS != negations:
+                continue
+            score = similarity(words, candidate)
+            if score >= best_score and self._live_entry((context_key, digest)) is not None:
+                best_key, best_score = (context_key, digest), score
+        return best_key
+
+    def _hit(self, key: Tuple, entry) -> str:
+        self._entries.move_to_end(key)
+        self.stats["latency_saved_seconds"] += entry[3]
+        return entry[2]
+
+    def _forget(self, key: Tuple):
+        context_key, digest = key
+        group = self._groups.get(context_key)
+        if group is not None:
+            group.pop(digest, None)
+            if not group:
+                del self._groups[context_key]
+
+    def clear(self):
+        self._entries.clear()
+        self._groups.clear()
+
+    def get_stats(self) -> Dict:
+        """Cache counters, LLM calls avoided and latency saved"""
+
+        hits = self.stats["exact_hits"] + self.stats["similar_hits"]
+        lookups = hits + self.stats["misses"]
+        return dict(
+            self.stats,
+            latency_saved_seconds=round(self.stats["latency_saved_seconds"], 3),
+            llm_calls_avoided=hits,
+            hit_rate=round(hits / lookups, 3) if lookups else 0.0,
+            size=len(self._entries),
+            max_size=self.max_size,
+            ttl_seconds=self.ttl_seconds,
+            similarity_threshold=self.threshold
+        )
+
+
+# Process-wide cache shared by every LLMIntegration
+_response_cache: Optional[ResponseCache] = None
+
+def get_response_cache() -> ResponseCache:
+    """Return the shared response cache, configured from the environment"""
+    global _response_cache
+    if _response_cache is None:
+        _response_cache = ResponseCache()
+    return _response_cache
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Room Catalog for the Divorce Support Platform
+Immutable room definitions shared by the WebSocket server, chat API and room matcher
+"""
+
+import hashlib
+import json
+from dataclasses import asdict, dataclass
+from types import MappingProxyType
+from typing import Dict, List, Mapping, Optional, Tuple
+
+@dataclass(frozen=True)
+class RoomSpec:
+    id: str
+    name: str
+    description: str
+    max_users: int
+    category: str
+    requires_verification: bool = False
+    ai_moderated: bool = True
+    human_moderated: bool = False
+    priority: str = "medium"
+
+ROOM_SPECS = (
+    # Crisis & Emergency Support
+    RoomSpec("crisis-intervention", "Crisis Intervention", "24/7 emergency emotional support with human counselors",
+             max_users=10, category="crisis", human_moderated=True, priority="emergency"),
+
+    # General Support Rooms
+    RoomSpec("general-support", "General Support", "Open space for relationship discussions and general support",
+             max_users=50, category="general", priority="low"),
+    RoomSpec("emotional-support", "Emotional Support", "Focused emotional support and coping strategies",
+             max_users=40, category="emotional", priority="low"),
+    RoomSpec("post-divorce-recovery", "Post-Divorce Recovery", "Support for life after divorce and rebuilding",
+             max_users=30, category="recovery", requires_verification=True),
+    RoomSpec("co-parenting-support", "Co-Parenting Support", "Managing relationships and co-parenting after divorce",
+             max_users=25, category="parenting", requires_verification=True),
+
+    # Professional & Specialized Rooms
+    RoomSpec("legal-consultation", "Legal Consultation", "Anonymous legal advice and consultation",
+             max_users=20, category="legal", requires_verification=True, human_moderated=True, priority="high"),
+    RoomSpec("financial-recovery", "Financial Recovery", "Post-divorce financial planning and recovery",
+             max_users=35, category="professional"),
+
+    # Demographic-Specific Rooms
+    RoomSpec("womens-support", "Women's Support", "Female-focused emotional support and empowerment",
+             max_users=35, category="demographic", requires_verification=True),
+    RoomSpec("mens-support", "Men's Support", "Male-focused mental health and relationship support",
+             max_users=35, category="demographic", requires_verification=True),
+
+    # Cultural & Specialized Rooms
+    RoomSpec("cultural-support", "Cultural Support", "Culturally sensitive support for diverse backgrounds",
+             max_users=30, category="cultural"),
+    RoomSpec("family-mediation", "Family Mediation", "Family conflict resolution and mediation support",
+             max_users=20, category="cultural", requires_verification=True, human_moderated=True, priority="high"),
+
+    # Recovery & Growth Rooms
+    RoomSpec("anger-management", "Anger Management", "Coping strategies and anger management techniques",
+             max_users=20, category="recovery"),
+    RoomSpec("new-beginnings", "New Beginnings", "Planning for life after divorce and new beginnings",
+             max_users=25, category="recovery", priority="low")
+)
+
+# Capacity and category for rooms created on the fly by clients
+DEFAULT_MAX_USERS = 50
+DEFAULT_CATEGORY = "general"
+
+
+class RoomCatalog:
+    """Room definitions loaded once and indexed by id and category
+
+    Specs and their serialized forms are built at import and never change,
+    so lookups allocate nothing; only the live user_count is filled in per
+    request, from whatever membership the caller holds.
+    """
+
+    def __init__(self, specs: Tuple[RoomSpec, ...] = ROOM_SPECS):
+        self.specs = specs
+        self.by_id: Mapping[str, RoomSpec] = MappingProxyType({spec.id: spec for spec in specs})
+
+        by_category: Dict[str, List[RoomSpec]] = {}
+        for spec in specs:
+            by_category.setdefault(spec.category, []).append(spec)
+        self.by_category: Mapping[str, Tuple[RoomSpec, ...]] = MappingProxyType(
+            {category: tuple(members) for category, members in by_category.items()}
+        )
+
+        self._room_dicts: Mapping[str, Mapping] = MappingProxyType(
+            {spec.id: MappingProxyType(asdict(spec)) for spec in specs}
+        )
+        canonical = json.dumps([asdict(spec) for spec in specs], sort_keys=True)
+        self.version = hashlib.blake2b(canonical.encode("utf-8"), digest_size=8).hexdigest()
+
+    def __contains__(self, room_id: str) -> bool:
+        return room_id in self.by_id
+
+    def get(self, room_id: str) -> Optional[RoomSpec]:
+        return self.by_id.get(room_id)
+
+    def max_users(self, room_id: str) -> int:
+        spec = self.by_id.get(room_id)
+        return spec.max_users if spec else DEFAULT_MAX_USERS
+
+    def requirements(self, room_id: str) -> Mapping:
+        """Read-only definition of a catalog room, empty for unknown rooms"""
+        return self._room_dicts.get(room_id, MappingProxyType({}))
+
+    def describe(self, room_id: str, user_count: int = 0) -> Dict:
+        """Room info with a live user count; ad-hoc rooms get a generated entry"""
+
+        room = self._room_dicts.get(room_id)
+        if room is None:
+            return {
+                "id": room_id,
+                "name": room_id.replace("_", " ").title(),
+                "description": f"Support room for {room_id.replace('_', ' ')}",
+                "user_count": user_count,
+                "max_users": DEFAULT_MAX_USERS,
+                "category": DEFAULT_CATEGORY
+            }
+        return dict(room, user_count=user_count)
+
+    def listing(self, occupancy: Mapping[str, int]) -> List[Dict]:
+        """Every catalog room with its current user count"""
+        return [self.describe(spec.id, occupancy.get(spec.id, 0)) for spec in self.specs]
+
+    def etag(self, occupancy: Mapping[str, int]) -> str:
+        """Validator covering both the definitions and the live counts"""
+
+        counts = ",".join(f"{spec.id}={occupancy.get(spec.id, 0)}" for spec in self.specs)
+        digest = hashlib.blake2b(f"{self.version}|{counts}".encode("utf-8"), digest_size=8).hexdigest()
+        return f'"{digest}"'
+
+
+# Process-wide catalog
+room_catalog = RoomCatalog()
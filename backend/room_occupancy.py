@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Room Occupancy for the Divorce Support Platform
+Live members and short-lived reservations per room with O(1) capacity checks
+"""
+
+import heapq
+import os
+import time
+from typing import Callable, Dict, Iterable, List, Mapping, Optional, Set, Tuple
+
+# Seconds a matched user's seat is held before they join
+RESERVATION_TTL = float(os.getenv("ROOM_RESERVATION_TTL", "120"))
+
+
+class OccupancyIndex:
+    """Members and reservations per room, fed by join/leave/disconnect events
+
+    A room's occupancy is its member count plus its live reservations, both
+    kept as counters, so a capacity check is O(1) and matching costs only
+    the length of the candidate list. Reservations are held for users who
+    were matched to a room but have not joined yet; joining converts one,
+    and unclaimed ones lapse through a lazy expiry heap.
+    """
+
+    def __init__(self, reservation_ttl: float = RESERVATION_TTL):
+        self.reservation_ttl = reservation_ttl
+
+        self._members: Dict[str, Set[str]] = {}
+        self._session_room: Dict[str, str] = {}
+        self._session_worker: Dict[str, str] = {}
+
+        # session_id -> (room_id, expires_at); counts per room for O(1) lookups
+        self._reservations: Dict[str, Tuple[str, float]] = {}
+        self._reserved: Dict[str, int] = {}
+        self._expiry: List[Tuple[float, str]] = []
+
+        self.stats = {"joins": 0, "leaves": 0, "reservations": 0, "claimed": 0, "expired": 0, "syncs": 0}
+
+    def occupancy(self, room_id: str) -> int:
+        """Members plus live reservations"""
+        self.expire()
+        return len(self._members.get(room_id, ())) + self._reserved.get(room_id, 0)
+
+    def members(self, room_id: str) -> int:
+        return len(self._members.get(room_id, ()))
+
+    def join(self, session_id: str, room_id: str, worker_id: str = None):
+        """Record a session entering a room, claiming its reservation"""
+
+        self._drop_membership(session_id)
+        if self._drop_reservation(session_id):
+            self.stats["claimed"] += 1
+
+        self._members.setdefault(room_id, set()).add(session_id)
+        self._session_room[session_id] = room_id
+        if worker_id is not None:
+            self._session_worker[session_id] = worker_id
+        self.stats["joins"] += 1
+
+    def leave(self, session_id: str):
+        """Record a session leaving its room or disconnecting"""
+        if self._drop_membership(session_id):
+            self.stats["leaves"] += 1
+
+    def sync(self, worker_id: str, members: Mapping[str, str]):
+        """Replace everything known about one worker's sessions with its snapshot
+
+        Used after the event stream from that worker was interrupted, so
+        missed leaves cannot leave phantom members behind.
+        """
+
+        stale = [session_id for session_id, owner in self._session_worker.items() if owner == worker_id]
+        for session_id in stale:
+            self._drop_membership(session_id)
+        for session_id, room_id in members.items():
+            self.join(session_id, room_id, worker_id)
+        self.stats["syncs"] += 1
+
+    def reserve(self, session_id: str, room_id: str, now: float = None):
+        """Hold a seat for a matched session until it joins or the hold lapses"""
+
+        if self._session_room.get(session_id) == room_id:
+            return  # Already inside
+
+        now = time.monotonic() if now is None else now
+        self._drop_reservation(session_id)
+
+        expires_at = now + self.reservation_ttl
+        self._reservations[session_id] = (room_id, expires_at)
+        self._reserved[room_id] = self._reserved.get(room_id, 0) + 1
+        heapq.heappush(self._expiry, (expires_at, session_id))
+        self.stats["reservations"] += 1
+
+    def partition(self, candidates: Iterable[str], capacity: Callable[[str], Optional[int]]) -> Tuple[List[str], List[str]]:
+        """Split candidate rooms into (has room, full) in one pass
+
+        capacity returns a room's limit, or None for rooms that don't exist;
+        those are skipped.
+        """
+
+        self.expire()
+        available, full = [], []
+        seen = set()
+        for room_id in candidates:
+            if room_id in seen:
+                continue
+            seen.add(room_id)
+
+            limit = capacity(room_id)
+            if limit is None:
+                continue
+            occupied = len(self._members.get(room_id, ())) + self._reserved.get(room_id, 0)
+            (available if occupied < limit else full).append(room_id)
+
+        return available, full
+
+    def expire(self, now: float = None):
+        """Release reservations whose hold has lapsed"""
+
+        now = time.monotonic() if now is None else now
+        while self._expiry and self._expiry[0][0] <= now:
+            expires_at, session_id = heapq.heappop(self._expiry)
+
+            # Entries replaced or claimed since they were pushed are skipped
+            reservation = self._reservations.get(session_id)
+            if reservation is not None and reservation[1] == expires_at:
+                self._drop_reservation(session_id)
+                self.stats["expired"] += 1
+
+    def _drop_membership(self, session_id: str) -> bool:
+        room_id = self._session_room.pop(session_id, None)
+        self._session_worker.pop(session_id, None)
+        if room_id is None:
+            return False
+
+        members = self._members.get(room_id)
+        if members is not None:
+            members.discard(session_id)
+            if not members:
+                del self._members[room_id]
+        return True
+
+    def _drop_reservation(self, session_id: str) -> bool:
+        reservation = self._reservations.pop(session_id, None)
+        if reservation is None:
+            return False
+
+        room_id = reservation[0]
+        remaining = self._reserved[room_id] - 1
+        if remaining:
+            self._reserved[room_id] = remaining
+        else:
+            del self._reserved[room_id]
+        return True
+
+    def snapshot(self) -> Dict:
+        """Per-room counts and counters for health checks"""
+        self.expire()
+        rooms = set(self._members) | set(self._reserved)
+        return {
+            "rooms": {
+                room_id: {"members": len(self._members.get(room_id, ())), "reserved": self._reserved.get(room_id, 0)}
+                for room_id in rooms
+            },
+            "total_members": len(self._session_room),
+            "total_reserved": len(self._reservations),
+            **self.stats
+        }
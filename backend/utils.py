@@ -6,12 +6,19 @@ LLM integration and query processing following competition template
 
 import asyncio
 import json
+import os
 import re
-from typing import Dict, List, Tuple, Optional
+import time
+from typing import AsyncIterator, Dict, List, Tuple, Optional
 import logging
-import requests
 from datetime import datetime
 
+from circuit_breaker import CircuitBreaker
+from llm_client import LLMClientError, get_llm_client
+from metta.analysis_executor import get_analysis_executor
+from metta.single_flight import SingleFlight
+from response_cache import ResponseCache, get_response_cache
+
 logger = logging.getLogger(__name__)
 
 class DivorceRAG:
@@ -106,48 +113,82 @@ class DivorceRAG:
             logger.error(f"❌ Failed to add knowledge: {e}")
             return False
 
+# Appended to every LLM reply given at the emergency crisis level
+EMERGENCY_NOTICE = "\n\n🚨 Please contact emergency services immediately if you're in danger."
+
+# Reply used when neither the LLM nor the rule-based engine can answer
+TECHNICAL_DIFFICULTIES_REPLY = "I'm experiencing technical difficulties. Please try again in a moment."
+
+# Seconds an LLM call may take, retries included, before the rule-based reply is used
+LLM_RESPONSE_DEADLINE = float(os.getenv("LLM_RESPONSE_DEADLINE", "10"))
+
+# Identical prompts in flight at the same time share one LLM call
+_prompt_flights = SingleFlight()
+
+# Stops calling ASI:One while it is failing or slow; configured by LLM_BREAKER_* variables
+_llm_breaker = CircuitBreaker(prefix="LLM_BREAKER")
+
 class LLMIntegration:
     """
     LLM integration for enhanced responses
     Following competition template patterns
     """
 
-    def __init__(self):
-        self.api_key = os.getenv("ASI_ONE_API_KEY", "")
-        self.endpoint = "https://api.asi1.ai/v1/chat/completions"
+    def __init__(self, cache: ResponseCache = None):
+        # One pooled client per process; connections are reused across calls
+        self.client = get_llm_client()
 
-    async def generate_response(self, prompt: str, context: Dict = None) -> str:
-        """Generate LLM response with context"""
-        try:
-            # Enhanced prompt with MeTTa context
-            system_prompt = f"""
-            You are an AI emotional support companion for people going through divorce.
-            You provide empathetic, supportive responses using this context:
+        # Replies to recent near-identical prompts are reused instead of regenerated
+        self.cache = cache or get_response_cache()
+        self.in_flight = _prompt_flights
+
+        # While the breaker is open, replies come from the MeTTa engine without waiting
+        self.breaker = _llm_breaker
+        self.deadline = LLM_RESPONSE_DEADLINE
+        self.stats = {"local_fallbacks": 0}
+
+    def build_messages(self, prompt: str, context: Dict = None) -> List[Dict]:
+        """Chat messages for a user prompt with its MeTTa context"""
+
+        context = context or {}
+
+        # Enhanced prompt with MeTTa context
+        system_prompt = f"""
+        You are an AI emotional support companion for people going through divorce.
+        You provide empathetic, supportive responses using this context:
 
-            Primary Emotion: {context.get('primary_emotion', 'neutral')}
-            Intensity: {context.get('intensity', 'low')}
-            Crisis Level: {context.get('crisis_level', 'low')}
-            Cultural Context: {context.get('cultural_context', 'none')}
+        Primary Emotion: {context.get('primary_emotion', 'neutral')}
+        Intensity: {context.get('intensity', 'low')}
+        Crisis Level: {context.get('crisis_level', 'low')}
+        Cultural Context: {context.get('cultural_context', 'none')}
 
-            Response Guidelines:
-            - Be empathetic and validating
-            - Provide practical support when appropriate
-            - Include relevant resources if needed
-            - Adapt tone to emotional intensity
-            - Be culturally sensitive
+        Response Guidelines:
+        - Be empathetic and validating
+        - Provide practical support when appropriate
+        - Include relevant resources if needed
+        - Adapt tone to emotional intensity
+        - Be culturally sensitive
 
-            Keep responses supportive, helpful, and focused on emotional wellbeing.
-            """
+        Keep responses supportive, helpful, and focused on emotional wellbeing.
+        """
 
-            messages = [
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": prompt}
-            ]
+        return [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": prompt}
+        ]
 
-            response = await self._call_asi_api(messages)
+    async def generate_response(self, prompt: str, context: Dict = None) -> str:
+        """Generate LLM response with context"""
+        try:
+            context = context or {}
+            response = self.cache.get(prompt, context)
+            if response is None:
+                messages = self.build_messages(prompt, context)
+                key = tuple(message["content"] for message in messages)
+                response = await self.in_flight.run(key, lambda: self._generate_and_cache(prompt, context, messages))
 
             if context.get('crisis_level') == 'emergency':
-                response += "\n\n🚨 Please contact emergency services immediately if you're in danger."
+                response += EMERGENCY_NOTICE
 
             return response
 
@@ -155,34 +196,91 @@ class LLMIntegration:
             logger.error(f"❌ LLM response generation failed: {e}")
             return "I'm here to support you. Please share how you're feeling."
 
-    async def _call_asi_api(self, messages: List[Dict]) -> str:
-        """Call ASI:One API"""
+    async def _generate_and_cache(self, prompt: str, context: Dict, messages: List[Dict]) -> str:
+        started = time.perf_counter()
+        response = await self._call_asi_api(messages)
+        if response is None:
+            return await self.local_response(prompt)
+
+        self.cache.put(prompt, context, response, time.perf_counter() - started)
+        return response
+
+    async def stream_response(self, prompt: str, context: Dict = None) -> AsyncIterator[str]:
+        """Generate LLM response with context, yielding text as it is produced
+
+        If the circuit is open, or the stream fails, ends or misses the
+        deadline before any text arrives, the rule-based reply is yielded instead; a stream cut off midway just
+        ends, keeping what was already delivered.
+        """
+
+        context = context or {}
+        cached = self.cache.get(prompt, context)
+        if cached is not None:
+            yield cached
+        elif not self.breaker.allow():
+            yield await self.local_response(prompt)
+        else:
+            stream = self.client.stream_chat_completion(self.build_messages(prompt, context))
+            started = time.perf_counter()
+            parts = []
+            try:
+                parts.append(await asyncio.wait_for(stream.__anext__(), self.deadline))
+                self.breaker.record_success(time.perf_counter() - started)
+                yield parts[0]
+
+                async for chunk in stream:
+                    parts.append(chunk)
+                    yield chunk
+                self.cache.put(prompt, context, "".join(parts), time.perf_counter() - started)
+
+            except (LLMClientError, asyncio.TimeoutError, StopAsyncIteration) as e:
+                # A stream that ends before any text is as useless as one that fails
+                logger.error(f"❌ ASI API stream failed: {e!r}")
+                if not parts:
+                    self.breaker.record_failure(time.perf_counter() - started)
+                    yield await self.local_response(prompt)
+
+            finally:
+                await stream.aclose()
+
+        if context.get('crisis_level') == 'emergency':
+            yield EMERGENCY_NOTICE
+
+    async def _call_asi_api(self, messages: List[Dict]) -> Optional[str]:
+        """Call ASI:One API without blocking the event loop
+
+        Returns None when the circuit is open or the call fails or misses
+        the deadline; every outcome feeds the circuit breaker.
+        """
+
+        if not self.breaker.allow():
+            return None
+
+        started = time.perf_counter()
         try:
-            response = requests.post(
-                self.endpoint,
-                headers={
-                    "Authorization": f"Bearer {self.api_key}",
-                    "Content-Type": "application/json"
-                },
-                json={
-                    "model": "asi1-mini",
-                    "messages": messages,
-                    "max_tokens": 500,
-                    "temperature": 0.7
-                },
-                timeout=10
-            )
+            response = await asyncio.wait_for(self.client.chat_completion(messages), self.deadline)
+        except (LLMClientError, asyncio.TimeoutError) as e:
+            self.breaker.record_failure(time.perf_counter() - started)
+            logger.error(f"❌ ASI API call failed: {e!r}")
+            return None
+
+        self.breaker.record_success(time.perf_counter() - started)
+        return response
 
-            if response.status_code == 200:
-                result = response.json()
-                return result["choices"][0]["message"]["content"]
-            else:
-                logger.error(f"❌ ASI API error: {response.status_code}")
-                return "I'm having trouble connecting. Please try again."
+    async def local_response(self, prompt: str) -> str:
+        """Rule-based reply from the MeTTa engine, used when the LLM can't answer"""
 
+        self.stats["local_fallbacks"] += 1
+        try:
+            analysis = await get_analysis_executor().analyze(prompt)
+            return analysis["response"]
         except Exception as e:
-            logger.error(f"❌ ASI API call failed: {e}")
-            return "I'm experiencing technical difficulties. Please try again in a moment."
+            logger.error(f"❌ Rule-based fallback failed: {e}")
+            return TECHNICAL_DIFFICULTIES_REPLY
+
+    def get_circuit_stats(self) -> Dict:
+        """Breaker state and how often the rule-based reply stood in"""
+        return dict(self.breaker.get_stats(), local_fallbacks=self.stats["local_fallbacks"])
 
 def get_intent_and_keyword(query: str, metta_instance) -> Tuple[str, List[str]]:
     """
@@ -255,6 +353,22 @@ async def process_query(query: str, rag: DivorceRAG, llm: LLMIntegration) -> str
         logger.error(f"❌ Query processing failed: {e}")
         return "I'm here to support you. Please share how you're feeling."
 
+async def stream_query(query: str, rag: DivorceRAG, llm: LLMIntegration) -> AsyncIterator[str]:
+    """Streaming counterpart of process_query; yields the response as it is generated"""
+
+    metta_context = await get_metta_context(query, rag.metta)
+    async for chunk in llm.stream_response(query, metta_context):
+        yield chunk
+
+def llm_context(analysis: Dict) -> Dict:
+    """LLM prompt context from a MeTTa engine analysis result"""
+    return {
+        "primary_emotion": analysis.get("primary_emotion", "neutral"),
+        "intensity": analysis.get("intensity", "low"),
+        "crisis_level": analysis.get("crisis_level", "low"),
+        "cultural_context": analysis.get("cultural_context") or "none"
+    }
+
 async def get_metta_context(query: str, metta_instance) -> Dict:
     """Get MeTTa analysis context for the query"""
     try:
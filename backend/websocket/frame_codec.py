@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Frame Codecs for the Divorce Support WebSocket Server
+JSON text frames by default, MessagePack binary frames with short keys when negotiated
+"""
+
+import json
+import time
+from typing import Dict, Optional, Union
+
+try:
+    import msgpack
+except ImportError:  # Compact encoding is optional
+    msgpack = None
+
+# Subprotocol names offered at the handshake
+JSON_SUBPROTOCOL = "divisafe.json.v1"
+MSGPACK_SUBPROTOCOL = "divisafe.msgpack.v1"
+
+# Long field name -> short key used on compact frames; unknown keys pass through unchanged
+SHORT_KEYS = {
+    "type": "t",
+    "message": "m",
+    "id": "i",
+    "session_id": "s",
+    "anonymous_id": "a",
+    "content": "c",
+    "room_id": "r",
+    "timestamp": "ts",
+    "sender": "sn",
+    "resources": "rs",
+    "room_suggestions": "rg",
+    "crisis_alert": "ca",
+    "follow_up_questions": "fq",
+    "emergency_resources": "er",
+    "title": "ti",
+    "url": "u",
+    "contact": "ct",
+    "available": "av",
+    "category": "cg",
+    "description": "d",
+    "name": "n",
+    "user_count": "uc",
+    "max_users": "mu",
+    "messages": "ms",
+    "old_room": "or",
+    "new_room": "nr",
+    "room": "ro",
+    "seq": "q",
+    "resume_token": "rk",
+    "delta": "dl",
+    "index": "ix"
+}
+LONG_KEYS = {short: long for long, short in SHORT_KEYS.items()}
+
+
+def _rename_keys(value, table: Dict[str, str]):
+    """Recursively rename dict keys through a lookup table"""
+    if isinstance(value, dict):
+        return {table.get(key, key): _rename_keys(item, table) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_rename_keys(item, table) for item in value]
+    return value
+
+
+class FrameCodec:
+    """Encodes outgoing and decodes incoming frames for one wire format
+
+    Keeps per-codec totals of encoded bytes and encode CPU time so the
+    formats can be compared per message.
+    """
+
+    name = "json"
+    subprotocol = JSON_SUBPROTOCOL
+
+    def __init__(self):
+        self.stats = {"messages": 0, "bytes": 0, "encode_seconds": 0.0}
+
+    def encode(self, message: Dict) -> Union[str, bytes]:
+        started = time.process_time()
+        frame = self._encode(message)
+        self.stats["encode_seconds"] += time.process_time() - started
+        self.stats["messages"] += 1
+        self.stats["bytes"] += len(frame)
+        return frame
+
+    def _encode(self, message: Dict) -> Union[str, bytes]:
+        return json.dumps(message, separators=(",", ":"))
+
+    def decode(self, frame: Union[str, bytes]) -> Dict:
+        """Decode a client frame; raises ValueError on malformed input"""
+        return json.loads(frame)
+
+    def get_stats(self) -> Dict:
+        messages = self.stats["messages"]
+        return {
+            "messages": messages,
+            "bytes": self.stats["bytes"],
+            "bytes_per_message": round(self.stats["bytes"] / messages, 1) if messages else 0.0,
+            "cpu_us_per_message": round(self.stats["encode_seconds"] * 1e6 / messages, 2) if messages else 0.0
+        }
+
+
+class MsgpackFrameCodec(FrameCodec):
+    """MessagePack binary frames with short field keys"""
+
+    name = "msgpack"
+    subprotocol = MSGPACK_SUBPROTOCOL
+
+    def _encode(self, message: Dict) -> bytes:
+        return msgpack.packb(_rename_keys(message, SHORT_KEYS), use_bin_type=True)
+
+    def decode(self, frame: Union[str, bytes]) -> Dict:
+        if isinstance(frame, str):
+            # Clients may still send text frames on a compact connection
+            return json.loads(frame)
+        try:
+            return _rename_keys(msgpack.unpackb(frame, raw=False), LONG_KEYS)
+        except Exception as e:
+            raise ValueError(f"Invalid MessagePack frame: {e}") from e
+
+
+class CodecRegistry:
+    """The codecs this server offers, keyed by subprotocol"""
+
+    def __init__(self):
+        self.default = FrameCodec()
+        self.by_subprotocol: Dict[str, FrameCodec] = {JSON_SUBPROTOCOL: self.default}
+        if msgpack is not None:
+            compact = MsgpackFrameCodec()
+            self.by_subprotocol[MSGPACK_SUBPROTOCOL] = compact
+
+    @property
+    def subprotocols(self):
+        """Subprotocols in server preference order, compact first"""
+        return sorted(self.by_subprotocol, key=lambda name: name != MSGPACK_SUBPROTOCOL)
+
+    def for_subprotocol(self, subprotocol: Optional[str]) -> FrameCodec:
+        """Codec for a negotiated subprotocol; JSON when none was agreed"""
+        return self.by_subprotocol.get(subprotocol, self.default)
+
+    def get_stats(self) -> Dict:
+        return {codec.name: codec.get_stats() for codec in self.by_subprotocol.values()}
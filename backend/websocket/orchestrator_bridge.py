@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""
+Orchestrator Bridge for the Divorce Support WebSocket Server
+Submits support requests to the orchestrator agent and receives compiled responses by push
+"""
+
+import asyncio
+import json
+import os
+import random
+import logging
+import uuid
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, Optional
+
+from metta.analysis_executor import get_analysis_executor
+
+logger = logging.getLogger(__name__)
+
+# Where the orchestrator's bridge listener accepts connections
+ORCHESTRATOR_BRIDGE_HOST = os.getenv("ORCHESTRATOR_BRIDGE_HOST", "localhost")
+ORCHESTRATOR_BRIDGE_PORT = int(os.getenv("ORCHESTRATOR_BRIDGE_PORT", "8010"))
+
+# The orchestrator answers every request by this deadline, with its own timeout reply if need be
+ORCHESTRATOR_SESSION_TIMEOUT = float(os.getenv("ORCHESTRATOR_SESSION_TIMEOUT", "30.0"))
+
+# Seconds to wait for the compiled response before answering from the local analyzer;
+# never shorter than the orchestrator's deadline, so no request is given up while still owed a reply
+BRIDGE_RESPONSE_TIMEOUT = max(
+    float(os.getenv("ORCHESTRATOR_BRIDGE_TIMEOUT", str(ORCHESTRATOR_SESSION_TIMEOUT + 2.0))),
+    ORCHESTRATOR_SESSION_TIMEOUT
+)
+
+# Reconnect backoff bounds in seconds; doubles per failed attempt with jitter
+BRIDGE_RECONNECT_MIN = 0.5
+BRIDGE_RECONNECT_MAX = 30.0
+
+# Largest encoded bridge message accepted
+BRIDGE_MAX_MESSAGE_BYTES = 4 * 1024 * 1024
+
+PushHandler = Callable[[Dict], Awaitable[None]]
+ConnectHandler = Callable[[], Awaitable[None]]
+
+
+class OrchestratorBridge:
+    """Persistent connection to the orchestrator agent
+
+    Requests and responses are newline-delimited JSON on one TCP stream.
+    Every request gets its own request id, which the orchestrator carries
+    through its agents and back on the final response; a response whose id
+    has no waiter (e.g. it arrived after the waiter gave up) is dropped, so
+    it can never answer a later message from the same session. When the
+    orchestrator is unreachable, answers with a timeout, or misses the
+    deadline, the request is answered by the in-process analyzer instead,
+    so a reply never waits on agents that are down.
+    """
+
+    def __init__(self, host: str = ORCHESTRATOR_BRIDGE_HOST, port: int = ORCHESTRATOR_BRIDGE_PORT,
+                 response_timeout: float = BRIDGE_RESPONSE_TIMEOUT):
+        self.host = host
+        self.port = port
+        self.response_timeout = response_timeout
+
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._connector: Optional[asyncio.Task] = None
+        self._waiters: Dict[str, asyncio.Future] = {}
+        self._on_push: Optional[PushHandler] = None
+        self._on_connect: Optional[ConnectHandler] = None
+        self.stats = {
+            "submitted": 0,
+            "orchestrated": 0,
+            "fallback_unavailable": 0,
+            "fallback_timeout": 0,
+            "late_responses": 0,
+            "pushes": 0,
+            "notifications": 0,
+            "reconnects": 0
+        }
+
+    @property
+    def connected(self) -> bool:
+        return self._writer is not None and not self._writer.is_closing()
+
+    def start(self, on_push: PushHandler = None, on_connect: ConnectHandler = None):
+        """Start maintaining the connection
+
+        on_push receives unsolicited messages; on_connect runs after every
+        (re)connect, e.g. to resend state the orchestrator may have missed.
+        """
+        self._on_push = on_push
+        self._on_connect = on_connect
+        if self._connector is None:
+            self._connector = asyncio.create_task(self._maintain_connection())
+
+    async def _maintain_connection(self):
+        """Connect, read pushes until the stream ends, and reconnect with backoff"""
+
+        delay = BRIDGE_RECONNECT_MIN
+        while True:
+            try:
+                reader, self._writer = await asyncio.open_connection(
+                    self.host, self.port, limit=BRIDGE_MAX_MESSAGE_BYTES
+                )
+                logger.info(f"🌉 Connected to orchestrator bridge at {self.host}:{self.port}")
+                delay = BRIDGE_RECONNECT_MIN
+                if self._on_connect is not None:
+                    await self._on_connect()
+                await self._read_pushes(reader)
+            except (OSError, asyncio.IncompleteReadError, ValueError) as e:
+                logger.debug(f"Orchestrator bridge unavailable: {e}")
+            finally:
+                self._disconnected()
+
+            self.stats["reconnects"] += 1
+            await asyncio.sleep(delay * random.uniform(0.5, 1.5))
+            delay = min(delay * 2, BRIDGE_RECONNECT_MAX)
+
+    async def _read_pushes(self, reader: asyncio.StreamReader):
+        while True:
+            line = await reader.readline()
+            if not line:
+                logger.warning("🌉 Orchestrator bridge closed the connection")
+                return
+            await self._dispatch(json.loads(line))
+
+    async def _dispatch(self, message: Dict):
+        """Resolve the waiting request for a response, or hand other pushes on"""
+
+        self.stats["pushes"] += 1
+        if message.get("type") == "final_response":
+            response = message["response"]
+            waiter = self._waiters.pop(response.get("request_id"), None)
+            if waiter is None or waiter.done():
+                self.stats["late_responses"] += 1
+                logger.debug(f"Dropping orchestrator response with no waiter: {response.get('request_id')}")
+                return
+            waiter.set_result(response)
+        elif self._on_push is not None:
+            try:
+                await self._on_push(message)
+            except Exception as e:
+                logger.error(f"Error handling orchestrator push: {e}")
+
+    def _disconnected(self):
+        """Drop the stream and release every waiter to the fallback path"""
+
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+        for waiter in self._waiters.values():
+            if not waiter.done():
+                waiter.set_result(None)
+        self._waiters.clear()
+
+    def notify(self, message: Dict) -> bool:
+        """Send a one-way message if connected; returns False when it was not sent"""
+
+        if not self.connected:
+            return False
+
+        self._writer.write(json.dumps(message).encode() + b"\n")
+        self.stats["notifications"] += 1
+        return True
+
+    async def request(self, support_request: Dict) -> Dict:
+        """Submit a support request and return the compiled response"""
+
+        self.stats["submitted"] += 1
+        request_id = support_request.get("request_id") or uuid.uuid4().hex
+        support_request = dict(support_request, request_id=request_id)
+
+        if not self.connected:
+            self.stats["fallback_unavailable"] += 1
+            return await self.local_response(support_request)
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters[request_id] = waiter
+
+        try:
+            self._writer.write(json.dumps({"type": "support_request", "request": support_request}).encode() + b"\n")
+            await self._writer.drain()
+            response = await asyncio.wait_for(waiter, timeout=self.response_timeout)
+        except (OSError, asyncio.TimeoutError):
+            response = None
+        finally:
+            if self._waiters.get(request_id) is waiter:
+                del self._waiters[request_id]
+
+        # The orchestrator's own timeout reply is generic; the analyzer does better
+        if response is None or response.get("timeout"):
+            self.stats["fallback_timeout"] += 1
+            return await self.local_response(support_request)
+
+        self.stats["orchestrated"] += 1
+        return response
+
+    async def local_response(self, support_request: Dict) -> Dict:
+        """Answer from the in-process analyzer, shaped like the orchestrator's response"""
+
+        analysis = await get_analysis_executor().analyze(
+            support_request["message"], {"room_type": support_request.get("room_type")}
+        )
+        return self.response_from_analysis(support_request, analysis)
+
+    @staticmethod
+    def response_from_analysis(support_request: Dict, analysis: Dict) -> Dict:
+        """Shape an analyzer result like the orchestrator's compiled response"""
+
+        return {
+            "user_id": support_request["user_id"],
+            "session_id": support_request["session_id"],
+            "request_id": support_request.get("request_id"),
+            "response": analysis.get("response", "I'm here to support you through this difficult time."),
+            "room_suggestions": analysis.get("room_suggestions", ["general-support"]),
+            "resources": analysis.get("resources", []),
+            "resource_ids": analysis.get("resource_ids"),
+            "crisis_alert": bool(analysis.get("crisis_detected")) or analysis.get("crisis_level") in ["high", "emergency"],
+            "human_intervention": analysis.get("requires_human_intervention", False),
+            "follow_up_questions": analysis.get("follow_up_questions", []),
+            "source": "local_analyzer",
+            "timestamp": datetime.now().isoformat()
+        }
+
+    def get_stats(self) -> Dict:
+        return dict(
+            self.stats,
+            connected=self.connected,
+            pending=len(self._waiters)
+        )
+
+    async def close(self):
+        if self._connector is not None:
+            self._connector.cancel()
+            self._connector = None
+        self._disconnected()
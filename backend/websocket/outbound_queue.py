@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Outbound Queue for the Divorce Support WebSocket Server
+Bounded per-connection send queue drained by its own writer task
+"""
+
+import asyncio
+import os
+import time
+import logging
+from collections import deque
+from typing import Dict, Optional
+
+from metrics import LatencyHistogram
+
+logger = logging.getLogger(__name__)
+
+# Queue policies
+DROP_OLDEST = "drop_oldest"
+NEVER_DROP = "never_drop"
+
+# Frames queued per connection before drop-oldest frames start being discarded
+OUTBOX_MAX_SIZE = int(os.getenv("WS_OUTBOX_SIZE", "256"))
+
+# Message types that are never dropped, however far behind the client is: crisis
+# instructions, the room move that goes with them, and the replies users wait for
+NEVER_DROP_TYPES = frozenset(
+    message_type.strip()
+    for message_type in os.getenv(
+        "WS_OUTBOX_NEVER_DROP", "crisis_alert,emergency_response,room_transfer,ai_message"
+    ).split(",")
+    if message_type.strip()
+)
+
+# Seconds a client may take to accept one frame
+SEND_TIMEOUT = float(os.getenv("WS_SEND_TIMEOUT", "2.0"))
+
+# Consecutive timed-out sends before a slow client is disconnected
+SLOW_CLIENT_MAX_STRIKES = int(os.getenv("WS_SLOW_CLIENT_STRIKES", "3"))
+
+
+def policy_for(message_type: Optional[str]) -> str:
+    """Queue policy for a message type"""
+    return NEVER_DROP if message_type in NEVER_DROP_TYPES else DROP_OLDEST
+
+
+class ClientOutbox:
+    """Per-connection outbound queue
+
+    Handlers enqueue pre-encoded frames without awaiting the network, so a
+    client on a bad link only delays itself. When the queue is full the
+    oldest drop-oldest frame makes room; never-drop frames (crisis alerts,
+    emergency responses, room transfers, AI replies) are always queued.
+    """
+
+    def __init__(self, session_id: str, websocket, stats: Dict, max_size: int = OUTBOX_MAX_SIZE):
+        self.session_id = session_id
+        self.websocket = websocket
+        self.max_size = max_size
+        self.stats = stats
+
+        # Entries are (frame, policy, enqueued_at, latency histogram or None)
+        self._queue: deque = deque()
+        self._ready = asyncio.Event()
+        self._strikes = 0
+        self._writer: Optional[asyncio.Task] = None
+        self.closed = False
+
+    def start(self):
+        """Start the writer task"""
+        if self._writer is None:
+            self._writer = asyncio.create_task(self._drain())
+
+    @property
+    def depth(self) -> int:
+        return len(self._queue)
+
+    def enqueue(self, frame: str, message_type: str = None, latency: LatencyHistogram = None) -> bool:
+        """Queue a frame for sending, returning False if it was dropped"""
+
+        if self.closed:
+            return False
+
+        policy = policy_for(message_type)
+        if len(self._queue) >= self.max_size and not self._make_room(policy):
+            self.stats["dropped_frames"] += 1
+            return False
+
+        self._queue.append((frame, policy, time.perf_counter(), latency))
+        self.stats["queued_frames"] += 1
+        self._ready.set()
+        return True
+
+    def _make_room(self, policy: str) -> bool:
+        """Discard the oldest drop-oldest frame; never-drop frames may exceed the bound"""
+
+        for index, entry in enumerate(self._queue):
+            if entry[1] == DROP_OLDEST:
+                del self._queue[index]
+                self.stats["dropped_frames"] += 1
+                return True
+
+        return policy == NEVER_DROP
+
+    async def _drain(self):
+        """Send queued frames in order until the connection closes"""
+
+        while not self.closed:
+            if not self._queue:
+                self._ready.clear()
+                await self._ready.wait()
+                continue
+
+            frame, _, enqueued_at, latency = self._queue.popleft()
+            try:
+                await asyncio.wait_for(self.websocket.send(frame), timeout=SEND_TIMEOUT)
+            except asyncio.TimeoutError:
+                # The frame is buffered but the client isn't draining it
+                self.stats["send_timeouts"] += 1
+                self._strikes += 1
+                if self._strikes >= SLOW_CLIENT_MAX_STRIKES:
+                    await self._drop_slow_client()
+                continue
+            except Exception as e:
+                self.stats["send_errors"] += 1
+                logger.info(f"Writer stopped for session {self.session_id}: {e}")
+                self.closed = True
+                break
+
+            self._strikes = 0
+            self.stats["frames_sent"] += 1
+            if latency is not None:
+                latency.observe(time.perf_counter() - enqueued_at)
+
+    async def _drop_slow_client(self):
+        """Close a client whose send buffer stays full; the connection handler cleans up"""
+
+        self.closed = True
+        self.stats["slow_disconnects"] += 1
+        logger.warning(f"🐢 Disconnecting slow client: session {self.session_id}")
+        await self.websocket.close(code=1013, reason="Client too slow")
+
+    def close(self):
+        """Stop the writer and discard anything still queued"""
+
+        self.closed = True
+        self._queue.clear()
+        if self._writer is not None and not self._writer.done():
+            self._writer.cancel()
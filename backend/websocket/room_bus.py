@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+"""
+Room Bus for the Divorce Support WebSocket Server
+Propagates room broadcasts, history and membership between server workers
+"""
+
+import asyncio
+import json
+import os
+import logging
+from typing import Awaitable, Callable, Dict, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+# Unix socket the hub listens on when the server runs with several workers
+BUS_PATH = os.getenv("WS_BUS_PATH", "/tmp/divisafe-ws-bus.sock")
+
+# Largest encoded bus event accepted on the Unix socket transport
+BUS_MAX_EVENT_BYTES = int(os.getenv("WS_BUS_MAX_EVENT_BYTES", str(4 * 1024 * 1024)))
+
+# Seconds a worker keeps retrying its first connection to the hub
+BUS_CONNECT_TIMEOUT = float(os.getenv("WS_BUS_CONNECT_TIMEOUT", "10.0"))
+
+# Event kinds
+BROADCAST = "broadcast"
+HISTORY = "history"
+PRESENCE = "presence"
+
+# Events that belong to a room's ordered stream and get a room sequence number
+SEQUENCED_KINDS = frozenset((BROADCAST, HISTORY))
+
+EventHandler = Callable[[Dict], Awaitable[None]]
+
+
+class RoomSequencer:
+    """Stamps room events with a per-room sequence number
+
+    Whoever owns the sequencer is the single point every room event passes
+    through, so all subscribers see each room's events in the same order.
+    """
+
+    def __init__(self):
+        self._next: Dict[str, int] = {}
+
+    def stamp(self, event: Dict) -> Dict:
+        if event.get("kind") in SEQUENCED_KINDS:
+            room_id = event.get("room_id")
+            sequence = self._next.get(room_id, 0)
+            self._next[room_id] = sequence + 1
+            event["seq"] = sequence
+        return event
+
+
+class LocalRoomBus:
+    """In-process bus for a single server worker
+
+    publish() hands the event straight to the subscriber and awaits it, so
+    room events are applied in publish order with no serialization cost.
+    """
+
+    def __init__(self, worker_id: str = "w0"):
+        self.worker_id = worker_id
+        self._handler: Optional[EventHandler] = None
+        self._sequencer = RoomSequencer()
+        self.stats = {"published": 0, "delivered": 0}
+
+    async def start(self, handler: EventHandler):
+        """Subscribe the server's event handler"""
+        self._handler = handler
+
+    async def publish(self, event: Dict):
+        """Stamp and deliver an event"""
+
+        self.stats["published"] += 1
+        self._sequencer.stamp(event)
+        if self._handler is not None:
+            await self._handler(event)
+            self.stats["delivered"] += 1
+
+    async def close(self):
+        self._handler = None
+
+
+class RoomBusHub:
+    """Unix-socket hub that orders and fans out events between workers
+
+    Each worker holds one connection. Events are newline-delimited JSON; the
+    hub stamps room sequence numbers and writes every event to every worker,
+    the publisher included, before reading the next one. Since each stream is
+    FIFO, all workers apply a room's events in the hub's order.
+
+    The hub also remembers each worker's room occupancy so a worker that
+    connects late, or one that goes away, is reflected in everyone's counts.
+    """
+
+    def __init__(self, path: str = BUS_PATH):
+        self.path = path
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._writers: Set[asyncio.StreamWriter] = set()
+        self._sequencer = RoomSequencer()
+
+        # room_id -> worker_id -> local member count
+        self.presence: Dict[str, Dict[str, int]] = {}
+        self.stats = {"events": 0, "workers_connected": 0}
+
+    async def start(self):
+        """Listen on the Unix socket, replacing a stale socket file"""
+
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+        self._server = await asyncio.start_unix_server(
+            self._handle_worker, path=self.path, limit=BUS_MAX_EVENT_BYTES
+        )
+        logger.info(f"📡 Room bus hub listening on {self.path}")
+
+    async def _handle_worker(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Relay one worker's events until it disconnects"""
+
+        worker_id = None
+        self._writers.add(writer)
+        self.stats["workers_connected"] += 1
+
+        # Bring the new worker up to date with everyone's occupancy
+        for room_id, counts in self.presence.items():
+            for other_worker, count in counts.items():
+                self._write(writer, {"kind": PRESENCE, "room_id": room_id, "worker_id": other_worker, "count": count})
+
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+
+                event = json.loads(line)
+                if event.get("kind") == PRESENCE:
+                    worker_id = event.get("worker_id")
+                    self._record_presence(event)
+
+                await self._fan_out(self._sequencer.stamp(event))
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError) as e:
+            logger.warning(f"Room bus worker {worker_id or 'unknown'} dropped: {e}")
+        finally:
+            self._writers.discard(writer)
+            self.stats["workers_connected"] -= 1
+            writer.close()
+            if worker_id is not None:
+                await self._forget_worker(worker_id)
+
+    def _record_presence(self, event: Dict):
+        counts = self.presence.setdefault(event["room_id"], {})
+        if event.get("count"):
+            counts[event["worker_id"]] = event["count"]
+        else:
+            counts.pop(event["worker_id"], None)
+            if not counts:
+                del self.presence[event["room_id"]]
+
+    async def _forget_worker(self, worker_id: str):
+        """Zero out a departed worker's occupancy on the remaining workers"""
+
+        rooms = [room_id for room_id, counts in self.presence.items() if worker_id in counts]
+        for room_id in rooms:
+            event = {"kind": PRESENCE, "room_id": room_id, "worker_id": worker_id, "count": 0}
+            self._record_presence(event)
+            await self._fan_out(event)
+
+    def _write(self, writer: asyncio.StreamWriter, event: Dict):
+        writer.write(json.dumps(event).encode() + b"\n")
+
+    async def _fan_out(self, event: Dict):
+        """Write an event to every worker, then wait for their buffers to drain"""
+
+        self.stats["events"] += 1
+        line = json.dumps(event).encode() + b"\n"
+
+        # Writes happen back to back with no await in between, so no other
+        # event can interleave and every stream carries the same order
+        writers = list(self._writers)
+        for writer in writers:
+            writer.write(line)
+
+        results = await asyncio.gather(*(writer.drain() for writer in writers), return_exceptions=True)
+        for writer, result in zip(writers, results):
+            if isinstance(result, Exception):
+                self._writers.discard(writer)
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        for writer in list(self._writers):
+            writer.close()
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+
+
+class UnixSocketRoomBus:
+    """Worker side of the Unix-socket bus
+
+    publish() only sends to the hub; local delivery happens when the event
+    comes back, in hub order, exactly as on every other worker.
+    """
+
+    def __init__(self, path: str = BUS_PATH, worker_id: str = None):
+        self.path = path
+        self.worker_id = worker_id or f"pid{os.getpid()}"
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._listener: Optional[asyncio.Task] = None
+        self.stats = {"published": 0, "delivered": 0, "handler_errors": 0}
+
+    async def start(self, handler: EventHandler):
+        """Connect to the hub and start applying its events"""
+
+        deadline = asyncio.get_running_loop().time() + BUS_CONNECT_TIMEOUT
+        while True:
+            try:
+                self._reader, self._writer = await asyncio.open_unix_connection(
+                    self.path, limit=BUS_MAX_EVENT_BYTES
+                )
+                break
+            except (FileNotFoundError, ConnectionRefusedError):
+                if asyncio.get_running_loop().time() >= deadline:
+                    raise
+                await asyncio.sleep(0.1)
+
+        self._listener = asyncio.create_task(self._listen(handler))
+        logger.info(f"📡 Worker {self.worker_id} joined room bus at {self.path}")
+
+    async def _listen(self, handler: EventHandler):
+        """Apply hub events one at a time, in the order received"""
+
+        while True:
+            line = await self._reader.readline()
+            if not line:
+                logger.error(f"Room bus hub closed the connection for worker {self.worker_id}")
+                return
+
+            try:
+                await handler(json.loads(line))
+                self.stats["delivered"] += 1
+            except Exception as e:
+                self.stats["handler_errors"] += 1
+                logger.error(f"Error applying room bus event: {e}")
+
+    async def publish(self, event: Dict):
+        """Send an event to the hub"""
+
+        if self._writer is None:
+            raise RuntimeError("Room bus not started")
+
+        self.stats["published"] += 1
+        self._writer.write(json.dumps(event).encode() + b"\n")
+        await self._writer.drain()
+
+    async def close(self):
+        if self._listener is not None:
+            self._listener.cancel()
+        if self._writer is not None:
+            self._writer.close()
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Room History for the Divorce Support WebSocket Server
+Fixed-capacity ring buffer of recent room messages with "since message id" reads
+"""
+
+import os
+from typing import Dict, List, Optional, Tuple
+
+# Messages kept per room
+ROOM_HISTORY_DEPTH = int(os.getenv("WS_ROOM_HISTORY_DEPTH", "100"))
+
+
+class RoomHistory:
+    """Ring buffer of a room's most recent messages
+
+    Every appended message gets a room sequence number; an id -> sequence
+    index lets readers resume after a known message without scanning.
+    Appends are O(1) and reads copy only the entries returned.
+    """
+
+    def __init__(self, capacity: int = ROOM_HISTORY_DEPTH):
+        self.capacity = max(1, capacity)
+        self._slots: List[Optional[Dict]] = [None] * self.capacity
+        self._sequence_by_id: Dict[str, int] = {}
+        self.next_sequence = 0
+
+    def __len__(self) -> int:
+        return min(self.next_sequence, self.capacity)
+
+    @property
+    def first_sequence(self) -> int:
+        """Sequence number of the oldest message still held"""
+        return self.next_sequence - len(self)
+
+    def append(self, message: Dict) -> int:
+        """Store a message, evicting the oldest when full; returns its sequence number"""
+
+        sequence = self.next_sequence
+        slot = sequence % self.capacity
+
+        evicted = self._slots[slot]
+        if evicted is not None:
+            self._sequence_by_id.pop(evicted.get("id"), None)
+
+        self._slots[slot] = message
+        if message.get("id"):
+            self._sequence_by_id[message["id"]] = sequence
+        self.next_sequence = sequence + 1
+        return sequence
+
+    def sequence_of(self, message_id: str) -> Optional[int]:
+        """Sequence number of a message still in the buffer"""
+        return self._sequence_by_id.get(message_id)
+
+    def since_sequence(self, sequence: int, limit: int = None) -> List[Dict]:
+        """Messages with sequence numbers >= sequence, capped to the newest limit"""
+
+        start = max(sequence, self.first_sequence)
+        if limit is not None:
+            start = max(start, self.next_sequence - limit)
+
+        return [self._slots[index % self.capacity] for index in range(start, self.next_sequence)]
+
+    def last(self, limit: int = None, since_id: str = None) -> List[Dict]:
+        """The newest messages, optionally only those after since_id
+
+        An unknown or evicted since_id replays everything still held.
+        """
+
+        start = self.first_sequence
+        if since_id is not None:
+            sequence = self._sequence_by_id.get(since_id)
+            if sequence is not None:
+                start = sequence + 1
+
+        return self.since_sequence(start, limit)
+
+
+def parse_history_request(data: Dict, capacity: int) -> Tuple[Optional[int], Optional[str]]:
+    """Client-supplied history_limit and since_message_id, with unusable values ignored
+
+    history_limit must be a non-negative integer (numeric strings are
+    accepted) and is capped at capacity; since_message_id must be a
+    non-empty string.
+    """
+
+    limit = data.get("history_limit")
+    if isinstance(limit, bool):
+        limit = None
+    elif limit is not None:
+        try:
+            limit = int(limit)
+        except (TypeError, ValueError, OverflowError):
+            limit = None
+        else:
+            limit = min(limit, capacity) if limit >= 0 else None
+
+    since_id = data.get("since_message_id")
+    if not isinstance(since_id, str) or not since_id:
+        since_id = None
+
+    return limit, since_id
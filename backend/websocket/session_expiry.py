@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Session Expiry for the Divorce Support WebSocket Server
+Monotonic-clock idle tracking with a lazy deadline heap
+"""
+
+import heapq
+import os
+import time
+from typing import Dict, List, Optional, Set, Tuple
+
+# Seconds without a frame before a session is expired
+IDLE_TIMEOUT = float(os.getenv("WS_IDLE_TIMEOUT", "1800"))
+
+
+class IdleSessionTracker:
+    """Tracks last activity per session and yields sessions as they go idle
+
+    touch() is a single dict write. Each session owns at most one heap entry;
+    when that entry comes due the session's real deadline is checked and, if
+    it was active since, the entry is pushed back once. Expiry therefore costs
+    amortised O(log n) per idle period rather than a scan of every session.
+    """
+
+    def __init__(self, idle_timeout: float = IDLE_TIMEOUT):
+        self.idle_timeout = idle_timeout
+        self._last_seen: Dict[str, float] = {}
+        self._deadlines: List[Tuple[float, str]] = []
+        self._scheduled: Set[str] = set()
+
+    def __len__(self) -> int:
+        return len(self._last_seen)
+
+    def add(self, session_id: str):
+        """Start tracking a session (again, after a resume)"""
+        now = time.monotonic()
+        self._last_seen[session_id] = now
+
+        # An entry left over from earlier tracking is due sooner and re-pushes itself
+        if session_id not in self._scheduled:
+            self._scheduled.add(session_id)
+            heapq.heappush(self._deadlines, (now + self.idle_timeout, session_id))
+
+    def touch(self, session_id: str):
+        """Record activity for a tracked session"""
+        if session_id in self._last_seen:
+            self._last_seen[session_id] = time.monotonic()
+
+    def remove(self, session_id: str):
+        """Stop tracking a session; its heap entry is discarded lazily"""
+        self._last_seen.pop(session_id, None)
+
+    def idle_seconds(self, session_id: str) -> Optional[float]:
+        """Seconds since the session's last activity"""
+        last_seen = self._last_seen.get(session_id)
+        return None if last_seen is None else time.monotonic() - last_seen
+
+    def next_deadline(self) -> Optional[float]:
+        """Monotonic time of the earliest pending heap entry"""
+        return self._deadlines[0][0] if self._deadlines else None
+
+    def pop_expired(self, now: float = None) -> List[str]:
+        """Remove and return every session whose idle deadline has passed"""
+
+        now = time.monotonic() if now is None else now
+        expired = []
+
+        while self._deadlines and self._deadlines[0][0] <= now:
+            _, session_id = heapq.heappop(self._deadlines)
+
+            last_seen = self._last_seen.get(session_id)
+            if last_seen is None:
+                self._scheduled.discard(session_id)
+                continue  # Removed since the entry was pushed
+
+            deadline = last_seen + self.idle_timeout
+            if deadline <= now:
+                del self._last_seen[session_id]
+                self._scheduled.discard(session_id)
+                expired.append(session_id)
+            else:
+                heapq.heappush(self._deadlines, (deadline, session_id))
+
+        return expired
@@ -5,93 +5,353 @@ Handles real-time communication between frontend and ASI:One Chat Protocol
 """
 
 import asyncio
+import http
 import json
+import time
 import websockets
 from websockets import WebSocketServerProtocol
+from websockets.extensions.permessage_deflate import ServerPerMessageDeflateFactory
 from typing import Dict, List, Set
 import logging
+import multiprocessing
+import os
+import secrets
 import uuid
-from datetime import datetime, timedelta
+from urllib.parse import parse_qs, urlsplit
+from datetime import datetime
 import sys
 import pathlib
 
 # Add parent directory to path for imports
 sys.path.append(str(pathlib.Path(__file__).parent.parent))
+sys.path.append(str(pathlib.Path(__file__).parent))
+
+from frame_codec import CodecRegistry, FrameCodec
+from metrics import LatencyHistogram
+from metta.analysis_executor import get_analysis_executor
+from metta.resource_catalog import get_resource_catalog
+from orchestrator_bridge import OrchestratorBridge
+from outbound_queue import ClientOutbox
+from room_catalog import room_catalog
+from room_bus import BROADCAST, BUS_PATH, HISTORY, PRESENCE, LocalRoomBus, RoomBusHub, UnixSocketRoomBus
+from room_history import RoomHistory, parse_history_request
+from session_expiry import IdleSessionTracker
+from utils import LLMIntegration, llm_context
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Server processes sharing the listening port; above 1 they coordinate over the room bus
+WORKERS = int(os.getenv("WS_WORKERS", "1"))
+
+# Opt-in permessage-deflate: "deflate" to enable, tuned by window size and zlib memory level
+COMPRESSION = os.getenv("WS_COMPRESSION", "none")
+DEFLATE_WINDOW_BITS = int(os.getenv("WS_DEFLATE_WINDOW_BITS", "12"))
+DEFLATE_MEM_LEVEL = int(os.getenv("WS_DEFLATE_MEM_LEVEL", "5"))
+
+# Seconds a dropped session stays resumable; 0 ends sessions on disconnect
+RESUME_WINDOW = float(os.getenv("WS_RESUME_WINDOW", "60"))
+
+# Session-directed frames kept per session for replay after a reconnect
+RESUME_BUFFER_FRAMES = int(os.getenv("WS_RESUME_BUFFER", "64"))
+
+# Stream AI replies from the LLM as ai_message_delta frames before the final ai_message
+STREAM_AI_RESPONSES = os.getenv("WS_STREAM_AI_RESPONSES", "0") == "1"
+
+# Plain HTTP path on the WebSocket port that reports live room occupancy to the chat API
+OCCUPANCY_PATH = "/occupancy"
+
+# Interned support resources; clients that cached the catalog get ids instead of objects
+resource_catalog = get_resource_catalog()
+
+EMERGENCY_RESOURCES = resource_catalog.intern_all([
+    {
+        "name": "National Suicide Prevention Lifeline",
+        "contact": "988",
+        "available": "24/7"
+    },
+    {
+        "name": "Crisis Text Line",
+        "contact": "Text HOME to 741741",
+        "available": "24/7"
+    }
+])
+EMERGENCY_RESOURCE_IDS = resource_catalog.ids_for(EMERGENCY_RESOURCES)
+
+def compression_options() -> Dict:
+    """websockets.serve keyword arguments for the configured compression"""
+
+    if COMPRESSION != "deflate":
+        return {"compression": None}
+
+    return {
+        "compression": None,
+        "extensions": [
+            ServerPerMessageDeflateFactory(
+                server_max_window_bits=DEFLATE_WINDOW_BITS,
+                client_max_window_bits=DEFLATE_WINDOW_BITS,
+                compress_settings={"memLevel": DEFLATE_MEM_LEVEL}
+            )
+        ]
+    }
+
 class DivorceSupportWebSocketServer:
-    def __init__(self, host='localhost', port=3001):
+    def __init__(self, host='localhost', port=3001, bus=None, reuse_port=False, orchestrator=None,
+                 stream_responses=STREAM_AI_RESPONSES):
         self.host = host
         self.port = port
+        self.reuse_port = reuse_port
         self.connected_clients: Dict[str, WebSocketServerProtocol] = {}
         self.user_sessions: Dict[str, Dict] = {}
+
+        # Members connected to this worker; other workers' counts arrive over the bus
         self.room_users: Dict[str, Set[str]] = {}
-        self.message_history: Dict[str, List[Dict]] = {}
-        self.response_cache: Dict[str, Dict] = {}
+        self.remote_room_counts: Dict[str, Dict[str, int]] = {}
+
+        # Broadcasts, shared history and occupancy go through the bus so every
+        # worker applies a room's events in the same order
+        self.bus = bus or LocalRoomBus()
+        self.worker_id = self.bus.worker_id
+        self.message_history: Dict[str, RoomHistory] = {}
+
+        # Support requests go to the orchestrator agent; replies are pushed back
+        self.orchestrator = orchestrator or OrchestratorBridge()
+
+        # With streaming on, non-crisis replies are written by the LLM token by token
+        self.llm = LLMIntegration() if stream_responses else None
+        self.stream_stats = {"streamed_responses": 0, "delta_frames": 0}
+        self.first_delta_latency = LatencyHistogram()
+
+        # Monotonic last-activity tracking with a lazy deadline heap
+        self.idle_sessions = IdleSessionTracker()
+
+        # Dropped sessions waiting to be resumed, their one-time resume tokens,
+        # and each session's recent sequenced frames for replay
+        self.parked_sessions = IdleSessionTracker(idle_timeout=RESUME_WINDOW)
+        self.parked_wakeup = asyncio.Event()
+        self.resume_tokens: Dict[str, str] = {}
+        self.session_frames: Dict[str, RoomHistory] = {}
+        self.resume_stats = {"parked": 0, "resumed": 0, "resume_rejected": 0, "replayed_frames": 0, "replay_gaps": 0}
+
+        # Wire format per connection, negotiated by subprotocol at the handshake
+        self.codecs = CodecRegistry()
+        self.session_codecs: Dict[str, FrameCodec] = {}
+
+        # Per-connection outbound queues, each drained by its own writer task
+        self.outboxes: Dict[str, ClientOutbox] = {}
+        self.outbound_stats = {
+            "queued_frames": 0,
+            "frames_sent": 0,
+            "dropped_frames": 0,
+            "send_timeouts": 0,
+            "send_errors": 0,
+            "slow_disconnects": 0
+        }
+
+        # Per-room time from broadcast until each member's frame is written
+        self.broadcast_latency: Dict[str, LatencyHistogram] = {}
+        self.broadcast_count = 0
 
     async def start_server(self):
         """Start the WebSocket server"""
-        logger.info(f"🚀 Starting Divorce Support WebSocket server on {self.host}:{self.port}")
+        logger.info(f"🚀 Starting Divorce Support WebSocket server on {self.host}:{self.port} (worker {self.worker_id})")
+
+        await self.bus.start(self.handle_bus_event)
+        self.orchestrator.start(self.handle_orchestrator_push, on_connect=self.send_room_snapshot)
+
+        # SO_REUSEPORT lets every worker accept on the same port; the kernel spreads connections
+        serve_options = {"reuse_port": True} if self.reuse_port else {}
+        serve_options.update(compression_options())
+
+        try:
+            async with websockets.serve(
+                self.handle_connection,
+                self.host,
+                self.port,
+                ping_interval=20,
+                ping_timeout=10,
+                subprotocols=self.codecs.subprotocols,
+                process_request=self.process_http_request,
+                **serve_options
+            ):
+                await asyncio.Future()  # Run forever
+        finally:
+            await self.orchestrator.close()
+            await self.bus.close()
+            if self.llm is not None:
+                await self.llm.client.aclose()
+
+    async def process_http_request(self, path: str, request_headers):
+        """Answer occupancy queries over plain HTTP; everything else upgrades to WebSocket"""
+
+        if urlsplit(path).path != OCCUPANCY_PATH:
+            return None
 
-        async with websockets.serve(
-            self.handle_connection,
-            self.host,
-            self.port,
-            ping_interval=20,
-            ping_timeout=10
-        ):
-            await asyncio.Future()  # Run forever
+        body = json.dumps({"worker_id": self.worker_id, "rooms": self.room_occupancy()}).encode()
+        return http.HTTPStatus.OK, [("Content-Type", "application/json"), ("Cache-Control", "no-store")], body
+
+    def room_occupancy(self) -> Dict[str, int]:
+        """Members per room across all workers"""
+        return {room_id: self.room_user_count(room_id) for room_id in set(self.room_users) | set(self.remote_room_counts)}
 
     async def handle_connection(self, websocket: WebSocketServerProtocol, path: str):
         """Handle new WebSocket connections"""
 
+        codec = self.codecs.for_subprotocol(websocket.subprotocol)
+
+        # Reconnects carrying a resume token pick up their old session
+        session_id = await self.resume_session(websocket, codec, path)
+        if session_id is None:
+            session_id = await self.start_session(websocket, codec)
+        anonymous_id = self.user_sessions[session_id]["anonymous_id"]
+
+        try:
+            # Handle incoming messages
+            async for message in websocket:
+                try:
+                    data = codec.decode(message)
+                    await self.handle_message(session_id, data)
+                except ValueError:
+                    logger.error(f"Invalid {codec.name} frame received from session {session_id}")
+                except Exception as e:
+                    logger.error(f"Error handling message from session {session_id}: {e}")
+
+        except websockets.exceptions.ConnectionClosed:
+            logger.info(f"🔌 Connection closed: {anonymous_id}")
+        finally:
+            # Clean up on disconnect
+            await self.handle_disconnect(session_id, websocket)
+
+    async def start_session(self, websocket: WebSocketServerProtocol, codec: FrameCodec) -> str:
+        """Create a new session for a connection and welcome it"""
+
         # Generate session ID
         session_id = str(uuid.uuid4())
         anonymous_id = f"anon_{session_id[:8]}"
 
-        # Store connection
-        self.connected_clients[session_id] = websocket
         self.user_sessions[session_id] = {
             "session_id": session_id,
             "anonymous_id": anonymous_id,
             "connected_at": datetime.now().isoformat(),
-            "last_activity": datetime.now().isoformat(),
             "current_room": None,
-            "status": "connected"
+            "status": "connected",
+            "catalog_version": None
         }
+        self.session_frames[session_id] = RoomHistory(RESUME_BUFFER_FRAMES)
+        self.attach_connection(session_id, websocket, codec)
 
         logger.info(f"🔗 New connection established: {anonymous_id} (Session: {session_id})")
 
+        # Send welcome message
+        self.enqueue_frame(session_id, {
+            "type": "session_initialized",
+            "session_id": session_id,
+            "anonymous_id": anonymous_id,
+            "resume_token": self.issue_resume_token(session_id),
+            "message": {
+                "content": "Welcome to the Anonymous Divorce Support Platform. This is a safe, private space where you can share your feelings and receive AI-powered emotional support.",
+                "timestamp": datetime.now().isoformat()
+            }
+        })
+
+        return session_id
+
+    async def resume_session(self, websocket: WebSocketServerProtocol, codec: FrameCodec, path: str):
+        """Reattach a session named by ?resume=<token>&last_seq=<n>[&last_message_id=<id>]
+
+        Returns the resumed session id, or None when the connection should
+        start a fresh session.
+        """
+
+        params = parse_qs(urlsplit(path or "").query)
+        token = params.get("resume", [None])[0]
+        if not token:
+            return None
+
+        session_id = self.resume_tokens.pop(token, None)
+        session = self.user_sessions.get(session_id)
+        if session is None:
+            self.resume_stats["resume_rejected"] += 1
+            return None
+
+        # The old connection may not have noticed it is dead yet; take over from it
+        old_websocket = self.connected_clients.get(session_id)
+        if old_websocket is not None:
+            self.detach_connection(session_id)
+            asyncio.create_task(old_websocket.close(code=1000, reason="Session resumed elsewhere"))
+
+        self.parked_sessions.remove(session_id)
+        session["status"] = "connected"
+        self.attach_connection(session_id, websocket, codec)
+        self.resume_stats["resumed"] += 1
+
         try:
-            # Send welcome message
-            await self.send_message(websocket, {
-                "type": "session_initialized",
-                "session_id": session_id,
-                "anonymous_id": anonymous_id,
-                "message": {
-                    "content": "Welcome to the Anonymous Divorce Support Platform. This is a safe, private space where you can share your feelings and receive AI-powered emotional support.",
-                    "timestamp": datetime.now().isoformat()
-                }
+            last_seq = int(params.get("last_seq", ["-1"])[0])
+        except ValueError:
+            last_seq = -1
+
+        # Frames sent to this session after the last one the client saw
+        frames = self.session_frames[session_id]
+        missed = frames.since_sequence(last_seq + 1)
+        replay_gap = last_seq + 1 < frames.first_sequence
+        if replay_gap:
+            self.resume_stats["replay_gaps"] += 1
+
+        self.enqueue_frame(session_id, {
+            "type": "session_resumed",
+            "session_id": session_id,
+            "anonymous_id": session["anonymous_id"],
+            "current_room": session["current_room"],
+            "resume_token": self.issue_resume_token(session_id),
+            "replayed": len(missed),
+            "replay_gap": replay_gap
+        })
+        for message in missed:
+            self.enqueue_frame(session_id, message)
+        self.resume_stats["replayed_frames"] += len(missed)
+
+        # Room traffic is recovered from the room's ring buffer
+        room_id = session["current_room"]
+        last_message_id = params.get("last_message_id", [None])[0]
+        if room_id and last_message_id:
+            self.enqueue_frame(session_id, {
+                "type": "room_history",
+                "room_id": room_id,
+                "messages": self.get_room_history(room_id).last(since_id=last_message_id)
             })
 
-            # Handle incoming messages
-            async for message in websocket:
-                try:
-                    data = json.loads(message)
-                    await self.handle_message(session_id, data)
-                except json.JSONDecodeError:
-                    logger.error(f"Invalid JSON received from session {session_id}")
-                except Exception as e:
-                    logger.error(f"Error handling message from session {session_id}: {e}")
+        logger.info(f"🔁 Session resumed: {session['anonymous_id']} ({len(missed)} frames replayed)")
+        return session_id
 
-        except websockets.exceptions.ConnectionClosed:
-            logger.info(f"🔌 Connection closed: {anonymous_id}")
-        finally:
-            # Clean up on disconnect
-            await self.handle_disconnect(session_id)
+    def attach_connection(self, session_id: str, websocket: WebSocketServerProtocol, codec: FrameCodec):
+        """Bind a live connection and its writer to a session"""
+
+        self.connected_clients[session_id] = websocket
+        self.session_codecs[session_id] = codec
+        outbox = ClientOutbox(session_id, websocket, self.outbound_stats)
+        self.outboxes[session_id] = outbox
+        outbox.start()
+        self.idle_sessions.add(session_id)
+
+    def detach_connection(self, session_id: str):
+        """Unbind a session's connection, discarding anything still queued"""
+
+        self.idle_sessions.remove(session_id)
+        outbox = self.outboxes.pop(session_id, None)
+        if outbox:
+            outbox.close()
+        self.session_codecs.pop(session_id, None)
+        self.connected_clients.pop(session_id, None)
+
+    def issue_resume_token(self, session_id: str) -> str:
+        """Replace a session's resume token with a fresh one-time token"""
+
+        session = self.user_sessions[session_id]
+        self.resume_tokens.pop(session.get("resume_token"), None)
+        token = session["resume_token"] = secrets.token_urlsafe(24)
+        self.resume_tokens[token] = session_id
+        return token
 
     async def handle_message(self, session_id: str, data: Dict):
         """Handle incoming messages from clients"""
@@ -104,8 +364,7 @@ class DivorceSupportWebSocketServer:
             return
 
         # Update last activity
-        session["last_activity"] = datetime.now().isoformat()
-        self.user_sessions[session_id] = session
+        self.idle_sessions.touch(session_id)
 
         if message_type == "join_room":
             await self.handle_join_room(session_id, data)
@@ -113,8 +372,10 @@ class DivorceSupportWebSocketServer:
             await self.handle_user_message(session_id, data)
         elif message_type == "leave_room":
             await self.handle_leave_room(session_id, data)
+        elif message_type == "resource_catalog":
+            await self.handle_resource_catalog(session_id, data)
         elif message_type == "ping":
-            await self.send_message(self.connected_clients[session_id], {"type": "pong"})
+            self.enqueue_frame(session_id, {"type": "pong"})
         else:
             logger.warning(f"Unknown message type: {message_type}")
 
@@ -136,13 +397,14 @@ class DivorceSupportWebSocketServer:
         if room_id not in self.room_users:
             self.room_users[room_id] = set()
         self.room_users[room_id].add(session_id)
+        await self.publish_presence(room_id)
+        self.notify_room_event("join", session_id, room_id)
 
         # Initialize message history for room
-        if room_id not in self.message_history:
-            self.message_history[room_id] = []
+        history = self.get_room_history(room_id)
 
         # Send room join confirmation
-        await self.send_message(self.connected_clients[session_id], {
+        await self.send_message(session_id, {
             "type": "room_joined",
             "room_id": room_id,
             "message": {
@@ -153,13 +415,37 @@ class DivorceSupportWebSocketServer:
 
         # Send room information
         room_info = await self.get_room_info(room_id)
-        await self.send_message(self.connected_clients[session_id], {
+        await self.send_message(session_id, {
             "type": "room_info",
             "room": room_info
         })
 
+        # Replay recent history when the client asks for it; malformed values are ignored
+        if "history_limit" in data or "since_message_id" in data:
+            limit, since_id = parse_history_request(data, history.capacity)
+            await self.send_message(session_id, {
+                "type": "room_history",
+                "room_id": room_id,
+                "messages": history.last(limit, since_id)
+            })
+
         logger.info(f"🏠 User {session['anonymous_id']} joined room: {room_id}")
 
+    async def handle_resource_catalog(self, session_id: str, data: Dict):
+        """Send the resource catalog unless the client already holds this version"""
+
+        version = resource_catalog.version
+        self.user_sessions[session_id]["catalog_version"] = version
+
+        if data.get("version") == version:
+            await self.send_message(session_id, {"type": "resource_catalog", "version": version, "not_modified": True})
+        else:
+            await self.send_message(session_id, dict(resource_catalog.to_dict(), type="resource_catalog"))
+
+    def has_current_catalog(self, session_id: str) -> bool:
+        """Whether the client can resolve resource ids without inline objects"""
+        return self.user_sessions[session_id].get("catalog_version") == resource_catalog.version
+
     async def handle_user_message(self, session_id: str, data: Dict):
         """Handle user messages and coordinate with agent system"""
 
@@ -181,19 +467,12 @@ class DivorceSupportWebSocketServer:
             "sender": "user"
         }
 
-        # Store message in room history
-        if room_id:
-            self.message_history[room_id].append(message_obj)
-
-            # Keep only last 100 messages per room
-            if len(self.message_history[room_id]) > 100:
-                self.message_history[room_id] = self.message_history[room_id][-100:]
-
-        # Send user message to all users in the room (for multi-user rooms)
+        # Send user message to all users in the room (for multi-user rooms);
+        # every worker records it in the room history as the broadcast arrives
         await self.broadcast_to_room(room_id, {
             "type": "user_message",
             "message": message_obj
-        }, exclude_session=session_id)
+        }, exclude_session=session_id, history_entry=message_obj)
 
         # Process message with agent system
         await self.process_with_agents(session_id, message_obj)
@@ -208,17 +487,13 @@ class DivorceSupportWebSocketServer:
 
         if room_id and room_id in self.room_users:
             self.room_users[room_id].discard(session_id)
-
-            # Clean up empty rooms
-            if not self.room_users[room_id]:
-                del self.room_users[room_id]
-                if room_id in self.message_history:
-                    del self.message_history[room_id]
+            await self.publish_presence(room_id)
+            self.notify_room_event("leave", session_id, room_id)
 
         session["current_room"] = None
         self.user_sessions[session_id] = session
 
-        await self.send_message(self.connected_clients[session_id], {
+        await self.send_message(session_id, {
             "type": "room_left",
             "room_id": room_id,
             "message": {
@@ -244,58 +519,112 @@ class DivorceSupportWebSocketServer:
             "anonymous_id": session["anonymous_id"]
         }
 
-        # Send to orchestrator agent (in real implementation)
-        # For now, simulate agent processing
-        await self.simulate_agent_processing(session_id, support_request)
-
-    async def simulate_agent_processing(self, session_id: str, support_request: Dict):
-        """Simulate agent processing (replace with actual agent calls)"""
-
-        # Simulate processing delay
-        await asyncio.sleep(1)
-
-        # Generate mock agent response
-        mock_response = {
-            "user_id": support_request["user_id"],
-            "session_id": support_request["session_id"],
-            "response": "Thank you for sharing that with me. I understand this is a difficult time for you. How are you feeling about what you're going through?",
-            "room_suggestions": ["emotional-support", "general-support"],
-            "resources": [
-                {
-                    "type": "article",
-                    "title": "Coping with Divorce Emotions",
-                    "url": "https://www.helpguide.org/articles/grief/coping-with-divorce.htm"
+        if self.llm is not None:
+            analysis = await get_analysis_executor().analyze(
+                support_request["message"], {"room_type": support_request["room_type"]}
+            )
+            response = self.orchestrator.response_from_analysis(support_request, analysis)
+
+            # Crisis messages still go through the orchestrator and its crisis agents
+            if not response["crisis_alert"]:
+                await self.stream_agent_response(session_id, support_request, response, llm_context(analysis))
+                return
+
+        # The bridge answers from the in-process analyzer if the agents are down or slow
+        response = await self.orchestrator.request(support_request)
+
+        if session_id in self.user_sessions:
+            await self.send_agent_response(session_id, response)
+
+    async def stream_agent_response(self, session_id: str, support_request: Dict, response: Dict, context: Dict):
+        """Stream the LLM reply as ai_message_delta frames, then send the complete ai_message
+
+        Deltas are unsequenced and may be dropped for a slow client; the final
+        ai_message carries the full text, is never dropped, and is what a
+        resumed session replays.
+        """
+
+        message_id = str(uuid.uuid4())
+        room_id = self.user_sessions[session_id]["current_room"]
+        started = time.perf_counter()
+        parts = []
+
+        async for delta in self.llm.stream_response(support_request["message"], context):
+            if not parts:
+                self.first_delta_latency.observe(time.perf_counter() - started)
+            self.enqueue_frame(session_id, {
+                "type": "ai_message_delta",
+                "message": {
+                    "id": message_id,
+                    "session_id": session_id,
+                    "room_id": room_id,
+                    "index": len(parts),
+                    "delta": delta
                 }
-            ],
-            "crisis_alert": False,
-            "human_intervention": False,
-            "follow_up_questions": [
-                "What specific emotions are you experiencing right now?",
-                "How has this situation been affecting your daily life?"
-            ],
+            })
+            parts.append(delta)
+            self.stream_stats["delta_frames"] += 1
+
+        self.stream_stats["streamed_responses"] += 1
+        if session_id in self.user_sessions:
+            await self.send_agent_response(
+                session_id, dict(response, response="".join(parts), source="llm_stream"), message_id=message_id
+            )
+
+    def notify_room_event(self, event: str, session_id: str, room_id: str):
+        """Tell the room matcher, via the orchestrator, that a session joined or left a room"""
+
+        self.orchestrator.notify({
+            "type": "room_event",
+            "event": event,
+            "session_id": session_id,
+            "room_id": room_id,
+            "worker_id": self.worker_id,
             "timestamp": datetime.now().isoformat()
-        }
+        })
+
+    async def send_room_snapshot(self):
+        """Resend this worker's membership so events missed while disconnected don't linger"""
+
+        self.orchestrator.notify({
+            "type": "room_snapshot",
+            "worker_id": self.worker_id,
+            "members": {
+                session_id: room_id
+                for room_id, session_ids in self.room_users.items()
+                for session_id in session_ids
+            }
+        })
+
+    async def handle_orchestrator_push(self, message: Dict):
+        """Forward unsolicited orchestrator messages, such as emergency responses"""
 
-        # Send agent response to user
-        await self.send_agent_response(session_id, mock_response)
+        session_id = message.get("session_id")
+        if message.get("type") == "emergency_response" and session_id in self.user_sessions:
+            await self.send_message(session_id, message)
+            logger.warning(f"🚨 Emergency response forwarded to session {session_id}")
 
-    async def send_agent_response(self, session_id: str, response: Dict):
-        """Send agent response to user"""
+    async def send_agent_response(self, session_id: str, response: Dict, message_id: str = None):
+        """Send agent response to user; message_id ties it to streamed deltas"""
 
-        websocket = self.connected_clients.get(session_id)
-        if not websocket:
-            logger.error(f"No websocket found for session {session_id}")
+        if session_id not in self.user_sessions:
+            logger.error(f"No session found for {session_id}")
             return
 
+        # Agent replies carry full resources; interning maps them to catalog ids
+        resources = response.get("resources", [])
+        resource_ids = response.get("resource_ids") or resource_catalog.ids_for(resources)
+
         # Create AI message object
         ai_message = {
-            "id": str(uuid.uuid4()),
+            "id": message_id or str(uuid.uuid4()),
             "session_id": session_id,
             "content": response["response"],
             "room_id": self.user_sessions[session_id]["current_room"],
             "timestamp": response["timestamp"],
             "sender": "ai",
-            "resources": response.get("resources", []),
+            "resources": resources,
+            "resource_ids": resource_ids,
             "room_suggestions": response.get("room_suggestions", []),
             "crisis_alert": response.get("crisis_alert", False),
             "follow_up_questions": response.get("follow_up_questions", [])
@@ -304,10 +633,13 @@ class DivorceSupportWebSocketServer:
         # Store AI message in room history
         room_id = self.user_sessions[session_id]["current_room"]
         if room_id:
-            self.message_history[room_id].append(ai_message)
+            await self.record_history(room_id, ai_message)
 
-        # Send to user
-        await self.send_message(websocket, {
+        # Send to user; history keeps the full objects for clients without the catalog
+        if self.has_current_catalog(session_id):
+            ai_message = dict(ai_message)
+            del ai_message["resources"]
+        await self.send_message(session_id, {
             "type": "ai_message",
             "message": ai_message
         })
@@ -332,32 +664,23 @@ class DivorceSupportWebSocketServer:
             "timestamp": datetime.now().isoformat(),
             "sender": "system",
             "crisis_alert": True,
-            "emergency_resources": [
-                {
-                    "name": "National Suicide Prevention Lifeline",
-                    "contact": "988",
-                    "available": "24/7"
-                },
-                {
-                    "name": "Crisis Text Line",
-                    "contact": "Text HOME to 741741",
-                    "available": "24/7"
-                }
-            ]
+            "emergency_resources": EMERGENCY_RESOURCES,
+            "emergency_resource_ids": EMERGENCY_RESOURCE_IDS
         }
 
         # Store crisis message
         room_id = session["current_room"]
         if room_id:
-            self.message_history[room_id].append(crisis_message)
+            await self.record_history(room_id, crisis_message)
 
         # Send crisis response
-        websocket = self.connected_clients.get(session_id)
-        if websocket:
-            await self.send_message(websocket, {
-                "type": "crisis_alert",
-                "message": crisis_message
-            })
+        if self.has_current_catalog(session_id):
+            crisis_message = dict(crisis_message)
+            del crisis_message["emergency_resources"]
+        await self.send_message(session_id, {
+            "type": "crisis_alert",
+            "message": crisis_message
+        })
 
         # Move user to crisis intervention room
         if session["current_room"] != "crisis-intervention":
@@ -374,146 +697,235 @@ class DivorceSupportWebSocketServer:
         # Leave old room
         if old_room and old_room in self.room_users:
             self.room_users[old_room].discard(session_id)
+            await self.publish_presence(old_room)
 
         # Join new room
         session["current_room"] = new_room_id
         if new_room_id not in self.room_users:
             self.room_users[new_room_id] = set()
         self.room_users[new_room_id].add(session_id)
+        await self.publish_presence(new_room_id)
+        self.notify_room_event("join", session_id, new_room_id)
 
         # Send room transfer notification
-        websocket = self.connected_clients.get(session_id)
-        if websocket:
-            await self.send_message(websocket, {
-                "type": "room_transfer",
-                "old_room": old_room,
-                "new_room": new_room_id,
-                "message": {
-                    "content": f"You've been moved to {new_room_id.replace('_', ' ').title()} for specialized support.",
-                    "timestamp": datetime.now().isoformat()
-                }
-            })
+        await self.send_message(session_id, {
+            "type": "room_transfer",
+            "old_room": old_room,
+            "new_room": new_room_id,
+            "message": {
+                "content": f"You've been moved to {new_room_id.replace('_', ' ').title()} for specialized support.",
+                "timestamp": datetime.now().isoformat()
+            }
+        })
 
         logger.info(f"🏠 User moved from {old_room} to {new_room_id}")
 
-    async def broadcast_to_room(self, room_id: str, message: Dict, exclude_session: str = None):
-        """Broadcast message to all users in a room"""
+    async def broadcast_to_room(self, room_id: str, message: Dict, exclude_session: str = None,
+                                history_entry: Dict = None):
+        """Broadcast message to all users in a room, on every worker"""
+
+        if not room_id:
+            return
+
+        await self.bus.publish({
+            "kind": BROADCAST,
+            "room_id": room_id,
+            "message": message,
+            "exclude_session": exclude_session,
+            "history": history_entry
+        })
+        self.broadcast_count += 1
+
+    async def record_history(self, room_id: str, message: Dict):
+        """Append a message to a room's history on every worker"""
+
+        await self.bus.publish({"kind": HISTORY, "room_id": room_id, "message": message})
+
+    async def publish_presence(self, room_id: str):
+        """Share this worker's member count for a room and drop the room locally once empty"""
+
+        members = self.room_users.get(room_id)
+        count = len(members) if members else 0
+        if members is not None and not members:
+            del self.room_users[room_id]
+
+        await self.bus.publish({"kind": PRESENCE, "room_id": room_id, "worker_id": self.worker_id, "count": count})
+
+    async def handle_bus_event(self, event: Dict):
+        """Apply a room event delivered by the bus, in room order"""
+
+        kind = event.get("kind")
+        room_id = event.get("room_id")
+
+        if kind == BROADCAST:
+            if event.get("history") is not None:
+                self.get_room_history(room_id).append(event["history"])
+            self.deliver_to_room(room_id, event["message"], event.get("exclude_session"))
+        elif kind == HISTORY:
+            self.get_room_history(room_id).append(event["message"])
+        elif kind == PRESENCE:
+            if event.get("worker_id") != self.worker_id:
+                counts = self.remote_room_counts.setdefault(room_id, {})
+                if event.get("count"):
+                    counts[event["worker_id"]] = event["count"]
+                else:
+                    counts.pop(event["worker_id"], None)
+                    if not counts:
+                        del self.remote_room_counts[room_id]
+
+            # Clean up rooms nobody on any worker is in
+            if not self.room_user_count(room_id) and room_id in self.message_history:
+                del self.message_history[room_id]
+        else:
+            logger.warning(f"Unknown room bus event: {kind}")
+
+    def deliver_to_room(self, room_id: str, message: Dict, exclude_session: str = None):
+        """Queue a message for this worker's members of a room"""
 
         if room_id not in self.room_users:
             return
 
+        if room_id not in self.broadcast_latency:
+            self.broadcast_latency[room_id] = LatencyHistogram()
+        latency = self.broadcast_latency[room_id]
+
+        # Encode once per wire format in use; each member's writer delivers
+        # the shared frame without blocking the others
+        frames: Dict[str, object] = {}
+        message_type = message.get("type")
         for session_id in self.room_users[room_id]:
             if session_id != exclude_session:
-                websocket = self.connected_clients.get(session_id)
-                if websocket:
-                    await self.send_message(websocket, message)
+                outbox = self.outboxes.get(session_id)
+                if outbox:
+                    codec = self.session_codecs.get(session_id, self.codecs.default)
+                    if codec.name not in frames:
+                        frames[codec.name] = codec.encode(message)
+                    outbox.enqueue(frames[codec.name], message_type, latency)
 
-    async def send_message(self, websocket: WebSocketServerProtocol, message: Dict):
-        """Send message to websocket client"""
+    def room_user_count(self, room_id: str) -> int:
+        """Members of a room across all workers"""
 
+        local = len(self.room_users.get(room_id, ()))
+        return local + sum(self.remote_room_counts.get(room_id, {}).values())
+
+    async def send_message(self, session_id: str, message: Dict):
+        """Sequence a message for a session and queue it for its websocket client
+
+        Every message gets the session's next seq and is kept for replay, so a
+        session that is parked between connections still receives it on resume.
+        """
+
+        frames = self.session_frames.get(session_id)
+        if frames is None:
+            logger.error(f"No session found for {session_id}")
+            return
+
+        message = dict(message, seq=frames.next_sequence)
+        frames.append(message)
+        self.enqueue_frame(session_id, message)
+
+    def enqueue_frame(self, session_id: str, message: Dict) -> bool:
+        """Encode and queue a frame for a connected session, without sequencing it"""
+
+        outbox = self.outboxes.get(session_id)
+        if not outbox:
+            return False
+
+        codec = self.session_codecs.get(session_id, self.codecs.default)
         try:
-            await websocket.send(json.dumps(message))
+            return outbox.enqueue(codec.encode(message), message.get("type"))
         except Exception as e:
             logger.error(f"Error sending message: {e}")
+            return False
+
+    def get_room_history(self, room_id: str) -> RoomHistory:
+        """Return a room's history buffer, creating it on first use"""
+
+        history = self.message_history.get(room_id)
+        if history is None:
+            history = self.message_history[room_id] = RoomHistory()
+        return history
 
     async def get_room_info(self, room_id: str) -> Dict:
         """Get information about a room"""
+        return room_catalog.describe(room_id, self.room_user_count(room_id))
 
-        room_info = {
-            "id": room_id,
-            "name": room_id.replace("_", " ").title(),
-            "description": f"Support room for {room_id.replace('_", " ")}",
-            "user_count": len(self.room_users.get(room_id, [])),
-            "max_users": 50,  # Default max users
-            "category": "general"
-        }
+    async def handle_disconnect(self, session_id: str, websocket: WebSocketServerProtocol = None):
+        """Handle client disconnection, parking the session for resume when enabled"""
 
-        # Room-specific configurations
-        room_configs = {
-            "crisis-intervention": {
-                "name": "Crisis Intervention",
-                "description": "24/7 emergency emotional support with human counselors",
-                "max_users": 10,
-                "category": "crisis"
-            },
-            "general-support": {
-                "name": "General Support",
-                "description": "Open space for relationship discussions and general support",
-                "max_users": 50,
-                "category": "general"
-            },
-            "emotional-support": {
-                "name": "Emotional Support",
-                "description": "Focused emotional support and coping strategies",
-                "max_users": 40,
-                "category": "emotional"
-            },
-            "legal-consultation": {
-                "name": "Legal Consultation",
-                "description": "Anonymous legal advice and consultation",
-                "max_users": 20,
-                "category": "legal"
-            }
-        }
+        session = self.user_sessions.get(session_id)
+        if not session:
+            return
+
+        # A resumed session has already moved to a newer connection
+        if websocket is not None and self.connected_clients.get(session_id) is not websocket:
+            return
 
-        if room_id in room_configs:
-            config = room_configs[room_id]
-            room_info.update(config)
-            room_info["user_count"] = len(self.room_users.get(room_id, []))
+        if websocket is not None and RESUME_WINDOW > 0:
+            self.park_session(session_id)
+        else:
+            await self.end_session(session_id)
 
-        return room_info
+    def park_session(self, session_id: str):
+        """Keep a dropped session, its room and its replay buffer until the resume window ends"""
 
-    async def handle_disconnect(self, session_id: str):
-        """Handle client disconnection"""
+        self.detach_connection(session_id)
+        session = self.user_sessions[session_id]
+        session["status"] = "disconnected"
+        self.parked_sessions.add(session_id)
+        self.parked_wakeup.set()
+        self.resume_stats["parked"] += 1
 
-        session = self.user_sessions.get(session_id)
+        logger.info(f"⏸️ Session parked for resume: {session['anonymous_id']}")
+
+    async def end_session(self, session_id: str):
+        """Remove a session and everything attached to it"""
+
+        session = self.user_sessions.pop(session_id, None)
         if not session:
             return
 
         anonymous_id = session["anonymous_id"]
         current_room = session["current_room"]
 
+        self.detach_connection(session_id)
+        self.parked_sessions.remove(session_id)
+        self.resume_tokens.pop(session.get("resume_token"), None)
+        self.session_frames.pop(session_id, None)
+
         # Remove from room
         if current_room and current_room in self.room_users:
             self.room_users[current_room].discard(session_id)
-
-            # Clean up empty rooms
-            if not self.room_users[current_room]:
-                del self.room_users[current_room]
-                if current_room in self.message_history:
-                    del self.message_history[current_room]
-
-        # Remove session
-        del self.user_sessions[session_id]
-        if session_id in self.connected_clients:
-            del self.connected_clients[session_id]
+            await self.publish_presence(current_room)
+            self.notify_room_event("leave", session_id, current_room)
 
         logger.info(f"🔌 User disconnected: {anonymous_id}")
 
     async def cleanup_inactive_sessions(self):
-        """Clean up inactive sessions periodically"""
-
-        current_time = datetime.now()
-        inactive_threshold = timedelta(minutes=30)
+        """Expire sessions whose idle deadline has passed"""
 
-        to_remove = []
-        for session_id, session in self.user_sessions.items():
-            last_activity = datetime.fromisoformat(session["last_activity"])
-            if current_time - last_activity > inactive_threshold:
-                to_remove.append(session_id)
+        to_remove = self.idle_sessions.pop_expired()
 
         for session_id in to_remove:
+            websocket = self.connected_clients.get(session_id)
             await self.handle_disconnect(session_id)
+            if websocket:
+                asyncio.create_task(websocket.close(code=1001, reason="Idle timeout"))
             logger.info(f"🧹 Cleaned up inactive session: {session_id}")
 
         if to_remove:
             logger.info(f"🧹 Cleaned up {len(to_remove)} inactive sessions")
 
+        # Parked sessions nobody came back for
+        for session_id in self.parked_sessions.pop_expired():
+            await self.end_session(session_id)
+
     async def get_system_stats(self) -> Dict:
         """Get system statistics"""
 
         total_sessions = len(self.user_sessions)
-        total_rooms = len(self.room_users)
+        room_ids = set(self.room_users) | set(self.remote_room_counts)
+        total_rooms = len(room_ids)
         total_messages = sum(len(messages) for messages in self.message_history.values())
 
         return {
@@ -523,10 +935,42 @@ class DivorceSupportWebSocketServer:
             "total_messages": total_messages,
             "rooms": {
                 room_id: {
-                    "user_count": len(users),
+                    "user_count": self.room_user_count(room_id),
+                    "local_user_count": len(self.room_users.get(room_id, ())),
                     "message_count": len(self.message_history.get(room_id, []))
                 }
-                for room_id, users in self.room_users.items()
+                for room_id in room_ids
+            },
+            "outbound": dict(
+                self.outbound_stats,
+                queue_depth=sum(outbox.depth for outbox in self.outboxes.values()),
+                max_queue_depth=max((outbox.depth for outbox in self.outboxes.values()), default=0)
+            ),
+            "broadcast": {
+                "broadcasts": self.broadcast_count,
+                "fanout_latency": {room_id: histogram.to_dict() for room_id, histogram in self.broadcast_latency.items()}
+            },
+            "orchestrator": self.orchestrator.get_stats(),
+            "resume": dict(self.resume_stats, parked_sessions=len(self.parked_sessions)),
+            "streaming": dict(
+                self.stream_stats,
+                enabled=self.llm is not None,
+                first_delta_latency=self.first_delta_latency.to_dict(),
+                llm=self.llm.client.get_stats() if self.llm else None,
+                response_cache=self.llm.cache.get_stats() if self.llm else None,
+                circuit=self.llm.get_circuit_stats() if self.llm else None
+            ),
+            "analysis_executor": get_analysis_executor().get_stats(),
+            "encoding": dict(
+                self.codecs.get_stats(),
+                compression=COMPRESSION,
+                deflate_window_bits=DEFLATE_WINDOW_BITS if COMPRESSION == "deflate" else None,
+                deflate_mem_level=DEFLATE_MEM_LEVEL if COMPRESSION == "deflate" else None
+            ),
+            "worker": {
+                "worker_id": self.worker_id,
+                "bus": type(self.bus).__name__,
+                "bus_stats": dict(self.bus.stats)
             },
             "timestamp": datetime.now().isoformat()
         }
@@ -544,11 +988,61 @@ async def main():
     await websocket_server.start_server()
 
 async def periodic_cleanup():
-    """Periodic cleanup of inactive sessions"""
+    """Expire inactive sessions as their idle deadlines come due"""
 
+    idle_sessions = websocket_server.idle_sessions
+    parked_sessions = websocket_server.parked_sessions
     while True:
-        await asyncio.sleep(300)  # Run every 5 minutes
+        # New idle sessions always expire after existing ones, so sleeping until
+        # the earliest pending deadline never wakes late; a newly parked session
+        # can expire sooner, so parking wakes the loop to recompute
+        deadlines = [deadline for deadline in (idle_sessions.next_deadline(), parked_sessions.next_deadline()) if deadline is not None]
+        delay = min(deadlines) - time.monotonic() if deadlines else idle_sessions.idle_timeout
+
+        websocket_server.parked_wakeup.clear()
+        try:
+            await asyncio.wait_for(websocket_server.parked_wakeup.wait(), timeout=max(delay, 0))
+        except asyncio.TimeoutError:
+            pass
         await websocket_server.cleanup_inactive_sessions()
 
-if __name__ == "__main__":
+def run_worker(worker_id: str, bus_path: str):
+    """Entry point of one worker process in multi-worker mode"""
+
+    global websocket_server
+    websocket_server = DivorceSupportWebSocketServer(
+        bus=UnixSocketRoomBus(bus_path, worker_id),
+        reuse_port=True
+    )
     asyncio.run(main())
+
+async def run_cluster(workers: int = WORKERS, bus_path: str = BUS_PATH):
+    """Run the room bus hub and supervise worker processes sharing the port"""
+
+    hub = RoomBusHub(bus_path)
+    await hub.start()
+
+    context = multiprocessing.get_context("spawn")
+    processes = [
+        context.Process(target=run_worker, args=(f"w{index}", bus_path), daemon=True)
+        for index in range(workers)
+    ]
+    for process in processes:
+        process.start()
+    logger.info(f"🧩 Started {workers} WebSocket workers on port {websocket_server.port}")
+
+    try:
+        while all(process.is_alive() for process in processes):
+            await asyncio.sleep(1)
+        logger.error("A WebSocket worker exited; shutting down the cluster")
+    finally:
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+        await hub.close()
+
+if __name__ == "__main__":
+    if WORKERS > 1:
+        asyncio.run(run_cluster())
+    else:
+        asyncio.run(main())
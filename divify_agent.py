@@ -18,7 +18,7 @@ print("🚀 Starting Divify Divorce Support Agent...")
 print(f"📁 Project root: {project_root}")
 
 try:
-    from backend.metta.metta_engine import DivorceSupportMeTTaEngine
+    from backend.metta.metta_engine import get_metta_engine
     from uagents import Agent, Context, Protocol
     from uagents.setup import fund_agent_if_low
     print("✅ All imports successful")
@@ -90,9 +90,8 @@ if divorce_support_agent:
         ctx.logger.info("🤖 Divify Divorce Support Agent starting up...")
 
         try:
-            # Initialize MeTTa engine
-            metta_engine = DivorceSupportMeTTaEngine()
-            ctx.storage.set("metta_engine", metta_engine)
+            # Warm the shared MeTTa engine so the first request skips table compilation
+            get_metta_engine()
             ctx.storage.set("processed_requests", 0)
 
             ctx.logger.info("✅ Divorce Support Agent initialized successfully")
@@ -110,11 +109,8 @@ if divorce_support_agent:
         ctx.logger.info(f"🏥 Processing divorce support request from: {msg.anonymous_id}")
 
         try:
-            # Get MeTTa engine
-            metta_engine = ctx.storage.get("metta_engine")
-            if not metta_engine:
-                ctx.logger.error("❌ MeTTa engine not found")
-                return
+            # Get the shared MeTTa engine
+            metta_engine = get_metta_engine()
 
             # Prepare user context
             user_context = {
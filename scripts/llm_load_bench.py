@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+LLM Client Load Benchmark for the Divorce Support Platform
+Local stand-in for the ASI:One completions endpoint and a throughput / time-to-first-text benchmark
+"""
+
+import argparse
+import asyncio
+import json
+import pathlib
+import sys
+import time
+from typing import Dict
+
+# Backend modules live one directory over
+sys.path.append(str(pathlib.Path(__file__).parent.parent / "backend"))
+
+from llm_client import AsyncLLMClient
+
+
+STAND_IN_REPLY = "I hear how hard this is. You're not alone, and it's okay to take this one day at a time."
+
+
+async def _serve_stand_in_completions(reader: asyncio.StreamReader, writer: asyncio.StreamWriter,
+                                      delay: float, token_delay: float, failures: Dict[str, int]):
+    """Minimal keep-alive HTTP/1.1 stand-in for the completions endpoint
+
+    Whole completions arrive after delay; streamed ones send their first
+    word after token_delay and one more word per token_delay after that.
+    While failures["remaining"] is positive, requests are answered 503.
+    """
+
+    try:
+        while True:
+            head = await reader.readuntil(b"\r\n\r\n")
+            length = 0
+            for line in head.split(b"\r\n"):
+                if line.lower().startswith(b"content-length:"):
+                    length = int(line.split(b":", 1)[1])
+            request = json.loads(await reader.readexactly(length) or b"{}")
+
+            if failures["remaining"] > 0:
+                failures["remaining"] -= 1
+                writer.write(b"HTTP/1.1 503 Service Unavailable\r\nContent-Length: 0\r\n\r\n")
+                await writer.drain()
+                continue
+
+            if not request.get("stream"):
+                await asyncio.sleep(delay)
+                body = json.dumps({"choices": [{"message": {"content": STAND_IN_REPLY}}]}).encode()
+                writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\nContent-Length: "
+                             + str(len(body)).encode() + b"\r\n\r\n" + body)
+                await writer.drain()
+                continue
+
+            writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\nTransfer-Encoding: chunked\r\n\r\n")
+            # Real servers interleave SSE comments, which clients must skip
+            ping = b": ping\n\n"
+            writer.write(f"{len(ping):x}\r\n".encode() + ping + b"\r\n")
+            words = STAND_IN_REPLY.split(" ")
+            for index, word in enumerate(words):
+                await asyncio.sleep(token_delay)
+                delta = word if index == 0 else " " + word
+                event = f"data: {json.dumps({'choices': [{'delta': {'content': delta}}]})}\n\n".encode()
+                writer.write(f"{len(event):x}\r\n".encode() + event + b"\r\n")
+                await writer.drain()
+            done = b"data: [DONE]\n\n"
+            writer.write(f"{len(done):x}\r\n".encode() + done + b"\r\n0\r\n\r\n")
+            await writer.drain()
+    except (asyncio.IncompleteReadError, ConnectionError, asyncio.CancelledError):
+        # Client went away, or the stand-in is shutting down mid-stream
+        writer.close()
+
+
+async def start_stand_in_server(delay: float = 0.1, token_delay: float = 0.01, port: int = 0,
+                                fail_first: int = 0) -> asyncio.AbstractServer:
+    """Serve stand-in completions on localhost; the first fail_first requests get a 503"""
+    failures = {"remaining": fail_first}
+    return await asyncio.start_server(
+        lambda reader, writer: _serve_stand_in_completions(reader, writer, delay, token_delay, failures), "127.0.0.1", port
+    )
+
+
+async def run_load_test(requests_per_level: int = 64, delay: float = 0.1, levels=(1, 4, 16, 64)):
+    """Show completion throughput against a local stand-in as concurrency grows"""
+
+    server = await start_stand_in_server(delay, token_delay=delay / 10)
+    port = server.sockets[0].getsockname()[1]
+    endpoint = f"http://127.0.0.1:{port}/v1/chat/completions"
+    messages = [{"role": "user", "content": "I feel overwhelmed"}]
+
+    print(f"🧪 Stand-in completions at 127.0.0.1:{port}, {delay * 1000:.0f} ms per completion")
+    for level in levels:
+        client = AsyncLLMClient(endpoint=endpoint, api_key="test",
+                                concurrency=level, max_connections=level, max_keepalive=level)
+        started = time.perf_counter()
+        await asyncio.gather(*(client.chat_completion(messages) for _ in range(requests_per_level)))
+        elapsed = time.perf_counter() - started
+        print(f"   concurrency {level:>3}: {requests_per_level / elapsed:7.1f} req/s  "
+              f"(p50 {client.latency.percentile(0.5)} ms, errors {client.stats['errors']})")
+        await client.aclose()
+
+    # Time until the first text reaches the caller, whole vs streamed
+    client = AsyncLLMClient(endpoint=endpoint, api_key="test")
+    started = time.perf_counter()
+    await client.chat_completion(messages)
+    whole = time.perf_counter() - started
+    started = time.perf_counter()
+    stream = client.stream_chat_completion(messages)
+    await stream.__anext__()
+    streamed = time.perf_counter() - started
+    await stream.aclose()
+    print(f"   first text: whole {whole * 1000:.0f} ms, streamed {streamed * 1000:.0f} ms")
+    await client.aclose()
+
+    server.close()
+    await server.wait_closed()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the pooled LLM client against a local stand-in")
+    parser.add_argument("--requests", type=int, default=64, help="completions per concurrency level")
+    parser.add_argument("--delay", type=float, default=0.1, help="seconds per stand-in completion")
+    parser.add_argument("--serve", type=int, metavar="PORT",
+                        help="only run the stand-in on PORT, e.g. for ASI_ONE_ENDPOINT=http://127.0.0.1:PORT/v1/chat/completions")
+    args = parser.parse_args()
+
+    if args.serve:
+        async def serve_forever():
+            server = await start_stand_in_server(args.delay, token_delay=args.delay / 10, port=args.serve)
+            print(f"🧪 Stand-in completions at http://127.0.0.1:{args.serve}/v1/chat/completions")
+            await server.serve_forever()
+        asyncio.run(serve_forever())
+    else:
+        asyncio.run(run_load_test(args.requests, args.delay))
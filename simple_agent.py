@@ -16,7 +16,7 @@ sys.path.insert(0, str(project_root))
 
 # Import required modules
 try:
-    from backend.metta.metta_engine import DivorceSupportMeTTaEngine
+    from backend.metta.metta_engine import get_metta_engine
     from uagents import Agent, Context, Protocol
     from uagents.setup import fund_agent_if_low
 except ImportError as e:
@@ -65,9 +65,8 @@ async def setup_divorce_agent(ctx: Context):
     ctx.logger.info("🤖 Divify Divorce Support Agent starting up...")
 
     try:
-        # Initialize MeTTa engine
-        metta_engine = DivorceSupportMeTTaEngine()
-        ctx.storage.set("metta_engine", metta_engine)
+        # Warm the shared MeTTa engine so the first request skips table compilation
+        get_metta_engine()
         ctx.storage.set("processed_requests", 0)
 
         ctx.logger.info("✅ Divorce Support Agent initialized successfully")
@@ -85,11 +84,8 @@ async def process_divorce_support(ctx: Context, sender: str, msg: SupportRequest
     ctx.logger.info(f"🏥 Processing divorce support request from: {msg.anonymous_id}")
 
     try:
-        # Get MeTTa engine
-        metta_engine = ctx.storage.get("metta_engine")
-        if not metta_engine:
-            ctx.logger.error("❌ MeTTa engine not found")
-            return
+        # Get the shared MeTTa engine
+        metta_engine = get_metta_engine()
 
         # Prepare user context
         user_context = {
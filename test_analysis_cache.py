@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Tests for the MeTTa engine's analysis cache
+"""
+
+import pathlib
+import sys
+
+sys.path.append(str(pathlib.Path(__file__).parent / "backend"))
+
+from metta.analysis_cache import AnalysisCache
+from metta.metta_engine import get_metta_engine
+from metta.resource_catalog import get_resource_catalog
+
+RESULT = {
+    "primary_emotion": "sadness",
+    "crisis_level": "low",
+    "room_suggestions": ["general-support"],
+    "resources": [{"name": "Support line", "type": "hotline"}]
+}
+
+
+def test_hits_do_not_share_nested_objects():
+    cache = AnalysisCache(max_size=10, ttl_seconds=60)
+    key = cache.make_key("I feel so sad")
+    cache.put(key, RESULT)
+
+    first = cache.get(key)
+    first["room_suggestions"].append("grief")
+    first["resources"][0]["name"] = "changed"
+
+    second = cache.get(key)
+    assert second == RESULT
+    assert second["room_suggestions"] is not first["room_suggestions"]
+
+
+def test_stored_entry_is_independent_of_the_caller():
+    cache = AnalysisCache(max_size=10, ttl_seconds=60)
+    key = cache.make_key("I feel so sad")
+    result = {"room_suggestions": ["general-support"], "crisis_level": "low"}
+    cache.put(key, result)
+
+    result["room_suggestions"].append("grief")
+    assert cache.get(key)["room_suggestions"] == ["general-support"]
+
+
+def test_copied_resources_keep_their_catalog_ids():
+    engine = get_metta_engine()
+    engine.analysis_cache.clear()
+    message = "I feel sad and lonely"
+
+    fresh = engine.analyze(message)
+    cached = engine.analyze(message)
+
+    catalog = get_resource_catalog()
+    assert cached == fresh
+    assert [catalog.id_of(resource) for resource in cached["resources"]] == fresh["resource_ids"]
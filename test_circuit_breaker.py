@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Tests for the LLM circuit breaker state machine
+"""
+
+import pathlib
+import sys
+
+import pytest
+
+sys.path.append(str(pathlib.Path(__file__).parent / "backend"))
+
+import circuit_breaker
+from circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(circuit_breaker, "time", fake)
+    return fake
+
+
+def make_breaker(**overrides):
+    settings = dict(window=10, window_seconds=60, min_calls=4, error_rate=0.5,
+                    slow_seconds=2.0, slow_rate=0.5, open_seconds=30, half_open_calls=1)
+    settings.update(overrides)
+    return CircuitBreaker(prefix="TEST_BREAKER", **settings)
+
+
+def open_breaker(breaker):
+    for _ in range(breaker.min_calls):
+        assert breaker.allow()
+        breaker.record_failure(0.1)
+    assert breaker.state == OPEN
+
+
+def test_opens_on_error_rate(clock):
+    breaker = make_breaker()
+    for failed in (False, True, False):
+        breaker.allow()
+        breaker.record_failure(0.1) if failed else breaker.record_success(0.1)
+    assert breaker.state == CLOSED  # Below min_calls
+
+    breaker.allow()
+    breaker.record_failure(0.1)  # 2 of 4 failed
+    assert breaker.state == OPEN
+    assert not breaker.allow()
+
+
+def test_stays_closed_below_error_rate(clock):
+    breaker = make_breaker()
+    for index in range(8):
+        breaker.allow()
+        breaker.record_failure(0.1) if index % 4 == 0 else breaker.record_success(0.1)
+    assert breaker.state == CLOSED
+
+
+def test_opens_on_slow_rate(clock):
+    breaker = make_breaker()
+    for seconds in (0.1, 3.0, 0.1, 3.0):
+        breaker.allow()
+        breaker.record_success(seconds)
+    assert breaker.state == OPEN
+
+
+def test_old_outcomes_leave_the_window(clock):
+    breaker = make_breaker()
+    for _ in range(3):
+        breaker.allow()
+        breaker.record_failure(0.1)
+
+    clock.now += 61
+    breaker.allow()
+    breaker.record_failure(0.1)
+    assert breaker.state == CLOSED  # Only one failure left in the window
+
+
+def test_half_opens_after_open_seconds(clock):
+    breaker = make_breaker()
+    open_breaker(breaker)
+
+    clock.now += 29
+    assert not breaker.allow()
+    assert breaker.state == OPEN
+
+    clock.now += 1
+    assert breaker.allow()
+    assert breaker.state == HALF_OPEN
+    assert not breaker.allow()  # Only one probe at a time
+
+
+def test_successful_probe_closes(clock):
+    breaker = make_breaker()
+    open_breaker(breaker)
+    clock.now += 30
+
+    assert breaker.allow()
+    breaker.record_success(0.1)
+    assert breaker.state == CLOSED
+    assert breaker.get_stats()["window_calls"] == 0
+    assert breaker.allow()
+
+
+@pytest.mark.parametrize("failed, seconds", [(True, 0.1), (False, 5.0)])
+def test_failed_or_slow_probe_reopens(clock, failed, seconds):
+    breaker = make_breaker()
+    open_breaker(breaker)
+    clock.now += 30
+
+    assert breaker.allow()
+    breaker.record_failure(seconds) if failed else breaker.record_success(seconds)
+    assert breaker.state == OPEN
+    assert not breaker.allow()
+
+    clock.now += 30
+    assert breaker.allow()
+    assert breaker.state == HALF_OPEN
+
+
+def test_lost_probe_is_written_off(clock):
+    breaker = make_breaker()
+    open_breaker(breaker)
+    clock.now += 30
+    assert breaker.allow()  # Probe never reports back
+
+    clock.now += 30
+    assert breaker.allow()
+
+
+def test_explicit_zero_settings_are_kept(clock, monkeypatch):
+    monkeypatch.setenv("TEST_BREAKER_OPEN_SECONDS", "30")
+    monkeypatch.setenv("TEST_BREAKER_MIN_CALLS", "5")
+    breaker = CircuitBreaker(prefix="TEST_BREAKER", open_seconds=0, min_calls=0)
+    assert breaker.open_seconds == 0
+    assert breaker.min_calls == 0
+
+    breaker.allow()
+    breaker.record_failure(0.1)
+    assert breaker.state == OPEN
+    assert breaker.allow()  # No cool-down
+    assert breaker.state == HALF_OPEN
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Tests for the MeTTa engine's keyword automaton
+Checks that one automaton pass finds exactly what the old `keyword in message` loops found
+"""
+
+import pathlib
+import sys
+
+import pytest
+
+sys.path.append(str(pathlib.Path(__file__).parent / "backend"))
+
+from metta.keyword_matcher import KeywordAutomaton
+from metta.metta_engine import get_metta_engine
+
+
+def substring_scan(tables, message_lower):
+    """The original nested-loop matching, in table order"""
+    return [
+        (table, category, keyword)
+        for table, categories in tables.items()
+        for category, keywords in categories.items()
+        for keyword in keywords
+        if keyword in message_lower
+    ]
+
+
+def occurrences(text, keyword):
+    """Start offsets of every (possibly overlapping) occurrence"""
+    return [index for index in range(len(text)) if text.startswith(keyword, index)]
+
+
+def assert_matches_substring_scan(tables, text):
+    automaton = KeywordAutomaton(tables)
+    hits = automaton.find_all(text)
+    expected = substring_scan(tables, text)
+
+    # Same keywords found
+    assert {(hit.table, hit.category, hit.keyword) for hit in hits} == set(expected)
+
+    # Every occurrence reported once, at its real offset
+    for table, category, keyword in set(expected):
+        offsets = sorted(hit.offset for hit in hits if (hit.table, hit.category, hit.keyword) == (table, category, keyword))
+        assert offsets == occurrences(text, keyword)
+
+    # The lowest rank is the nested loops' first match
+    if expected:
+        first = min(hits, key=lambda hit: hit.rank)
+        assert (first.table, first.category, first.keyword) == expected[0]
+    else:
+        assert hits == []
+
+
+OVERLAPPING_TABLES = {
+    "words": {
+        "a": ["he", "she", "hers"],
+        "b": ["his", "is"],
+        "c": ["ushers"]
+    }
+}
+
+
+@pytest.mark.parametrize("text", ["ushers", "shishers", "hehehe", "this is his", "", "nothing here"])
+def test_overlapping_keywords(text):
+    assert_matches_substring_scan(OVERLAPPING_TABLES, text)
+
+
+MULTI_WORD_TABLES = {
+    "crisis": {
+        "suicidal": ["end it all", "ending it all", "kill myself"],
+        "harm": ["hurt myself", "hurt"]
+    },
+    "emotion": {
+        "sadness": ["sad", "all alone", "alone"],
+        "anger": ["so angry", "angry"]
+    }
+}
+
+
+@pytest.mark.parametrize("text", [
+    "i feel like ending it all",
+    "i want to end it all, i'm all alone",
+    "i'm so angry i could hurt myself",
+    "sad and alone and sad again",
+    "endit all",
+    "kill myselfkill myself"
+])
+def test_multi_word_keywords(text):
+    assert_matches_substring_scan(MULTI_WORD_TABLES, text)
+
+
+def test_first_hit_rank_follows_table_order():
+    # "hurt" ends before "end it all" in the text, but crisis/suicidal comes first in the tables
+    tables = {"crisis": {"suicidal": ["end it all"], "harm": ["hurt"]}}
+    hits = KeywordAutomaton(tables).find_all("hurt so much i want to end it all")
+
+    first = min(hits, key=lambda hit: hit.rank)
+    assert (first.category, first.keyword) == ("suicidal", "end it all")
+
+
+ENGINE_MESSAGES = [
+    "I can't take this anymore, I feel like ending it all",
+    "My husband left me and I'm so angry and betrayed",
+    "I'm worried about how the kids will handle the divorce",
+    "I feel like such a failure, this is all my fault",
+    "I think there's hope for a better future after this",
+    "My joint family is putting so much pressure on me about this divorce",
+    "hello"
+]
+
+
+@pytest.mark.parametrize("message", ENGINE_MESSAGES)
+def test_engine_tables_match_substring_scan(message):
+    engine = get_metta_engine()
+    tables = {
+        "crisis": engine.crisis_keywords,
+        "emotion": engine.emotion_keywords,
+        "cultural": engine.cultural_indicators
+    }
+    assert_matches_substring_scan(tables, message.lower())
+
+
+def test_find_all_many_matches_find_all():
+    automaton = KeywordAutomaton(MULTI_WORD_TABLES)
+    texts = ["i want to end it all", "", "so angry", "i want to end it all"]
+    assert automaton.find_all_many(texts) == [automaton.find_all(text) for text in texts]
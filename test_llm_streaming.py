@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Tests for streamed LLM replies and their rule-based fallback
+"""
+
+import asyncio
+import pathlib
+import sys
+
+import pytest
+
+sys.path.append(str(pathlib.Path(__file__).parent / "backend"))
+sys.path.append(str(pathlib.Path(__file__).parent / "scripts"))
+
+pytest.importorskip("httpx")
+
+from circuit_breaker import CircuitBreaker
+from llm_client import AsyncLLMClient, LLMClientError
+from llm_load_bench import STAND_IN_REPLY, start_stand_in_server
+from response_cache import ResponseCache
+from utils import LLMIntegration
+
+
+class FakeStreamingClient:
+    def __init__(self, chunks=(), error: Exception = None):
+        self.chunks = chunks
+        self.error = error
+
+    async def stream_chat_completion(self, messages):
+        for chunk in self.chunks:
+            yield chunk
+        if self.error is not None:
+            raise self.error
+
+
+def make_llm(client):
+    llm = LLMIntegration(cache=ResponseCache(max_size=0))
+    llm.client = client
+    llm.breaker = CircuitBreaker(prefix="TEST_BREAKER", min_calls=100)
+    return llm
+
+
+async def collect(llm, prompt):
+    return [chunk async for chunk in llm.stream_response(prompt, {})]
+
+
+def test_chunks_are_streamed_in_order():
+    llm = make_llm(FakeStreamingClient(chunks=("I hear", " you.")))
+    assert asyncio.run(collect(llm, "I feel angry")) == ["I hear", " you."]
+    assert llm.breaker.stats["successes"] == 1
+    assert llm.stats["local_fallbacks"] == 0
+
+
+@pytest.mark.parametrize("client", [
+    FakeStreamingClient(),
+    FakeStreamingClient(error=LLMClientError("ASI API error: 503", 503))
+], ids=["empty_stream", "failed_stream"])
+def test_no_text_falls_back_to_rule_based_reply(client):
+    llm = make_llm(client)
+    chunks = asyncio.run(collect(llm, "I feel angry"))
+
+    assert len(chunks) == 1 and chunks[0].strip()
+    assert llm.stats["local_fallbacks"] == 1
+    assert llm.breaker.stats["failures"] == 1
+    assert llm.breaker.stats["successes"] == 0
+
+
+def test_stream_cut_off_midway_keeps_delivered_text():
+    llm = make_llm(FakeStreamingClient(chunks=("I hear",), error=LLMClientError("ASI API stream failed")))
+    assert asyncio.run(collect(llm, "I feel angry")) == ["I hear"]
+    assert llm.stats["local_fallbacks"] == 0
+
+
+async def stream_from_stand_in(fail_first=0, retries=2):
+    """Stream one completion from the real client against the stand-in server"""
+
+    server = await start_stand_in_server(delay=0, token_delay=0, fail_first=fail_first)
+    port = server.sockets[0].getsockname()[1]
+    client = AsyncLLMClient(endpoint=f"http://127.0.0.1:{port}/v1/chat/completions", api_key="test",
+                            retries=retries, retry_backoff=0)
+    try:
+        chunks = [chunk async for chunk in client.stream_chat_completion([{"role": "user", "content": "hi"}])]
+        return chunks, client.stats
+    finally:
+        await client.aclose()
+        server.close()
+        await server.wait_closed()
+
+
+def test_real_client_parses_server_sent_events():
+    chunks, stats = asyncio.run(stream_from_stand_in())
+
+    # One chunk per data event; the SSE comment and [DONE] yield nothing
+    assert chunks == [word if index == 0 else " " + word for index, word in enumerate(STAND_IN_REPLY.split(" "))]
+    assert "".join(chunks) == STAND_IN_REPLY
+    assert stats["completed"] == 1
+    assert stats["retries"] == 0
+
+
+def test_real_client_retries_failures_before_the_first_chunk():
+    chunks, stats = asyncio.run(stream_from_stand_in(fail_first=2, retries=2))
+
+    assert "".join(chunks) == STAND_IN_REPLY
+    assert stats["retries"] == 2
+    assert stats["errors"] == 0
+
+
+def test_real_client_gives_up_and_integration_falls_back():
+    with pytest.raises(LLMClientError) as failure:
+        asyncio.run(stream_from_stand_in(fail_first=2, retries=1))
+    assert failure.value.status_code == 503
+
+    async def scenario():
+        server = await start_stand_in_server(delay=0, token_delay=0, fail_first=2)
+        port = server.sockets[0].getsockname()[1]
+        client = AsyncLLMClient(endpoint=f"http://127.0.0.1:{port}/v1/chat/completions", api_key="test",
+                                retries=1, retry_backoff=0)
+        llm = make_llm(client)
+        try:
+            return llm, await collect(llm, "I feel angry")
+        finally:
+            await client.aclose()
+            server.close()
+            await server.wait_closed()
+
+    llm, chunks = asyncio.run(scenario())
+    assert len(chunks) == 1 and chunks[0].strip() and chunks[0] != STAND_IN_REPLY
+    assert llm.stats["local_fallbacks"] == 1
+    assert llm.breaker.stats["failures"] == 1
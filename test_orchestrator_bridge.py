@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Tests for correlating orchestrator bridge responses with their requests
+"""
+
+import asyncio
+import json
+import pathlib
+import sys
+
+sys.path.append(str(pathlib.Path(__file__).parent / "backend"))
+
+from websocket.orchestrator_bridge import ORCHESTRATOR_SESSION_TIMEOUT, BRIDGE_RESPONSE_TIMEOUT, OrchestratorBridge
+
+
+def support_request(message):
+    return {
+        "user_id": "anon_1",
+        "message": message,
+        "room_type": "general",
+        "session_id": "session-1",
+        "timestamp": "2026-01-01T00:00:00",
+        "anonymous_id": "anon_1"
+    }
+
+
+def final_response(request):
+    return {"type": "final_response", "response": {
+        "user_id": request["user_id"],
+        "session_id": request["session_id"],
+        "request_id": request["request_id"],
+        "response": f"reply to: {request['message']}"
+    }}
+
+
+async def start_orchestrator(script):
+    """Fake orchestrator that hands every received request to script(requests, writer)"""
+
+    requests = []
+
+    async def handle(reader, writer):
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            requests.append(json.loads(line)["request"])
+            await script(requests, writer)
+
+    server = await asyncio.start_server(handle, "127.0.0.1", 0)
+    return server, server.sockets[0].getsockname()[1], requests
+
+
+async def connected_bridge(port, response_timeout):
+    bridge = OrchestratorBridge(host="127.0.0.1", port=port, response_timeout=response_timeout)
+    bridge.start()
+    while not bridge.connected:
+        await asyncio.sleep(0.01)
+    return bridge
+
+
+def test_late_response_does_not_answer_the_next_message():
+    async def answer_late(requests, writer):
+        # The first request's reply arrives only after the bridge gave up on it,
+        # immediately ahead of the second request's own reply
+        if len(requests) == 2:
+            for request in requests:
+                writer.write(json.dumps(final_response(request)).encode() + b"\n")
+            await writer.drain()
+
+    async def scenario():
+        server, port, requests = await start_orchestrator(answer_late)
+        bridge = await connected_bridge(port, response_timeout=0.2)
+        try:
+            first = await bridge.request(support_request("first message"))
+            second = await bridge.request(support_request("second message"))
+        finally:
+            await bridge.close()
+            server.close()
+
+        assert first["source"] == "local_analyzer"
+        assert second["response"] == "reply to: second message"
+        assert requests[0]["request_id"] != requests[1]["request_id"]
+        assert first["request_id"] == requests[0]["request_id"]
+        assert bridge.stats["late_responses"] == 1
+        assert bridge.get_stats()["pending"] == 0
+
+    asyncio.run(scenario())
+
+
+def test_concurrent_requests_from_one_session_get_their_own_replies():
+    async def answer_in_reverse(requests, writer):
+        if len(requests) == 2:
+            for request in reversed(requests):
+                writer.write(json.dumps(final_response(request)).encode() + b"\n")
+            await writer.drain()
+
+    async def scenario():
+        server, port, _ = await start_orchestrator(answer_in_reverse)
+        bridge = await connected_bridge(port, response_timeout=5.0)
+        try:
+            replies = await asyncio.gather(
+                bridge.request(support_request("first message")),
+                bridge.request(support_request("second message"))
+            )
+        finally:
+            await bridge.close()
+            server.close()
+
+        assert [reply["response"] for reply in replies] == ["reply to: first message", "reply to: second message"]
+        assert bridge.stats["orchestrated"] == 2
+
+    asyncio.run(scenario())
+
+
+def test_default_timeout_outlasts_the_orchestrator_deadline():
+    assert BRIDGE_RESPONSE_TIMEOUT >= ORCHESTRATOR_SESSION_TIMEOUT
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Tests for the WebSocket server's per-connection outbound queue policies
+"""
+
+import pathlib
+import sys
+
+import pytest
+
+sys.path.append(str(pathlib.Path(__file__).parent / "backend"))
+
+from websocket.outbound_queue import DROP_OLDEST, NEVER_DROP, ClientOutbox, policy_for
+
+
+def make_outbox(max_size=2):
+    stats = {"queued_frames": 0, "dropped_frames": 0}
+    return ClientOutbox("session-1", websocket=None, stats=stats, max_size=max_size)
+
+
+def queued_types(outbox):
+    return [frame for frame, _, _, _ in outbox._queue]
+
+
+@pytest.mark.parametrize("message_type", ["crisis_alert", "emergency_response", "room_transfer", "ai_message"])
+def test_crisis_and_reply_frames_are_never_dropped(message_type):
+    assert policy_for(message_type) == NEVER_DROP
+
+
+@pytest.mark.parametrize("message_type", ["user_message", "ai_message_delta", "room_info", None])
+def test_other_frames_drop_oldest(message_type):
+    assert policy_for(message_type) == DROP_OLDEST
+
+
+def test_full_queue_keeps_emergency_and_transfer_frames():
+    outbox = make_outbox(max_size=2)
+    assert outbox.enqueue("emergency_response", "emergency_response")
+    assert outbox.enqueue("room_transfer", "room_transfer")
+
+    # Over the bound with only never-drop frames queued: chatter is refused, crisis frames still go in
+    assert not outbox.enqueue("user_message", "user_message")
+    assert outbox.enqueue("crisis_alert", "crisis_alert")
+    assert queued_types(outbox) == ["emergency_response", "room_transfer", "crisis_alert"]
+
+
+def test_drop_oldest_frames_make_room():
+    outbox = make_outbox(max_size=2)
+    outbox.enqueue("user_message 1", "user_message")
+    outbox.enqueue("emergency_response", "emergency_response")
+    outbox.enqueue("user_message 2", "user_message")
+
+    assert queued_types(outbox) == ["emergency_response", "user_message 2"]
+    assert outbox.stats["dropped_frames"] == 1
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Tests for the LLM response cache
+"""
+
+import pathlib
+import sys
+
+import pytest
+
+sys.path.append(str(pathlib.Path(__file__).parent / "backend"))
+
+import response_cache
+from response_cache import ResponseCache, similarity, fingerprint
+
+CONTEXT = {"primary_emotion": "anger", "intensity": "medium", "crisis_level": "low", "cultural_context": "none"}
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(response_cache, "time", fake)
+    return fake
+
+
+def test_exact_hit_ignores_case_and_punctuation(clock):
+    cache = ResponseCache(max_size=10, ttl_seconds=60, threshold=0.8)
+    cache.put("I miss my kids", CONTEXT, "reply", llm_seconds=1.5)
+
+    assert cache.get("i miss my kids!!", CONTEXT) == "reply"
+    stats = cache.get_stats()
+    assert stats["exact_hits"] == 1
+    assert stats["llm_calls_avoided"] == 1
+    assert stats["latency_saved_seconds"] == 1.5
+
+
+def test_similarity_threshold(clock):
+    cache = ResponseCache(max_size=10, ttl_seconds=60, threshold=0.8)
+    cache.put("I miss my kids", CONTEXT, "reply")
+
+    # 4 of 5 words shared: exactly at the threshold
+    assert similarity(fingerprint("I really miss my kids")[1], fingerprint("I miss my kids")[1]) == 0.8
+    assert cache.get("I really miss my kids", CONTEXT) == "reply"
+    assert cache.get_stats()["similar_hits"] == 1
+
+    # 4 of 6 words shared: below it
+    assert cache.get("I miss my kids so much", CONTEXT) is None
+
+
+def test_negation_never_shares_a_reply(clock):
+    # A threshold low enough that only the negation guard keeps these apart
+    cache = ResponseCache(max_size=10, ttl_seconds=60, threshold=0.5)
+    cache.put("I'm angry", CONTEXT, "reply to angry")
+
+    assert cache.get("I'm not angry", CONTEXT) is None
+    assert cache.get("I'm so angry", CONTEXT) == "reply to angry"
+
+    cache.put("I'm not angry", CONTEXT, "reply to not angry")
+    assert cache.get("I'm not angry at all", CONTEXT) == "reply to not angry"
+
+
+def test_context_is_part_of_the_key(clock):
+    cache = ResponseCache(max_size=10, ttl_seconds=60)
+    cache.put("I miss my kids", CONTEXT, "reply")
+    assert cache.get("I miss my kids", dict(CONTEXT, intensity="high")) is None
+
+
+def test_crisis_levels_bypass(clock):
+    cache = ResponseCache(max_size=10, ttl_seconds=60)
+    crisis = dict(CONTEXT, crisis_level="emergency")
+    cache.put("I can't go on", crisis, "reply")
+
+    assert cache.get("I can't go on", crisis) is None
+    assert cache.get_stats()["size"] == 0
+    assert cache.get_stats()["bypassed_crisis"] == 2
+
+
+def test_entries_expire_after_ttl(clock):
+    cache = ResponseCache(max_size=10, ttl_seconds=60)
+    cache.put("I miss my kids", CONTEXT, "reply")
+
+    clock.now += 59
+    assert cache.get("I miss my kids", CONTEXT) == "reply"
+
+    clock.now += 1
+    assert cache.get("I miss my kids", CONTEXT) is None
+    assert cache.get("I really miss my kids", CONTEXT) is None  # Expired entries aren't similar matches either
+    assert cache.get_stats()["expirations"] == 1
+    assert cache.get_stats()["size"] == 0
+
+
+def test_least_recently_used_entry_is_evicted(clock):
+    cache = ResponseCache(max_size=2, ttl_seconds=60)
+    cache.put("first message here", CONTEXT, "1")
+    cache.put("second message here", CONTEXT, "2")
+    assert cache.get("first message here", CONTEXT) == "1"  # Now most recently used
+
+    cache.put("third message here", CONTEXT, "3")
+    assert cache.get("second message here", CONTEXT) is None
+    assert cache.get("first message here", CONTEXT) == "1"
+    assert cache.get("third message here", CONTEXT) == "3"
+    assert cache.get_stats()["evictions"] == 1
+
+
+def test_disabled_when_size_is_zero(clock):
+    cache = ResponseCache(max_size=0, ttl_seconds=60)
+    cache.put("I miss my kids", CONTEXT, "reply")
+    assert cache.get("I miss my kids", CONTEXT) is None
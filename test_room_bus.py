@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Tests for the room bus that keeps server workers in step
+"""
+
+import asyncio
+import pathlib
+import sys
+
+sys.path.append(str(pathlib.Path(__file__).parent / "backend"))
+
+from websocket.room_bus import BROADCAST, HISTORY, PRESENCE, LocalRoomBus, RoomBusHub, RoomSequencer, UnixSocketRoomBus
+
+
+class Recorder:
+    """Worker event handler that remembers everything applied"""
+
+    def __init__(self):
+        self.events = []
+
+    async def __call__(self, event):
+        self.events.append(event)
+
+    def room(self, room_id, kinds=(BROADCAST, HISTORY)):
+        return [(event["seq"], event["text"]) for event in self.events
+                if event.get("room_id") == room_id and event.get("kind") in kinds]
+
+    def presence(self):
+        return [(event["room_id"], event["worker_id"], event["count"]) for event in self.events if event["kind"] == PRESENCE]
+
+
+async def wait_for(condition, timeout=5.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        assert asyncio.get_running_loop().time() < deadline, "timed out waiting for bus events"
+        await asyncio.sleep(0.01)
+
+
+async def start_workers(path, count):
+    workers = []
+    for index in range(count):
+        recorder = Recorder()
+        bus = UnixSocketRoomBus(path=path, worker_id=f"w{index}")
+        await bus.start(recorder)
+        workers.append((bus, recorder))
+    return workers
+
+
+def test_sequencer_numbers_each_room_separately():
+    sequencer = RoomSequencer()
+    stamped = [sequencer.stamp({"kind": BROADCAST, "room_id": room}) for room in ("a", "b", "a", "a")]
+    assert [event["seq"] for event in stamped] == [0, 0, 1, 2]
+
+    presence = sequencer.stamp({"kind": PRESENCE, "room_id": "a"})
+    assert "seq" not in presence
+
+
+def test_local_bus_delivers_in_publish_order():
+    async def scenario():
+        recorder = Recorder()
+        bus = LocalRoomBus()
+        await bus.start(recorder)
+        for index in range(3):
+            await bus.publish({"kind": BROADCAST, "room_id": "a", "text": f"m{index}"})
+        return recorder
+
+    recorder = asyncio.run(scenario())
+    assert recorder.room("a") == [(0, "m0"), (1, "m1"), (2, "m2")]
+
+
+def test_every_worker_applies_a_rooms_events_in_the_same_order(tmp_path):
+    path = str(tmp_path / "bus.sock")
+
+    async def scenario():
+        hub = RoomBusHub(path=path)
+        await hub.start()
+        workers = await start_workers(path, 3)
+        try:
+            # All workers publish to both rooms at once, interleaved
+            await asyncio.gather(*(
+                bus.publish({"kind": kind, "room_id": room, "text": f"{bus.worker_id}-{room}-{index}"})
+                for index in range(20)
+                for bus, _ in workers
+                for room, kind in (("a", BROADCAST), ("b", HISTORY))
+            ))
+            total = 20 * len(workers)
+            await wait_for(lambda: all(len(recorder.room("a")) == total and len(recorder.room("b")) == total
+                                       for _, recorder in workers))
+        finally:
+            for bus, _ in workers:
+                await bus.close()
+            await hub.close()
+        return [recorder for _, recorder in workers]
+
+    recorders = asyncio.run(scenario())
+    for room in ("a", "b"):
+        reference = recorders[0].room(room)
+        assert [seq for seq, _ in reference] == list(range(len(reference)))
+        assert all(recorder.room(room) == reference for recorder in recorders[1:])
+
+        # Each publisher's own events keep their publish order
+        for worker in ("w0", "w1", "w2"):
+            texts = [text for _, text in reference if text.startswith(f"{worker}-")]
+            assert texts == [f"{worker}-{room}-{index}" for index in range(20)]
+
+
+def test_presence_reaches_late_workers_and_departures_are_zeroed(tmp_path):
+    path = str(tmp_path / "bus.sock")
+
+    async def scenario():
+        hub = RoomBusHub(path=path)
+        await hub.start()
+        (first, _), = await start_workers(path, 1)
+        await first.publish({"kind": PRESENCE, "room_id": "a", "worker_id": "w0", "count": 2})
+        await wait_for(lambda: hub.presence == {"a": {"w0": 2}})
+
+        (late, late_events), = await start_workers(path, 1)
+        await wait_for(lambda: late_events.presence() == [("a", "w0", 2)])
+
+        await first.close()
+        await wait_for(lambda: ("a", "w0", 0) in late_events.presence())
+        presence = dict(hub.presence)
+
+        await late.close()
+        await hub.close()
+        return presence, late_events.presence()
+
+    presence, late_presence = asyncio.run(scenario())
+    assert late_presence == [("a", "w0", 2), ("a", "w0", 0)]
+    assert presence == {}
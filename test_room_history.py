@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Tests for the WebSocket server's room history ring buffer
+"""
+
+import pathlib
+import sys
+
+import pytest
+
+sys.path.append(str(pathlib.Path(__file__).parent / "backend"))
+
+from websocket.room_history import RoomHistory, parse_history_request
+
+
+def fill(history, count, start=0):
+    for index in range(start, start + count):
+        history.append({"id": f"m{index}"})
+
+
+def ids(messages):
+    return [message["id"] for message in messages]
+
+
+@pytest.mark.parametrize("data, expected", [
+    ({"history_limit": 5}, (5, None)),
+    ({"history_limit": "5"}, (5, None)),
+    ({"history_limit": 0}, (0, None)),
+    ({"history_limit": 1000}, (10, None)),
+    ({"history_limit": -1}, (None, None)),
+    ({"history_limit": "five"}, (None, None)),
+    ({"history_limit": [5]}, (None, None)),
+    ({"history_limit": True}, (None, None)),
+    ({"history_limit": float("inf")}, (None, None)),
+    ({"since_message_id": "m1"}, (None, "m1")),
+    ({"since_message_id": 42}, (None, None)),
+    ({"since_message_id": ""}, (None, None)),
+    ({"history_limit": "3", "since_message_id": "m1"}, (3, "m1"))
+])
+def test_history_request_values_are_validated(data, expected):
+    assert parse_history_request(data, capacity=10) == expected
+
+
+def test_validated_request_can_always_be_served():
+    history = RoomHistory(capacity=10)
+    fill(history, 3)
+
+    limit, since_id = parse_history_request({"history_limit": "2", "since_message_id": 7}, history.capacity)
+    assert ids(history.last(limit, since_id)) == ["m1", "m2"]
+
+
+def test_appends_are_numbered_in_order():
+    history = RoomHistory(capacity=3)
+    assert [history.append({"id": f"m{index}"}) for index in range(4)] == [0, 1, 2, 3]
+    assert history.next_sequence == 4
+
+
+def test_full_ring_evicts_the_oldest():
+    history = RoomHistory(capacity=3)
+    fill(history, 5)
+
+    assert len(history) == 3
+    assert history.first_sequence == 2
+    assert ids(history.last()) == ["m2", "m3", "m4"]
+    assert history.sequence_of("m1") is None  # Evicted ids leave the index
+    assert history.sequence_of("m4") == 4
+
+
+def test_last_caps_to_the_newest_limit():
+    history = RoomHistory(capacity=5)
+    fill(history, 4)
+
+    assert ids(history.last(2)) == ["m2", "m3"]
+    assert history.last(0) == []
+    assert ids(history.last(10)) == ["m0", "m1", "m2", "m3"]
+
+
+def test_since_message_id_replays_only_newer_messages():
+    history = RoomHistory(capacity=5)
+    fill(history, 4)
+
+    assert ids(history.last(since_id="m1")) == ["m2", "m3"]
+    assert history.last(since_id="m3") == []
+    assert ids(history.last(1, since_id="m0")) == ["m3"]
+
+
+def test_unknown_or_evicted_since_id_replays_everything_held():
+    history = RoomHistory(capacity=3)
+    fill(history, 5)
+
+    assert ids(history.last(since_id="m0")) == ["m2", "m3", "m4"]
+    assert ids(history.last(since_id="nope")) == ["m2", "m3", "m4"]
+
+
+def test_replay_across_the_wrap_point():
+    history = RoomHistory(capacity=3)
+    fill(history, 3)
+    fill(history, 2, start=3)  # Wraps over slots 0 and 1
+
+    assert ids(history.last(since_id="m2")) == ["m3", "m4"]
+    assert ids(history.since_sequence(3)) == ["m3", "m4"]
+
+
+def test_messages_without_ids_are_held_but_not_indexed():
+    history = RoomHistory(capacity=3)
+    history.append({"content": "frame"})
+    history.append({"id": "m1"})
+
+    assert len(history) == 2
+    assert ids(history.last(since_id="m1")) == []
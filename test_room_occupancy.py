@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Tests for the room matcher's occupancy index
+"""
+
+import pathlib
+import sys
+
+import pytest
+
+sys.path.append(str(pathlib.Path(__file__).parent / "backend"))
+
+import room_occupancy
+from room_occupancy import OccupancyIndex
+
+CAPACITY = {"small": 2, "large": 10}
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(room_occupancy, "time", fake)
+    return fake
+
+
+def test_reservations_count_towards_occupancy(clock):
+    index = OccupancyIndex(reservation_ttl=60)
+    index.join("a", "small")
+    index.reserve("b", "small")
+
+    assert index.members("small") == 1
+    assert index.occupancy("small") == 2
+    assert index.partition(["small", "large"], CAPACITY.get) == (["large"], ["small"])
+
+
+def test_join_claims_the_reservation(clock):
+    index = OccupancyIndex(reservation_ttl=60)
+    index.reserve("a", "small")
+    index.join("a", "small")
+
+    assert index.occupancy("small") == 1
+    assert index.stats["claimed"] == 1
+    assert index.snapshot()["total_reserved"] == 0
+
+
+def test_joining_another_room_still_releases_the_seat(clock):
+    index = OccupancyIndex(reservation_ttl=60)
+    index.reserve("a", "small")
+    index.join("a", "large")
+
+    assert index.occupancy("small") == 0
+    assert index.occupancy("large") == 1
+
+
+def test_unclaimed_reservations_expire(clock):
+    index = OccupancyIndex(reservation_ttl=60)
+    index.reserve("a", "small")
+
+    clock.now += 59
+    assert index.occupancy("small") == 1
+
+    clock.now += 1
+    assert index.occupancy("small") == 0
+    assert index.stats["expired"] == 1
+
+
+def test_re_reserving_replaces_the_old_hold(clock):
+    index = OccupancyIndex(reservation_ttl=60)
+    index.reserve("a", "small")
+    clock.now += 30
+    index.reserve("a", "large")
+
+    assert index.occupancy("small") == 0
+    assert index.occupancy("large") == 1
+
+    clock.now += 30  # The first hold's heap entry comes due and is skipped
+    assert index.occupancy("large") == 1
+    assert index.stats["expired"] == 0
+
+    clock.now += 30
+    assert index.occupancy("large") == 0
+
+
+def test_claimed_reservation_is_not_expired_later(clock):
+    index = OccupancyIndex(reservation_ttl=60)
+    index.reserve("a", "small")
+    index.join("a", "small")
+
+    clock.now += 60
+    assert index.occupancy("small") == 1
+    assert index.stats["expired"] == 0
+
+
+def test_reserve_is_a_no_op_for_current_members(clock):
+    index = OccupancyIndex(reservation_ttl=60)
+    index.join("a", "small")
+    index.reserve("a", "small")
+    assert index.occupancy("small") == 1
+
+
+def test_leave_and_rejoin_move_the_member(clock):
+    index = OccupancyIndex(reservation_ttl=60)
+    index.join("a", "small")
+    index.join("a", "large")
+    assert (index.members("small"), index.members("large")) == (0, 1)
+
+    index.leave("a")
+    index.leave("a")  # Duplicate leave from a disconnect
+    assert index.members("large") == 0
+    assert index.stats["leaves"] == 1
+
+
+def test_sync_replaces_only_that_workers_members(clock):
+    index = OccupancyIndex(reservation_ttl=60)
+    index.join("a", "small", worker_id="w1")
+    index.join("b", "small", worker_id="w1")
+    index.join("c", "large", worker_id="w2")
+
+    # w1 missed b's leave while its stream was down
+    index.sync("w1", {"a": "small", "d": "large"})
+
+    assert index.members("small") == 1
+    assert index.members("large") == 2
+    assert index.snapshot()["total_members"] == 3
+
+
+def test_partition_skips_unknown_and_duplicate_rooms(clock):
+    index = OccupancyIndex(reservation_ttl=60)
+    available, full = index.partition(["large", "missing", "large", "small"], CAPACITY.get)
+    assert (available, full) == (["large", "small"], [])
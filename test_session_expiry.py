@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Tests for idle WebSocket session expiry
+"""
+
+import pathlib
+import sys
+
+import pytest
+
+sys.path.append(str(pathlib.Path(__file__).parent / "backend"))
+
+from websocket import session_expiry
+from websocket.session_expiry import IdleSessionTracker
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(session_expiry, "time", fake)
+    return fake
+
+
+def test_idle_session_expires_at_its_deadline(clock):
+    tracker = IdleSessionTracker(idle_timeout=60)
+    tracker.add("a")
+
+    clock.now += 59
+    assert tracker.pop_expired() == []
+
+    clock.now += 1
+    assert tracker.pop_expired() == ["a"]
+    assert len(tracker) == 0
+    assert tracker.next_deadline() is None
+
+
+def test_touch_pushes_the_deadline_back_lazily(clock):
+    tracker = IdleSessionTracker(idle_timeout=60)
+    tracker.add("a")
+
+    clock.now += 50
+    tracker.touch("a")
+    assert tracker.next_deadline() == 1060  # Touch doesn't rewrite the heap
+
+    clock.now += 10
+    assert tracker.pop_expired() == []
+    assert tracker.next_deadline() == 1110  # The due entry was re-pushed at the real deadline
+
+    clock.now += 50
+    assert tracker.pop_expired() == ["a"]
+
+
+def test_each_session_keeps_one_heap_entry(clock):
+    tracker = IdleSessionTracker(idle_timeout=60)
+    tracker.add("a")
+    for _ in range(100):
+        clock.now += 1
+        tracker.touch("a")
+
+    assert len(tracker._deadlines) == 1
+
+
+def test_expiry_order_follows_last_activity(clock):
+    tracker = IdleSessionTracker(idle_timeout=60)
+    tracker.add("a")
+    clock.now += 10
+    tracker.add("b")
+    clock.now += 10
+    tracker.touch("a")
+
+    clock.now += 50
+    assert tracker.pop_expired() == ["b"]
+    clock.now += 10
+    assert tracker.pop_expired() == ["a"]
+
+
+def test_removed_session_never_expires(clock):
+    tracker = IdleSessionTracker(idle_timeout=60)
+    tracker.add("a")
+    tracker.remove("a")
+
+    clock.now += 60
+    assert tracker.pop_expired() == []
+    assert tracker.next_deadline() is None  # The stale entry was discarded
+
+
+def test_touch_after_park_does_not_revive_the_session(clock):
+    # Parking removes a session from the idle tracker; a late frame must not put it back
+    tracker = IdleSessionTracker(idle_timeout=60)
+    tracker.add("a")
+    tracker.remove("a")
+    tracker.touch("a")
+
+    assert len(tracker) == 0
+    assert tracker.idle_seconds("a") is None
+    clock.now += 60
+    assert tracker.pop_expired() == []
+
+
+def test_resume_after_park_tracks_from_the_new_activity(clock):
+    tracker = IdleSessionTracker(idle_timeout=60)
+    tracker.add("a")
+    clock.now += 30
+    tracker.remove("a")  # Parked
+    clock.now += 10
+    tracker.add("a")  # Resumed; the old heap entry is still pending
+
+    clock.now += 20
+    assert tracker.pop_expired() == []  # Old entry comes due and re-pushes itself
+    assert len(tracker._deadlines) == 1
+
+    clock.now += 40
+    assert tracker.pop_expired() == ["a"]
+
+
+def test_idle_seconds(clock):
+    tracker = IdleSessionTracker(idle_timeout=60)
+    tracker.add("a")
+    clock.now += 12.5
+    assert tracker.idle_seconds("a") == 12.5
+    assert tracker.idle_seconds("unknown") is None
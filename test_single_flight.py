@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Tests for single-flight coalescing of analyses and LLM prompts
+"""
+
+import asyncio
+import pathlib
+import sys
+
+import pytest
+
+sys.path.append(str(pathlib.Path(__file__).parent / "backend"))
+
+from metta.analysis_executor import AnalysisExecutor
+from metta.metta_engine import get_metta_engine
+from metta.single_flight import SingleFlight
+
+
+class CountingWork:
+    """Slow upstream call that counts how often it really runs"""
+
+    def __init__(self, result="done", error: Exception = None):
+        self.calls = 0
+        self.release = asyncio.Event()
+        self.result = result
+        self.error = error
+
+    async def __call__(self):
+        self.calls += 1
+        await self.release.wait()
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+
+def test_concurrent_identical_calls_share_one_execution():
+    async def scenario():
+        flights = SingleFlight()
+        work = CountingWork()
+        callers = [asyncio.ensure_future(flights.run("key", work)) for _ in range(5)]
+        await asyncio.sleep(0)
+        work.release.set()
+
+        assert await asyncio.gather(*callers) == ["done"] * 5
+        assert work.calls == 1
+        assert flights.get_stats() == {"calls": 5, "executed": 1, "coalesced": 4, "failed": 0, "in_flight": 0}
+
+    asyncio.run(scenario())
+
+
+def test_different_keys_run_separately():
+    async def scenario():
+        flights = SingleFlight()
+        work = CountingWork()
+        callers = [asyncio.ensure_future(flights.run(key, work)) for key in ("a", "b")]
+        await asyncio.sleep(0)
+        work.release.set()
+
+        await asyncio.gather(*callers)
+        assert work.calls == 2
+
+    asyncio.run(scenario())
+
+
+def test_key_is_released_after_completion():
+    async def scenario():
+        flights = SingleFlight()
+        work = CountingWork()
+        work.release.set()
+
+        await flights.run("key", work)
+        await flights.run("key", work)
+        assert work.calls == 2
+        assert flights.stats["coalesced"] == 0
+
+    asyncio.run(scenario())
+
+
+def test_errors_reach_every_caller():
+    async def scenario():
+        flights = SingleFlight()
+        work = CountingWork(error=RuntimeError("upstream down"))
+        callers = [asyncio.ensure_future(flights.run("key", work)) for _ in range(3)]
+        await asyncio.sleep(0)
+        work.release.set()
+
+        results = await asyncio.gather(*callers, return_exceptions=True)
+        assert all(isinstance(result, RuntimeError) for result in results)
+        assert work.calls == 1
+        assert flights.get_stats()["failed"] == 1
+        assert flights.get_stats()["in_flight"] == 0
+
+    asyncio.run(scenario())
+
+
+def test_cancelled_caller_does_not_cancel_the_others():
+    async def scenario():
+        flights = SingleFlight()
+        work = CountingWork()
+        leader = asyncio.ensure_future(flights.run("key", work))
+        follower = asyncio.ensure_future(flights.run("key", work))
+        await asyncio.sleep(0)
+
+        leader.cancel()
+        await asyncio.sleep(0)
+        work.release.set()
+
+        assert await follower == "done"
+        assert leader.cancelled()
+        assert work.calls == 1
+
+    asyncio.run(scenario())
+
+
+def test_executor_coalesces_identical_pool_analyses():
+    async def scenario():
+        executor = AnalysisExecutor(mode="thread", max_workers=2, inline_max_chars=10)
+        message = "I feel sad and lonely after my divorce and I don't know what to do " * 20
+        get_metta_engine().analysis_cache.clear()
+        try:
+            results = await asyncio.gather(*(executor.analyze(message, {"room_type": "general"}) for _ in range(5)))
+        finally:
+            executor.shutdown()
+
+        assert executor.stats["submitted"] == 1
+        assert executor.get_stats()["coalesced"] == 4
+        # Every caller gets its own copy, nested lists included
+        assert len({id(result) for result in results}) == 5
+        assert all(result == results[0] for result in results)
+
+        expected = results[1]["room_suggestions"][:]
+        results[0]["room_suggestions"].append("annotated-by-caller")
+        results[0]["resources"].append({"name": "annotated-by-caller"})
+        assert all(result["room_suggestions"] == expected for result in results[1:])
+        assert all({"name": "annotated-by-caller"} not in result["resources"] for result in results[1:])
+
+    asyncio.run(scenario())
+
+
+def test_concurrent_identical_prompts_make_one_llm_call():
+    pytest.importorskip("httpx")
+    from response_cache import ResponseCache
+    from utils import LLMIntegration
+
+    class FakeClient:
+        def __init__(self):
+            self.calls = 0
+
+        async def chat_completion(self, messages):
+            self.calls += 1
+            await asyncio.sleep(0.01)
+            return "I'm here for you."
+
+    async def scenario():
+        llm = LLMIntegration(cache=ResponseCache(max_size=0))
+        llm.client = FakeClient()
+        llm.in_flight = SingleFlight()
+
+        replies = await asyncio.gather(*(llm.generate_response("I miss my kids", {}) for _ in range(6)))
+        assert replies == ["I'm here for you."] * 6
+        assert llm.client.calls == 1
+        assert llm.in_flight.stats["coalesced"] == 5
+
+    asyncio.run(scenario())